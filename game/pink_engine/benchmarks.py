@@ -0,0 +1,218 @@
+import random
+import tracemalloc
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+import renpy  # noqa
+from pink_engine.commons import Coord
+from pink_engine.tiled_game import GameTimerTimedCode, GameTimerTimedEvent
+from pink_engine.orthogonal_tiled_map import OrthogonalTiledMapGameObjectMobile, PathfindingNode, \
+    spawn_sprite_collection
+from pink_engine.orthogonal_tiled_map_commands import ControlCommand
+
+# Developer benchmarks, meant to be run from the Ren'Py console (shift+O) while an orthogonal tiled map is being shown,
+# for instance on the test_corridor_A19 map of the demo game:
+#     pink.bench.benchmark_frame_order()
+#     pink.bench.benchmark_slotted_memory()
+# Both print a small table, and return the measurements they printed.
+
+
+def benchmark_frame_order(
+        mover_counts: Tuple[int, ...] = (0, 10, 100),
+        frames: int = 200,
+        repeats: int = 5,
+        sprite_collection_path: Optional[str] = None,
+        seed: int = 19
+) -> List[Tuple[int, float, float]]:
+    """
+    Measures the cost per frame of putting the objects in frame in render order on the current map, while a number of
+    spawned sprite collections move 4 pixels every frame. Compares sorting every object in frame anew each frame, which
+    is what the map did before its frame order was kept up to date incrementally, with the incremental frame order.
+    The spawned sprite collections are removed again afterwards.
+    :param mover_counts: The numbers of moving sprite collections to measure with.
+    :param frames: The number of frames to time per measurement.
+    :param repeats: The number of times each measurement is repeated. The fastest repeat is reported.
+    :param sprite_collection_path: The sprite collection to spawn. Defaults to pink_otm_default_sprite.
+    :param seed: The seed for picking the coordinates the sprite collections are spawned at, so that runs are
+    comparable.
+    :return: For every mover count, the mover count, the microseconds per frame taken by sorting anew, and the
+    microseconds per frame taken by the incremental frame order.
+    """
+    game_map = renpy.store.pink_otm_current_map
+    displayable = game_map._displayable
+    if sprite_collection_path is None:
+        sprite_collection_path = renpy.store.pink_otm_default_sprite
+
+    results = []
+    for mover_count in mover_counts:
+        movers = _spawn_movers(game_map, mover_count, sprite_collection_path, seed)
+        try:
+            sort_time = _time_frames(game_map, movers, frames, repeats, lambda: displayable.sort_objects(
+                displayable.get_objects_in_frame()))
+            incremental_time = _time_frames(
+                game_map, movers, frames, repeats, displayable.get_sorted_objects_in_frame)
+        finally:
+            for mover in movers:
+                game_map.remove_element(mover)
+        results.append((mover_count, sort_time * 1000000, incremental_time * 1000000))
+
+    print("{:>8} {:>16} {:>16}".format("movers", "sort (us)", "incremental (us)"))
+    for mover_count, sort_time, incremental_time in results:
+        print("{:>8} {:>16.1f} {:>16.1f}".format(mover_count, sort_time, incremental_time))
+    return results
+
+
+def _spawn_movers(game_map, mover_count, sprite_collection_path, seed):
+    """
+    :param OrthogonalTiledMap game_map: The map to spawn the sprite collections on.
+    :param int mover_count: The number of sprite collections to spawn.
+    :param str sprite_collection_path: The sprite collection to spawn.
+    :param int seed: The seed for picking the coordinates to spawn at.
+    :return: The spawned sprite collections, on coordinates around the player that are in frame.
+    :rtype: list
+    """
+    randomizer = random.Random(seed)
+    center = game_map.player_object.central_coord
+    movers = []
+    for _ in range(mover_count):
+        x_coord = min(max(center.x + randomizer.randint(-8, 8), 0), game_map.base_grid.base_grid_x_size - 1)
+        y_coord = min(max(center.y + randomizer.randint(-5, 5), 0), game_map.base_grid.base_grid_y_size - 1)
+        movers.append(spawn_sprite_collection(sprite_collection_path, x_coord, y_coord))
+    return movers
+
+
+def _time_frames(game_map, movers, frames, repeats, get_frame_order):
+    """
+    :param OrthogonalTiledMap game_map: The map the movers are on.
+    :param list movers: The sprite collections to move every frame.
+    :param int frames: The number of frames to time.
+    :param int repeats: The number of times to repeat the timing.
+    :param function get_frame_order: Returns the objects in frame in render order.
+    :return: The fastest time per frame in seconds, over all repeats.
+    :rtype: float
+    """
+    get_frame_order()
+    best_time = None
+    for _ in range(repeats):
+        start_time = perf_counter()
+        for frame in range(frames):
+            # Moves back and forth, so that every mover ends up where it started.
+            x_offset = 4 if frame % 2 == 0 else 0
+            for mover in movers:
+                game_map.move_element(mover.displayable_id, mover.x + x_offset, mover.y)
+            get_frame_order()
+        frame_time = (perf_counter() - start_time) / frames
+        if best_time is None or frame_time < best_time:
+            best_time = frame_time
+    for mover in movers:
+        game_map.move_element(mover.displayable_id, mover.x, mover.y)
+    return best_time
+
+
+class _UnslottedObject(object):
+    """
+    Stands in for an object of a class from before it used __slots__: it keeps the same attributes in an attribute
+    dictionary instead.
+    """
+    pass
+
+
+def benchmark_slotted_memory(instance_count: int = 10000) -> List[Tuple[str, int, float, float, float]]:
+    """
+    Measures the memory taken up per instance by the classes that use __slots__, against objects that keep the same
+    attributes in an attribute dictionary, as those classes did before. Instances with an attribute dictionary are
+    measured both when created anew and when restored from a save, as restoring them makes their dictionaries larger.
+    Also counts the instances of those classes kept by the current map, to show how much the map saves. Pathfinding
+    nodes only exist while a path is searched, so none are counted.
+    :param instance_count: The number of instances to measure the memory of per class.
+    :return: For every class, its name, the number of its instances on the current map, and the bytes per instance
+    taken up when slotted, when using an attribute dictionary, and when using an attribute dictionary restored from a
+    save.
+    """
+    game_map = renpy.store.pink_otm_current_map
+    base_entries = list(game_map.base_grid.map_elements.values())
+    control_command_count = sum(
+        len(map_object.control_stack) for map_object in game_map.mobile_objects
+        if isinstance(map_object, OrthogonalTiledMapGameObjectMobile))
+    timer = renpy.store.otm_timer
+    samples = [
+        (base_entries[0] if len(base_entries) > 0 else None, len(base_entries)),
+        (PathfindingNode(Coord(0, 0), 0.0), 0),
+        (ControlCommand("go_up"), control_command_count),
+        (GameTimerTimedCode(0.0, "pass", None), sum(len(codes) for codes in timer._timed_code_dict.values())),
+        (GameTimerTimedEvent(0.0, "pink_event", (), {}, None),
+         sum(len(events) for events in timer._timed_event_dict.values()))]
+
+    results = []
+    for sample, map_count in samples:
+        if sample is None:
+            continue
+        slot_values = {
+            slot_name: getattr(sample, slot_name) for slot_name in type(sample).__slots__ if hasattr(sample, slot_name)}
+        slotted_size = _measure_instance_size(instance_count, lambda: _copy_slotted(sample, slot_values))
+        unslotted_size = _measure_instance_size(instance_count, lambda: _build_unslotted(slot_values))
+        restored_size = _measure_instance_size(instance_count, lambda: _restore_unslotted(slot_values))
+        results.append((type(sample).__name__, map_count, slotted_size, unslotted_size, restored_size))
+
+    print("{:<36} {:>10} {:>10} {:>10} {:>10}".format("class", "on map", "slotted", "dict", "restored"))
+    for class_name, map_count, slotted_size, unslotted_size, restored_size in results:
+        print("{:<36} {:>10} {:>10.0f} {:>10.0f} {:>10.0f}".format(
+            class_name, map_count, slotted_size, unslotted_size, restored_size))
+    return results
+
+
+def _measure_instance_size(instance_count, build_instance):
+    """
+    :param int instance_count: The number of instances to build.
+    :param function build_instance: Builds a single instance.
+    :return: The memory taken up per built instance in bytes, not including the objects its attributes refer to.
+    :rtype: float
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    instances = [None] * instance_count
+    start_size = tracemalloc.get_traced_memory()[0]
+    for index in range(instance_count):
+        instances[index] = build_instance()
+    size = tracemalloc.get_traced_memory()[0] - start_size
+    if not was_tracing:
+        tracemalloc.stop()
+    return size / instance_count
+
+
+def _copy_slotted(sample, slot_values):
+    """
+    :param SlottedObject sample: The object to copy.
+    :param dict slot_values: The slot values of the given object.
+    :return: A copy of the given object, sharing its attribute values.
+    :rtype: SlottedObject
+    """
+    instance = object.__new__(type(sample))
+    for slot_name, value in slot_values.items():
+        setattr(instance, slot_name, value)
+    return instance
+
+
+def _build_unslotted(slot_values):
+    """
+    :param dict slot_values: The attribute values to give the new object.
+    :return: An object keeping the given attribute values in its attribute dictionary, set one by one as __init__ does.
+    :rtype: _UnslottedObject
+    """
+    instance = _UnslottedObject()
+    for slot_name, value in slot_values.items():
+        setattr(instance, slot_name, value)
+    return instance
+
+
+def _restore_unslotted(slot_values):
+    """
+    :param dict slot_values: The attribute values to give the new object.
+    :return: An object keeping the given attribute values in its attribute dictionary, set all at once as pickle does
+    when loading a save.
+    :rtype: _UnslottedObject
+    """
+    instance = object.__new__(_UnslottedObject)
+    instance.__dict__.update(slot_values)
+    return instance
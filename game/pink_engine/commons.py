@@ -1,10 +1,236 @@
+import ast
 import collections
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from math import floor
+from sys import getsizeof
 import renpy   # noqa - import necessary for conditional_met evaluations, otherwise those can't access renpy vars.
 
 from typing import NamedTuple
 
 Area = collections.namedtuple('Area', 'start_x end_x start_y end_y')
 
+COMPILED_CODE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=COMPILED_CODE_CACHE_SIZE)
+def _compile_cached(source, mode):
+    """
+    :param str source: The given source code
+    :param str mode: The compilation mode, 'eval' or 'exec'
+    :return: The given source code compiled in the given mode. Results are kept in a shared LRU cache, so that the
+    conditions and code snippets set in map properties are only parsed once, rather than every time they are run.
+    :rtype: code
+    """
+    return compile(source, '<string>', mode)
+
+
+def compile_expression(source):
+    """
+    :param str source: The source code of an expression, as would be passed to eval.
+    :return: The compiled expression, which can be passed to eval in the place of its source code.
+    :rtype: code
+    """
+    # eval strips leading spaces and tabs from source code strings, while compile does not.
+    return _compile_cached(source.lstrip(' \t'), 'eval')
+
+
+def compile_statements(source):
+    """
+    :param str source: Source code, as would be passed to exec.
+    :return: The compiled code, which can be passed to exec in the place of its source code.
+    :rtype: code
+    """
+    return _compile_cached(source, 'exec')
+
+
+# Builtins that can be called in an expression without preventing its store dependencies from being determined.
+_PURE_BUILTINS = frozenset(('len', 'abs', 'min', 'max', 'any', 'all', 'int', 'float', 'str', 'bool'))
+
+
+def _collect_store_dependencies(node, dependencies):
+    """
+    Adds the names of the renpy.store variables read by the given expression node to the given set.
+    :param ast.AST node: The given expression node
+    :param set dependencies: The set of store variable names
+    :return: False if the node reads anything other than store variables and constants.
+    :rtype: bool
+    """
+    if isinstance(node, ast.Attribute):
+        store = node.value
+        if (
+                isinstance(store, ast.Attribute) and store.attr == 'store' and
+                isinstance(store.value, ast.Name) and store.value.id == 'renpy'
+        ):
+            dependencies.add(node.attr)
+            return True
+        return _collect_store_dependencies(node.value, dependencies)
+    elif isinstance(node, ast.Name):
+        return node.id in ('True', 'False', 'None')
+    elif isinstance(node, ast.Call):
+        if not (isinstance(node.func, ast.Name) and node.func.id in _PURE_BUILTINS):
+            return False
+        arguments = list(node.args) + [keyword.value for keyword in node.keywords]
+        return all(_collect_store_dependencies(argument, dependencies) for argument in arguments)
+
+    return all(_collect_store_dependencies(child, dependencies) for child in ast.iter_child_nodes(node))
+
+
+@lru_cache(maxsize=COMPILED_CODE_CACHE_SIZE)
+def get_store_dependencies(source):
+    """
+    :param str source: The source code of an expression, such as a conditional.
+    :return: The names of the renpy.store variables the given expression reads, or None if the expression reads
+    anything else (such as self, or the result of a function call), in which case its result can change at any time.
+    :rtype: frozenset|None
+    """
+    try:
+        expression = ast.parse(source.lstrip(' \t'), mode='eval')
+    except SyntaxError:
+        return None
+
+    dependencies = set()
+    if not _collect_store_dependencies(expression, dependencies):
+        return None
+    return frozenset(dependencies)
+
+
+def get_instance_size(instance):
+    """
+    :param object instance: The given object
+    :return: The memory taken up by the given object in bytes, including its attribute dictionary, but not including
+    the objects its attributes refer to.
+    :rtype: int
+    """
+    size = getsizeof(instance)
+    if hasattr(instance, '__dict__'):
+        size += getsizeof(instance.__dict__)
+    return size
+
+
+def get_grid_size(grid):
+    """
+    :param list grid: A grid, as a list of columns that are each a list of cells.
+    :return: The memory taken up by the given grid and its cells in bytes, not including the contents of the cells.
+    :rtype: int
+    """
+    size = getsizeof(grid)
+    for column in grid:
+        size += getsizeof(column) + sum(getsizeof(cell) for cell in column)
+    return size
+
+
+class SlottedObject(object):
+    """
+    The parent class of numerous small objects that use __slots__ rather than an attribute dictionary, to reduce the
+    memory each of them takes up. Objects saved before their class used __slots__ can still be loaded.
+    """
+    __slots__ = ()
+
+    def __setstate__(self, state):
+        """
+        :param dict|tuple state: Either the attribute dictionary of an object saved before its class used __slots__,
+        or a tuple of an attribute dictionary (or None) and a dictionary of slot values.
+        """
+        if isinstance(state, tuple):
+            attribute_dict, slot_dict = state
+            state = dict(attribute_dict or {}, **(slot_dict or {}))
+        for attribute_name, value in state.items():
+            setattr(self, attribute_name, value)
+
+
+# The properties whose effective values are kept in the resolved snapshot of a PropertyDict, with the values they
+# take when not set.
+RESOLVED_PROPERTY_DEFAULTS = {
+    'event_on_activate': None,
+    'event_on_touch': None,
+    'code_on_activate': None,
+    'code_on_touch': None,
+    'event_conditional': "True",
+    'code_conditional': "True",
+    'move_from': None,
+    'move_to': None,
+    'override_go_right': None,
+    'override_go_left': None,
+    'override_go_up': None,
+    'override_go_down': None,
+    'override_go_right_condition': None,
+    'override_go_left_condition': None,
+    'override_go_up_condition': None,
+    'override_go_down_condition': None,
+    'override_go_right_g_inc': None,
+    'override_go_left_g_inc': None,
+    'override_go_up_g_inc': None,
+    'override_go_down_g_inc': None,
+    'sound_tag': None,
+    'check_touch_every_frame': False,
+    'ignores_special_movement': False,
+    'can_always_move': False,
+}
+
+
+class ResolvedProperties(SlottedObject):
+    __slots__ = tuple(RESOLVED_PROPERTY_DEFAULTS)
+
+    def __init__(self, properties):
+        """
+        A snapshot of the effective values of the most frequently read properties of a map object, so that reading
+        them is a single attribute access.
+        :param dict properties: The properties to take the snapshot of.
+        """
+        for property_name, default_value in RESOLVED_PROPERTY_DEFAULTS.items():
+            setattr(self, property_name, properties.get(property_name, default_value))
+
+
+class PropertyDict(dict):
+    """
+    The properties of a map object. Keeps a resolved snapshot of the effective values of its most frequently read
+    properties, which is taken again whenever the dictionary is changed.
+    """
+    __slots__ = ('resolved',)
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.resolved = ResolvedProperties(self)
+
+    def __reduce__(self):
+        return PropertyDict, (dict(self),)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.resolved = ResolvedProperties(self)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.resolved = ResolvedProperties(self)
+
+    def pop(self, *args):
+        value = dict.pop(self, *args)
+        self.resolved = ResolvedProperties(self)
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self.resolved = ResolvedProperties(self)
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.resolved = ResolvedProperties(self)
+
+    def clear(self):
+        dict.clear(self)
+        self.resolved = ResolvedProperties(self)
+
+    def copy(self):
+        return PropertyDict(self)
+
 
 class Coord(NamedTuple):
     x: int
@@ -37,6 +263,155 @@ class Coord(NamedTuple):
             return self.down
 
 
+class AreaIndex(object):
+    BUCKET_SIZE = 8  # The width and height in coordinates of the buckets the indexed areas are sorted into.
+    MAX_AREA_BUCKETS = 1024  # Entries spanning more buckets than this are instead returned for every coordinate.
+
+    def __init__(self):
+        """
+        A spatial index of areas, which sorts entries into a grid of buckets by the areas they cover, so that the
+        entries that may cover a coordinate can be retrieved without checking every entry. Entries are returned in the
+        order they were added.
+        """
+        self.entries = []  # (key, value) tuples, in the order they were added.
+        self._key_positions = {}
+        self._buckets = {}  # (bucket x, bucket y) -> positions of the entries whose areas overlap the bucket
+        self._unbucketed = []  # positions of the entries spanning more than MAX_AREA_BUCKETS buckets
+
+    def add(self, key, value, areas):
+        """
+        Adds an entry to this index.
+        :param key: The key of the entry, such as an area ID. Can be None.
+        :param value: The value of the entry.
+        :param tuple[Area] areas: The areas covered by the entry. The entry is indexed under the rectangle enclosing
+        all of them.
+        """
+        position = len(self.entries)
+        self.entries.append((key, value))
+        if key is not None:
+            self._key_positions[key] = position
+
+        start_x = floor(min(area.start_x for area in areas) / self.BUCKET_SIZE)
+        end_x = floor(max(area.end_x for area in areas) / self.BUCKET_SIZE)
+        start_y = floor(min(area.start_y for area in areas) / self.BUCKET_SIZE)
+        end_y = floor(max(area.end_y for area in areas) / self.BUCKET_SIZE)
+        if (end_x - start_x + 1) * (end_y - start_y + 1) > self.MAX_AREA_BUCKETS:
+            self._unbucketed.append(position)
+            return
+
+        for bucket_x in range(start_x, end_x + 1):
+            for bucket_y in range(start_y, end_y + 1):
+                self._buckets.setdefault((bucket_x, bucket_y), []).append(position)
+
+    def get_entries(self, coords, extra_keys=()):
+        """
+        Retrieves the entries whose areas may cover the given coordinates. As entries are indexed by bucket, the
+        returned entries still have to be checked against the coordinates themselves.
+        :param tuple coords: The given coordinates.
+        :param extra_keys: The keys of entries to return in addition to those that may cover the given coordinates.
+        :return: (key, value) tuples, in the order the entries were added.
+        :rtype: list[tuple]
+        """
+        bucket = (floor(coords[0] / self.BUCKET_SIZE), floor(coords[1] / self.BUCKET_SIZE))
+        positions = self._buckets.get(bucket, [])
+        if self._unbucketed or extra_keys:
+            positions = set(positions)
+            positions.update(self._unbucketed)
+            positions.update(self._key_positions[key] for key in extra_keys if key in self._key_positions)
+            positions = sorted(positions)
+        return [self.entries[position] for position in positions]
+
+
+class FrameTimeline(object):
+    def __init__(self, end_times, frames):
+        """
+        A looping sequence of animation frames, stored as an array of cumulative frame end times, so that the frame
+        displayed at any given time can be found through a bisect, no matter how much time has passed.
+
+        :param list end_times: For every frame, the time since the start of the animation at which that frame ends.
+        :param list frames: The frames of the animation (image names or tile ids), in order.
+        """
+        self.end_times = array('d', end_times)
+        self.frames = list(frames)
+        self.duration = self.end_times[-1] if len(self.end_times) > 0 else 0.0
+
+    @classmethod
+    def from_durations(cls, durations, frames):
+        """
+        :param list durations: For every frame, the amount of time it is displayed.
+        :param list frames: The frames of the animation (image names or tile ids), in order.
+        :return: A timeline for the given frames, displayed for the given durations.
+        :rtype: FrameTimeline
+        """
+        end_times = []
+        end_time = 0
+        for duration in durations:
+            end_time += duration
+            end_times.append(end_time)
+        return cls(end_times, frames)
+
+    @classmethod
+    def from_frame_dict(cls, frames, current_key=None):
+        """
+        Converts a frame dictionary, in the format animations were saved in before frame timelines were used.
+        :param dict frames: For every frame, the time since the start of the animation at which that frame ends, mapped
+        to the frame. The dictionary may be rotated, so that the frame currently displayed comes first.
+        :param float current_key: The end time of the frame currently displayed, if any.
+        :return: The timeline for the given frames, and the index of the frame currently displayed.
+        :rtype: tuple
+        """
+        end_times = sorted(frames)
+        frame_index = end_times.index(current_key) if current_key in frames else 0
+        return cls(end_times, [frames[end_time] for end_time in end_times]), frame_index
+
+    def frame_index_at(self, time):
+        """
+        :param float time: The time since the start of the animation.
+        :return: The index of the frame displayed at the given time.
+        :rtype: int
+        """
+        if self.duration <= 0:
+            return 0
+        return min(bisect_left(self.end_times, time % self.duration), len(self.frames) - 1)
+
+    def frame_at(self, time):
+        """
+        :param float time: The time since the start of the animation.
+        :return: The frame displayed at the given time.
+        """
+        return self.frames[self.frame_index_at(time)]
+
+    def advance(self, frame_index, frame_end_time, time):
+        """
+        Finds the frame that should be displayed at the given time, for an animation whose frame with the given index
+        ends at the given frame end time.
+        :param int frame_index: The index of the frame currently displayed.
+        :param float frame_end_time: The time at which the frame currently displayed ends.
+        :param float time: The time for which to find the displayed frame.
+        :return: The index of the frame displayed at the given time, and the time at which that frame ends.
+        :rtype: tuple
+        """
+        if self.duration <= 0:
+            return frame_index, time
+
+        cycle_start = frame_end_time - self.end_times[frame_index]
+        cycles = floor((time - cycle_start) / self.duration)
+        cycle_start += cycles * self.duration
+
+        new_index = min(bisect_left(self.end_times, time - cycle_start), len(self.frames) - 1)
+        new_frame_end_time = cycle_start + self.end_times[new_index]
+
+        # Guards against floating point inaccuracies placing the end of the found frame just before the given time.
+        while new_frame_end_time < time:
+            new_index += 1
+            if new_index == len(self.frames):
+                new_index = 0
+                cycle_start += self.duration
+            new_frame_end_time = cycle_start + self.end_times[new_index]
+
+        return new_index, new_frame_end_time
+
+
 class MapElement(object):
     def __init__(self, element_dict, parent=None):
         """
@@ -170,7 +545,7 @@ class MapElement(object):
         :return: Whether or not the event conditional is currently met
         :rtype: bool
         """
-        return eval(self.event_conditional)
+        return eval(compile_expression(self.event_conditional))
 
     @property
     def code_on_activate(self):
@@ -184,7 +559,7 @@ class MapElement(object):
             return None
 
     def run_code_on_activate(self):
-        exec(self.code_on_activate)
+        exec(compile_statements(self.code_on_activate))
 
     @property
     def code_on_touch(self):
@@ -198,7 +573,7 @@ class MapElement(object):
             return None
 
     def run_code_on_touch(self):
-        exec(self.code_on_activate)
+        exec(compile_statements(self.code_on_activate))
 
     @property
     def code_conditional(self):
@@ -219,7 +594,7 @@ class MapElement(object):
         :return: Whether or not the code conditional is currently met
         :rtype: bool
         """
-        return eval(self.code_conditional)
+        return eval(compile_expression(self.code_conditional))
 
     @property
     def conditional(self):
@@ -238,7 +613,7 @@ class MapElement(object):
         :return: Whether or not the conditional is currently met.
         :rtype: bool
         """
-        return eval(self.conditional)
+        return eval(compile_expression(self.conditional))
 
     @property
     def image(self):
@@ -3,4 +3,5 @@ import pink_engine.tiled_game as tm
 import pink_engine.orthogonal_tiled_map as otm
 import pink_engine.tiled_map_display as tmd
 import pink_engine.commons_late as uni
+import pink_engine.benchmarks as bench
 from pink_engine.sound_manager import PinkSoundManager
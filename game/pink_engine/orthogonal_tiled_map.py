@@ -3,35 +3,52 @@ from math import sqrt, ceil, floor
 import json
 import random
 import os
+import re
 import heapq
+from array import array
+from collections import OrderedDict
+from sys import getsizeof
 from typing import List, Tuple, Optional, Dict, Union
 
 from pink_engine.tiled_game import TiledMapGame, TiledMapGameObject, TiledMapSpriteCollection, \
     TiledMapGameObjectSpriteCollection, TiledMapGameLayer, TiledMapGameTile, TiledMapCamera, \
-    TiledMapGameTileAnimated, LAYER_PRIORITY, Overlay, OverlayImage, OverlayText, OverlaySolid, OverlayManager
+    TiledMapGameTileAnimated, LAYER_PRIORITY, Overlay, OverlayImage, OverlayText, OverlaySolid, OverlayManager, \
+    load_map_dict, get_property_dict, pink_map_preloader
 from pink_engine.orthogonal_tiled_map_commands import ControlCommand
 from pink_engine.tileset import TilesetTile, TilesetAnimatedTile
 import renpy  # noqa
 import pygame  # noqa
-from pink_engine.commons import Coord, Area
+from pink_engine.commons import Coord, Area, compile_expression, compile_statements, get_instance_size, get_grid_size, \
+    SlottedObject, PropertyDict, AreaIndex, get_store_dependencies
 
 
 class OrthogonalTiledMapGameObjectBase(object):
-    properties = {}
+    properties = PropertyDict()
     width = 0
     height = 0
     arc_y_offset = 0
 
+    # Prefixes of the properties that make a base behave differently from having no base at all, by setting movement
+    # rules, events, code, movement overrides, sound tags or emitted sounds.
+    BASE_PROPERTY_PREFIXES = ('move_', 'event_', 'code_', 'override_', 'sound_tag', 'emits_sound')
+
+    def has_base_properties(self):
+        """
+        :return: Whether or not this object has any property that affects its base.
+        :rtype: bool
+        """
+        for property_name in self.properties:
+            if property_name.startswith(self.BASE_PROPERTY_PREFIXES):
+                return True
+        return False
+
     @property
     def event_on_activate(self):
         """
         :return: The label of the event that should trigger when interacting with this object.
         :rtype: str|None
         """
-        if 'event_on_activate' in self.properties:
-            return self.properties['event_on_activate']
-        else:
-            return None
+        return self.properties.resolved.event_on_activate
 
     @event_on_activate.setter
     def event_on_activate(self, value: str):
@@ -44,7 +61,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :rtype: list
         """
         if 'event_on_activate_args' in self.properties:
-            return eval(self.properties['event_on_activate_args'])
+            return eval(compile_expression(self.properties['event_on_activate_args']))
         else:
             return []
 
@@ -55,7 +72,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :rtype: dict
         """
         if 'event_on_activate_kwargs' in self.properties:
-            return eval(self.properties['event_on_activate_kwargs'])
+            return eval(compile_expression(self.properties['event_on_activate_kwargs']))
         else:
             return {}
 
@@ -65,10 +82,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: The label of the event that should trigger when touching this object.
         :rtype: str|None
         """
-        if 'event_on_touch' in self.properties:
-            return self.properties['event_on_touch']
-        else:
-            return None
+        return self.properties.resolved.event_on_touch
 
     @property
     def event_on_touch_args(self):
@@ -77,7 +91,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :rtype: list
         """
         if 'event_on_touch_args' in self.properties:
-            return eval(self.properties['event_on_touch_args'])
+            return eval(compile_expression(self.properties['event_on_touch_args']))
         else:
             return []
 
@@ -88,7 +102,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :rtype: dict
         """
         if 'event_on_touch_kwargs' in self.properties:
-            return eval(self.properties['event_on_touch_kwargs'])
+            return eval(compile_expression(self.properties['event_on_touch_kwargs']))
         else:
             return {}
 
@@ -98,13 +112,10 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: The code (in string form) that should run when interacting with this object.
         :rtype: str|None
         """
-        if 'code_on_activate' in self.properties:
-            return self.properties['code_on_activate']
-        else:
-            return None
+        return self.properties.resolved.code_on_activate
 
     def run_code_on_activate(self):
-        exec(self.code_on_activate)
+        exec(compile_statements(self.code_on_activate))
 
     @property
     def code_on_touch(self):
@@ -112,13 +123,10 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: The code (in string form) that should run when touching this object.
         :rtype: str|None
         """
-        if 'code_on_touch' in self.properties:
-            return self.properties['code_on_touch']
-        else:
-            return None
+        return self.properties.resolved.code_on_touch
 
     def run_code_on_touch(self):
-        exec(self.code_on_touch)
+        exec(compile_statements(self.code_on_touch))
 
     @property
     def code_on_add(self):
@@ -136,7 +144,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         Runs the code_on_add on this object.
         """
         if self.code_on_add is not None:
-            exec(self.code_on_add)
+            exec(compile_statements(self.code_on_add))
 
     @property
     def code_on_remove(self):
@@ -154,7 +162,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         Runs the code_on_remove on this object.
         """
         if self.code_on_remove is not None:
-            exec(self.code_on_remove)
+            exec(compile_statements(self.code_on_remove))
 
     @property
     def event_conditional(self):
@@ -164,10 +172,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         player orientation.
         :rtype: str
         """
-        if "event_conditional" in self.properties:
-            return self.properties["event_conditional"]
-        else:
-            return "True"
+        return self.properties.resolved.event_conditional
 
     @property
     def event_conditional_met(self):
@@ -175,7 +180,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: Whether or not the event conditional is currently met
         :rtype: bool
         """
-        return eval(self.event_conditional)
+        return eval(compile_expression(self.event_conditional))
 
     @property
     def code_conditional(self):
@@ -185,10 +190,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         player orientation.
         :rtype: str
         """
-        if "code_conditional" in self.properties:
-            return self.properties["code_conditional"]
-        else:
-            return "True"
+        return self.properties.resolved.code_conditional
 
     @property
     def code_conditional_met(self):
@@ -196,7 +198,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: Whether or not the code conditional is currently met
         :rtype: bool
         """
-        return eval(self.code_conditional)
+        return eval(compile_expression(self.code_conditional))
 
     @property
     def base_offset_x_start(self):
@@ -252,10 +254,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: The movement allowed from a square occupied by this object.
         :rtype: str|None
         """
-        if "move_from" in self.properties:
-            return self.properties["move_from"]
-        else:
-            return None
+        return self.properties.resolved.move_from
 
     @property
     def move_to(self):
@@ -263,10 +262,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: The movement allowed to a square occupied by this object.
         :rtype: str|None
         """
-        if "move_to" in self.properties:
-            return self.properties["move_to"]
-        else:
-            return None
+        return self.properties.resolved.move_to
 
     @property
     def override_go_right(self):
@@ -275,10 +271,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         be evaluated in context of the object carrying out the commands.
         :rtype: str|None
         """
-        if "override_go_right" in self.properties:
-            return self.properties["override_go_right"]
-        else:
-            return None
+        return self.properties.resolved.override_go_right
 
     @property
     def override_go_left(self):
@@ -287,10 +280,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         be evaluated in context of the object carrying out the commands.
         :rtype: str|None
         """
-        if "override_go_left" in self.properties:
-            return self.properties["override_go_left"]
-        else:
-            return None
+        return self.properties.resolved.override_go_left
 
     @property
     def override_go_up(self):
@@ -299,10 +289,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         be evaluated in context of the object carrying out the commands.
         :rtype: str|None
         """
-        if "override_go_up" in self.properties:
-            return self.properties["override_go_up"]
-        else:
-            return None
+        return self.properties.resolved.override_go_up
 
     @property
     def override_go_down(self):
@@ -311,10 +298,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         be evaluated in context of the object carrying out the commands.
         :rtype: str|None
         """
-        if "override_go_down" in self.properties:
-            return self.properties["override_go_down"]
-        else:
-            return None
+        return self.properties.resolved.override_go_down
 
     @property
     def override_go_right_condition(self):
@@ -322,10 +306,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: the conditions for overriding the movement on this coordinate.
         :rtype: str
         """
-        if "override_go_right_condition" in self.properties:
-            return self.properties["override_go_right_condition"]
-        else:
-            return None
+        return self.properties.resolved.override_go_right_condition
 
     @property
     def override_go_left_condition(self):
@@ -333,10 +314,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: the conditions for overriding the movement on this coordinate.
         :rtype: str
         """
-        if "override_go_left_condition" in self.properties:
-            return self.properties["override_go_left_condition"]
-        else:
-            return None
+        return self.properties.resolved.override_go_left_condition
 
     @property
     def override_go_up_condition(self):
@@ -344,10 +322,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: the conditions for overriding the movement on this coordinate.
         :rtype: str
         """
-        if "override_go_up_condition" in self.properties:
-            return self.properties["override_go_up_condition"]
-        else:
-            return None
+        return self.properties.resolved.override_go_up_condition
 
     @property
     def override_go_down_condition(self):
@@ -355,10 +330,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         :return: the conditions for overriding the movement on this coordinate.
         :rtype: str
         """
-        if "override_go_down_condition" in self.properties:
-            return self.properties["override_go_down_condition"]
-        else:
-            return None
+        return self.properties.resolved.override_go_down_condition
 
     @property
     def override_go_right_coord_offsets(self) -> Optional[List[Tuple[int, int]]]:
@@ -367,7 +339,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         """
         property_name = "override_go_right_coord_offsets"
         if property_name in self.properties:
-            return eval(self.properties[property_name])
+            return eval(compile_expression(self.properties[property_name]))
         else:
             return None
 
@@ -378,7 +350,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         """
         property_name = "override_go_left_coord_offsets"
         if property_name in self.properties:
-            return eval(self.properties[property_name])
+            return eval(compile_expression(self.properties[property_name]))
         else:
             return None
 
@@ -389,7 +361,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         """
         property_name = "override_go_up_coord_offsets"
         if property_name in self.properties:
-            return eval(self.properties[property_name])
+            return eval(compile_expression(self.properties[property_name]))
         else:
             return None
 
@@ -400,7 +372,7 @@ class OrthogonalTiledMapGameObjectBase(object):
         """
         property_name = "override_go_down_coord_offsets"
         if property_name in self.properties:
-            return eval(self.properties[property_name])
+            return eval(compile_expression(self.properties[property_name]))
         else:
             return None
 
@@ -409,44 +381,28 @@ class OrthogonalTiledMapGameObjectBase(object):
         """
         return: The g value increment for calculating smart movement cost
         """
-        property_name = "override_go_right_g_inc"
-        if property_name in self.properties:
-            return self.properties[property_name]
-        else:
-            return None
+        return self.properties.resolved.override_go_right_g_inc
 
     @property
     def override_go_left_g_inc(self) -> Optional[int]:
         """
         return: The g value increment for calculating smart movement cost
         """
-        property_name = "override_go_left_g_inc"
-        if property_name in self.properties:
-            return self.properties[property_name]
-        else:
-            return None
+        return self.properties.resolved.override_go_left_g_inc
 
     @property
     def override_go_up_g_inc(self) -> Optional[int]:
         """
         return: The g value increment for calculating smart movement cost
         """
-        property_name = "override_go_up_g_inc"
-        if property_name in self.properties:
-            return self.properties[property_name]
-        else:
-            return None
+        return self.properties.resolved.override_go_up_g_inc
 
     @property
     def override_go_down_g_inc(self) -> Optional[int]:
         """
         return: The g value increment for calculating smart movement cost
         """
-        property_name = "override_go_down_g_inc"
-        if property_name in self.properties:
-            return self.properties[property_name]
-        else:
-            return None
+        return self.properties.resolved.override_go_down_g_inc
 
 
 class OrthogonalTiledMapGameTileAnimated(TiledMapGameTileAnimated, OrthogonalTiledMapGameObjectBase):
@@ -783,10 +739,7 @@ class OrthogonalTiledMapGameObject(TiledMapGameObject, OrthogonalTiledMapGameObj
         :return: Whether this object ignores special movement rules
         :rtype: bool
         """
-        if 'ignores_special_movement' in self.properties:
-            return self.properties['ignores_special_movement']
-        else:
-            return False
+        return self.properties.resolved.ignores_special_movement
 
 
 class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
@@ -812,21 +765,7 @@ class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
         if self.should_load_consistent(properties):
             old_incarnation = getattr(renpy.store, properties['ref_name'],
                                       None)  # type: OrthogonalTiledMapGameObjectMobile
-            self.control_stack = old_incarnation.control_stack
-            self.follower = old_incarnation.follower
-
-            # Command handling variables
-            self._current_command = old_incarnation._current_command  # type: ControlCommand
-            self._command_gt_end = old_incarnation._command_gt_end - old_incarnation._last_gt
-            self._command_x_start = old_incarnation.x  # type: int
-            self._command_y_start = old_incarnation.y  # type: int
-            self._command_arc_height = old_incarnation._command_arc_height  # type: int
-            self.arc_y_offset = 0
-            self.x = old_incarnation.x  # type: int
-            self.y = old_incarnation.y  # type: int
-            self._command_x_end = old_incarnation._command_x_end
-            self._command_y_end = old_incarnation._command_y_end
-            self.prev_coord = old_incarnation.prev_coord
+            self._inherit_movement(old_incarnation)
 
         else:
             self.control_stack = self.default_control_stack
@@ -856,6 +795,41 @@ class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
             # Type comparison ensures this only happens at the end of the final loading
             setattr(renpy.store, self.ref_name, self)
 
+    def _inherit_movement(self, old_incarnation):
+        """
+        Takes over the control stack and current movement of the given incarnation of this consistent object.
+        :param OrthogonalTiledMapGameObjectMobile old_incarnation: The incarnation of this object on another map.
+        """
+        self.control_stack = old_incarnation.control_stack
+        self.follower = old_incarnation.follower
+
+        # Command handling variables
+        self._current_command = old_incarnation._current_command  # type: ControlCommand
+        self._command_gt_end = old_incarnation._command_gt_end - old_incarnation._last_gt
+        self._command_x_start = old_incarnation.x  # type: int
+        self._command_y_start = old_incarnation.y  # type: int
+        self._command_arc_height = old_incarnation._command_arc_height  # type: int
+        self.arc_y_offset = 0
+        self.x = old_incarnation.x  # type: int
+        self.y = old_incarnation.y  # type: int
+        self._command_x_end = old_incarnation._command_x_end
+        self._command_y_end = old_incarnation._command_y_end
+        self.prev_coord = old_incarnation.prev_coord
+
+    def adopt_incarnation(self, old_incarnation):
+        """
+        Takes over the position, movement and state of the given incarnation of this consistent object. Used when
+        returning to a map that was kept in memory, while this object has since been loaded on another map.
+        :param OrthogonalTiledMapGameObjectMobile old_incarnation: The incarnation of this object on another map.
+        """
+        self.properties = old_incarnation.properties
+        self.state = old_incarnation.state
+        self.arc_y_offset = 0
+        self.set_to_x_y(old_incarnation.x, old_incarnation.y, override_prev_coord=False)
+        self._inherit_movement(old_incarnation)
+        self._last_gt = 0.0
+        self._command_gt_start = 0.0
+
     @property
     def is_moving(self) -> bool:
         return len(self.control_stack) != 0 or self._current_command is not None
@@ -1334,7 +1308,7 @@ class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
         self._command_gt_start = gt
         self._command_gt_end = gt
         self.finish_command(command)
-        exec(command.code)
+        exec(compile_statements(command.code))
 
     def finish_command(self, command):
         """
@@ -1436,7 +1410,7 @@ class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
         :rtype: list
         """
         if 'default_control_stack' in self.properties:
-            return eval(self.properties['default_control_stack'])
+            return eval(compile_expression(self.properties['default_control_stack']))
         else:
             return []
 
@@ -1446,10 +1420,7 @@ class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
         :return: If true, this object can always move, even if its movement would normally be invalid.
         :rtype: bool
         """
-        if 'can_always_move' in self.properties:
-            return self.properties['can_always_move']
-        else:
-            return False
+        return self.properties.resolved.can_always_move
 
     @can_always_move.setter
     def can_always_move(self, value):
@@ -1467,7 +1438,7 @@ class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
         :rtype: list
         """
         if "default_interaction_stack" in self.properties:
-            return eval(self.properties["default_interaction_stack"])
+            return eval(compile_expression(self.properties["default_interaction_stack"]))
         else:
             if "turn_on_interaction" in self.properties and self.properties['turn_on_interaction'] is False:
                 return []
@@ -1488,10 +1459,7 @@ class OrthogonalTiledMapGameObjectMobile(OrthogonalTiledMapGameObject):
         objects that must react to the player's touch.
         :rtype: bool
         """
-        if 'check_touch_every_frame' in self.properties:
-            return self.properties['check_touch_every_frame']
-        else:
-            return False
+        return self.properties.resolved.check_touch_every_frame
 
     @property
     def movement_sound_function(self) -> Optional[str]:
@@ -1571,26 +1539,18 @@ OrthogonalTiledMapGameObjectMobile.movement_commands = {
 }
 
 
-class PathfindingNode(object):
-    def __init__(self, parent, coord, direction, g, override, override_condition=None):
-        self.parent = parent
-        self.coord = coord
-        self.direction = direction
-
-        if self.parent is None:
-            self.path = []
-        else:
-            self.path = parent.path[:]
-
-        self.override = override
-        self.override_condition = override_condition
+class PathfindingNode(SlottedObject):
+    __slots__ = ('coord', 'g')
 
+    def __init__(self, coord, g=0.0):
+        """
+        A single step of a pathfinding path. Only created by the pathfinding algorithm for the purposes of evaluating
+        override conditions, with the path itself being stored in a set of PathfindingBuffers.
+        :param Coord coord: The coordinate of this node
+        :param float g: The cost of reaching this node.
+        """
+        self.coord = coord
         self.g = g
-        self.h = 0
-        self.f = 0
-
-    def __gt__(self, other):
-        return self.f > other.f
 
     def __eq__(self, other):
         """
@@ -1603,7 +1563,7 @@ class PathfindingNode(object):
         Evaluates the given override condition from the perspective of this node.
         """
         if override_condition is not None:
-            return eval(override_condition)
+            return eval(compile_expression(override_condition))
         else:
             return True
 
@@ -1708,30 +1668,30 @@ class PathfindingNode(object):
         return self.coord[1]
 
 
-class PathfindingQueue(object):
-    def __init__(self):
-        self.data = []
-
-    def empty(self):
-        """
-        :return: Whether or not the heap is empty.
-        :rtype: bool
-        """
-        return not self.data
-
-    def add(self, item, priority):
+class PathfindingBuffers(object):
+    def __init__(self, cell_count):
         """
-        :param PathfindingNode item: The item to add.
-        :param float priority: The priority with which to push the item on the heap.
+        Flat per-cell arrays used by the pathfinding algorithm, reused between searches. Rather than being cleared
+        before every search, every cell is stamped with the number of the search that last reached or closed it, so
+        values left over from previous searches are simply ignored.
+        :param int cell_count: The amount of cells on the map.
         """
-        heapq.heappush(self.data, item)
+        self.search = 0
+        self.reached = array('i', [0]) * cell_count  # The search in which the cell was last reached
+        self.closed = array('i', [0]) * cell_count  # The search in which the cell was last expanded
+        self.parents = array('i', [-1]) * cell_count  # The cell from which the cell was reached, or -1 for a start
+        self.directions = bytearray(cell_count)  # The index of the direction in which the cell was reached
+        self.costs = array('d', [0.0]) * cell_count  # The cost of the cheapest known way to reach the cell
+        self.depths = array('i', [0]) * cell_count  # The amount of steps in the cheapest known way to reach the cell
 
-    def get(self):
+    def start_search(self):
         """
-        :return: the top node on the pathfinding heap.
-        :rtype: PathfindingNode
+        Starts a new search, invalidating the values of all previous searches.
+        :return: The number of the new search
+        :rtype: int
         """
-        return heapq.heappop(self.data)
+        self.search += 1
+        return self.search
 
 
 class OrthogonalTiledMapGameObjectSpriteCollection(
@@ -1756,14 +1716,16 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             else:
                 self.sprite_collection_path = old_incarnation.sprite_collection_path  # note can be a variable name
                 self.sprite_collection = old_incarnation.sprite_collection
+                # The old incarnation's animation is paused if the map it is on was kept in memory when it was left.
+                self.sprite_collection.unpause_animation()
             self.hidden = old_incarnation.hidden
             self.sprite_collection.st_reset_frames(0.0)
             self.sprite_collection.latest_frame_gt = 0.0
         else:
             self.sprite_collection_path = collection_path
             if collection_path.startswith('renpy.store'):
-                collection_path = eval(collection_path)
-            self.sprite_collection = TiledMapSpriteCollection(renpy.exports.file(collection_path))
+                collection_path = eval(compile_expression(collection_path))
+            self.sprite_collection = TiledMapSpriteCollection(collection_path)
             self.hidden = False
 
         OrthogonalTiledMapGameObjectMobile.__init__(
@@ -1775,6 +1737,31 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             # Type comparison ensures this only happens at the end of the final loading
             setattr(renpy.store, self.ref_name, self)
 
+    def adopt_incarnation(self, old_incarnation):
+        """
+        Takes over the position, movement, state and sprite collection of the given incarnation of this consistent
+        object. Used when returning to a map that was kept in memory, while this object has since been loaded on
+        another map.
+        :param OrthogonalTiledMapGameObjectSpriteCollection old_incarnation: The incarnation of this object on another
+        map.
+        """
+        animated_tiles = self.parent.animated_tiles
+        if self.sprite_collection in animated_tiles.animations:
+            animated_tiles.remove(self.sprite_collection)
+
+        if old_incarnation.sprite_collection_path.startswith('renpy.store'):
+            self._initiate_consistent_variable_sprite_collection(old_incarnation=old_incarnation)
+        else:
+            self.sprite_collection_path = old_incarnation.sprite_collection_path
+            self.sprite_collection = old_incarnation.sprite_collection
+            self._orientation = old_incarnation.orientation
+            self.current_animation_name = old_incarnation.current_animation_name
+        self.hidden = old_incarnation.hidden
+
+        animated_tiles.add(self.sprite_collection)
+        self.st_reset_frames(self.parent.last_gt)
+        OrthogonalTiledMapGameObjectMobile.adopt_incarnation(self, old_incarnation)
+
     def per_tick(self, gt):
         OrthogonalTiledMapGameObjectMobile.per_tick(self, gt)
         if not self.is_moving:
@@ -1880,7 +1867,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
         # Deal with variable sprite collections
         if target_sprite_collection.startswith('renpy.store'):
             self.sprite_collection_path = target_sprite_collection
-            target_sprite_collection = eval(target_sprite_collection)
+            target_sprite_collection = eval(compile_expression(target_sprite_collection))
         elif not target_sprite_collection.startswith("pink_engine/sprite_collections/"):
             target_sprite_collection = "pink_engine/sprite_collections/" + target_sprite_collection
             self.sprite_collection_path = target_sprite_collection
@@ -1891,7 +1878,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             self.parent.remove_element(self)
 
         self.current_animation_name = None  # So new animation doesn't register as the same
-        self.sprite_collection = TiledMapSpriteCollection(renpy.exports.file(target_sprite_collection), start_time)
+        self.sprite_collection = TiledMapSpriteCollection(target_sprite_collection, start_time)
         self._set_animation(animation_name)
         if self.parent is not None:
             self.parent.add_element(0, 0, self.layer, self)
@@ -1901,7 +1888,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
                     #  result in being added to the map halfway through.
                     target_coord = self.central_coord
                 self.set_to_coords(target_coord.x, target_coord.y, orientation=old_orientation)  # noqa target_coord exists
-            self.parent.animated_tiles.append(self.sprite_collection)
+            self.parent.animated_tiles.add(self.sprite_collection)
 
         # Regenerating followers ensures proper rendering synchronization, so that they won't become jittery when the
         # camera is moving.
@@ -2200,11 +2187,11 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             override = self.parent.base_grid.get_override_go_left(coord.x, coord.y)
             override_condition = self.parent.base_grid.get_override_go_left_condition(coord.x, coord.y)
             if override is not None and (
-                    self.can_always_move or override_condition is None or eval(override_condition)
+                    self.can_always_move or override_condition is None or eval(compile_expression(override_condition))
             ):
                 if pop:
                     self.finish_command(command)
-                for control in reversed(eval(override)):
+                for control in reversed(eval(compile_expression(override))):
                     self.control_stack.insert(0, control)
                 break
             elif override is not None:
@@ -2231,11 +2218,11 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             override = self.parent.base_grid.get_override_go_right(coord.x, coord.y)
             override_condition = self.parent.base_grid.get_override_go_right_condition(coord.x, coord.y)
             if override is not None and (
-                    self.can_always_move or override_condition is None or eval(override_condition)
+                    self.can_always_move or override_condition is None or eval(compile_expression(override_condition))
             ):
                 if pop:
                     self.finish_command(command)
-                for control in reversed(eval(override)):
+                for control in reversed(eval(compile_expression(override))):
                     self.control_stack.insert(0, control)
                 break
             elif override is not None:
@@ -2262,11 +2249,11 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             override = self.parent.base_grid.get_override_go_up(coord.x, coord.y)
             override_condition = self.parent.base_grid.get_override_go_up_condition(coord.x, coord.y)
             if override is not None and (
-                    self.can_always_move or override_condition is None or eval(override_condition)
+                    self.can_always_move or override_condition is None or eval(compile_expression(override_condition))
             ):
                 if pop:
                     self.finish_command(command)
-                for control in reversed(eval(override)):
+                for control in reversed(eval(compile_expression(override))):
                     self.control_stack.insert(0, control)
                 break
             elif override is not None:
@@ -2293,11 +2280,11 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             override = self.parent.base_grid.get_override_go_down(coord.x, coord.y)
             override_condition = self.parent.base_grid.get_override_go_down_condition(coord.x, coord.y)
             if override is not None and (
-                    self.can_always_move or override_condition is None or eval(override_condition)
+                    self.can_always_move or override_condition is None or eval(compile_expression(override_condition))
             ):
                 if pop:
                     self.finish_command(command)
-                for control in reversed(eval(override)):
+                for control in reversed(eval(compile_expression(override))):
                     self.control_stack.insert(0, control)
                 break
             elif override is not None:
@@ -2321,7 +2308,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
         central_coord = self.central_coord
         if type(target) is str:  # noqa
             target = 'renpy.store.' + target
-            target_object = eval(target)
+            target_object = eval(compile_expression(target))
             if target_object is not None:
                 if command.prev_coord and target_object.prev_coord is not None:
                     target_object_coord = target_object.prev_coord
@@ -2365,7 +2352,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
         start_coords = self.coords
         if type(target) is str:  # noqa
             target = 'renpy.store.' + target
-            target_object = eval(target)
+            target_object = eval(compile_expression(target))
             if target_object is not None:
                 if command.prev_coord and target_object.prev_coord is not None:
                     target_coord = target_object.prev_coord
@@ -2382,8 +2369,8 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
 
         # If no path has been determined, determine path
         if command.pathfinding_path is None or command.path_target != target_coord:
-            path = self.get_pathfinding_path(command, target_coord, start_coords)
-            command.pathfinding_path = path
+            if not self._extend_pathfinding_path(command, target_coord):
+                command.pathfinding_path = self.get_pathfinding_path(command, target_coord, start_coords)
             command.path_target = target_coord
 
         # If a path has been determined, try executing the next step along that path
@@ -2439,7 +2426,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             else:
                 # If the path can't be followed, turn to target and recalculate
                 self.command_turn_to(command, gt, pop=False, instant=True)
-                path = self.get_pathfinding_path(command, target_coord, start_coords)
+                path = self.get_pathfinding_path(command, target_coord, start_coords, use_cache=False)
                 command.pathfinding_path = path
         elif target_coord in start_coords or command.pop_invalid_move:
             if command.pop_invalid_move:
@@ -2447,6 +2434,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             # If path is empty and target reached, pop the command
             command.pathfinding_path = None
             command.path_target = None
+            command.path_end = None
 
             self._set_animation(self.stand_animation)
 
@@ -2464,6 +2452,7 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
                 # Target distance has been reached
                 command.pathfinding_path = None
                 command.path_target = None
+                command.path_end = None
 
                 # Prevents a single frame of inactivity after finishing a go_smart command.
                 self.finish_command(command)
@@ -2475,7 +2464,6 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
                     self._consume_command(gt)
             else:
                 self.command_turn_to(command, gt, pop=False, instant=True)
-                path = self.get_pathfinding_path(command, target_coord, start_coords)
                 command.pathfinding_path = path
 
         else:
@@ -2484,68 +2472,24 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
             path = self.get_pathfinding_path(command, target_coord, start_coords)
             command.pathfinding_path = path
 
-    def _generate_pathfinding_path_children(
-            self, node: PathfindingNode, directions: List[str]
-    ) -> List[PathfindingNode]:
-        """
-        Generates all of a PathfindingNode's children, which are the nodes created by moving in the given directions
-        from that node. Children will be returned in the same order as the directions given.
-        :param node: The node for which to generate children
-        :param directions: The list of directions. Determines the order in which the children are returned, allowing
-        certain directions to be prioritized (used to keep followers standing behind the player, rather than to their
-        side)
-        """
-        children = []
-        for direction in directions:
-            override_movement = self.parent.base_grid.get_override_go_direction(
-                node.coord.x, node.coord.y, direction)
-
-            if override_movement is not None:
-                override_condition = self.parent.base_grid.get_override_condition_direction(
-                    node.coord.x, node.coord.y, direction)
-                coords = self.parent.base_grid.get_override_smart_coords(node.coord.x, node.coord.y, direction)
-                g_increment = self.parent.base_grid.get_override_smart_g_increment(
-                    node.coord.x, node.coord.y, direction)
-
-                for coord in coords:
-                    children.append(PathfindingNode(
-                        parent=node,
-                        coord=coord,
-                        direction=direction,
-                        override=True,
-                        override_condition=override_condition,
-                        g=node.g + g_increment))
-            else:
-                children.append(PathfindingNode(
-                    parent=node,
-                    coord=node.coord.direction(direction),
-                    direction=direction,
-                    override=False,
-                    g=node.g + 1.0))
-
-        return children
-
-    def get_pathfinding_path(self, command: ControlCommand, target_coord: Coord, start_coords: List[Coord]):
+    def get_pathfinding_path(
+            self, command: ControlCommand, target_coord: Coord, start_coords: List[Coord], use_cache: bool = True
+    ):
         """
-        Determines the pathfinding path for the command_go_to_smart function
+        Determines the pathfinding path for the command_go_to_smart function, and stores where it ends in the command.
 
         :param command: The command being executed
         :param target_coord: the final coord of the path
         :param start_coords: the first coords of the path (a list since an object can occupy more than one coord)
+        :param use_cache: If False, a new path is calculated even if one was cached for the same search.
         """
-        target = PathfindingNode(None, target_coord, direction=None, g=None, override=False)
-        open_list = PathfindingQueue()
-        closest_node = None
-        closed_set = set()
-        coord_cost_dict = {}
-
         # Ensures that followers will walk behind you, rather than by your side.
         directions = ["left", "right", "up", "down"]
         if command.target_distance > 0:
             command_target = command.target
             if type(command_target) is str:  # noqa
                 command_target = 'renpy.store.' + command_target
-                target_object = eval(command_target)
+                target_object = eval(compile_expression(command_target))
                 if hasattr(target_object, "orientation"):
                     if target_object.orientation in {'left', 'right'}:
                         directions = ["up", "down", "left", "right"]
@@ -2553,58 +2497,78 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
                 if command_target.orientation in {'left', 'right'}:
                     directions = ["up", "down", "left", "right"]
 
-        # Start with a set of nodes consisting of the starting coordinates
-        for start_coord in start_coords:
-            start_node = PathfindingNode(None, start_coord, direction=None, g=0, override=False)
-            start_node.h = self._coord_distance(start_node.coord, target.coord)
-            open_list.add(start_node, start_node.f)
-            closest_node = start_node
-
-        while not open_list.empty():
-            current_node = open_list.get()
-            closed_set.add(current_node.coord)
-
-            # Found the target, returns the path
-            if current_node.coord == target_coord:
-                return current_node.path[:-command.target_distance or None]
-            elif (
-                    command.target_distance > 0 and
-                    self._coord_distance(current_node.coord, target_coord) <= command.target_distance):
-                return current_node.path
+        base_grid = self.parent.base_grid
+        path, command.path_end = base_grid.find_path(
+            start_coords, target_coord, directions,
+            ignore_priorities=base_grid.get_ignore_priorities(self.base_id, command.ignore_elements),
+            can_always_move=self.can_always_move,
+            target_distance=command.target_distance,
+            max_path_length=command.max_path_length,
+            max_search_nodes=command.max_search_nodes,
+            use_cache=use_cache)
+        return path
 
-            # search is too long, return best path
-            if len(current_node.path) > command.max_path_length:
-                break
+    def _extend_pathfinding_path(self, command: ControlCommand, target_coord: Coord) -> bool:
+        """
+        If the target of a go_to_smart command has moved a single step, tries to adjust the existing path to match,
+        rather than calculating a new one. This keeps followers and chasing objects from carrying out a full search
+        every time their target moves.
 
-            # Loop through children
-            for child in self._generate_pathfinding_path_children(current_node, directions):
-                if child.coord in closed_set:
-                    continue
+        :param command: The command being executed
+        :param target_coord: The new coordinate of the target
+        :return: Whether the path could be adjusted. If not, a new path should be calculated.
+        """
+        old_target = command.path_target
+        path_end = command.path_end
+        path = command.pathfinding_path
+        if path is None or old_target is None or path_end is None:
+            return False
+        if abs(target_coord.x - old_target.x) + abs(target_coord.y - old_target.y) != 1:
+            return False
 
-                if not child.override:
-                    is_permitted = self.can_always_move or self.parent.base_grid.is_move_in_direction_permitted(
-                        self.base_id, current_node.coord, child.direction, ignore_elements=command.ignore_elements)
-                else:
-                    is_permitted = (
-                            self.can_always_move or
-                            child.override_condition is None or
-                            current_node.eval_override_condition(child.override_condition))
+        target_distance = command.target_distance
+        if target_distance > 0:
+            # The path still ends within range of the target
+            if abs(target_coord.x - path_end.x) + abs(target_coord.y - path_end.y) <= target_distance:
+                return True
 
-                if not is_permitted:
-                    continue
+            # Otherwise, follows in the footsteps of the target.
+            if abs(old_target.x - path_end.x) + abs(old_target.y - path_end.y) != 1:
+                return False
+            new_end = old_target
+        else:
+            if path_end != old_target:
+                return False
+            new_end = target_coord
 
-                child.h = self._coord_distance(child.coord, target_coord)
-                child.f = child.g + child.h
+        if new_end.x > path_end.x:
+            direction = "right"
+        elif new_end.x < path_end.x:
+            direction = "left"
+        elif new_end.y > path_end.y:
+            direction = "down"
+        else:
+            direction = "up"
 
-                if child.h < closest_node.h:
-                    closest_node = child
+        base_grid = self.parent.base_grid
+        if len(path) > 0 and path[-1] == base_grid.OPPOSITE_DIRECTIONS[direction]:
+            # The target moved back along the path, so the last step is no longer needed.
+            if base_grid.get_override_go_direction(new_end.x, new_end.y, path[-1]) is not None:
+                return False
+            path.pop()
+        else:
+            if len(path) >= command.max_path_length:
+                return False
+            if base_grid.get_override_go_direction(path_end.x, path_end.y, direction) is not None:
+                return False
+            if not (self.can_always_move or base_grid.is_step_permitted(
+                    path_end.x, path_end.y, direction,
+                    base_grid.get_ignore_priorities(self.base_id, command.ignore_elements))):
+                return False
+            path.append(direction)
 
-                # If this is the cheapest way to get to the child coordinate, adds it to the open set.
-                if child.coord not in coord_cost_dict or child.f < coord_cost_dict[child.coord]:
-                    child.path.append(child.direction)
-                    coord_cost_dict[child.coord] = child.f
-                    open_list.add(child, child.f)
-        return closest_node.path
+        command.path_end = new_end
+        return True
 
     def can_move_in_direction(self, direction: str) -> bool:
         return self.can_always_move or self.parent.base_grid.is_move_in_direction_permitted(
@@ -2614,15 +2578,6 @@ class OrthogonalTiledMapGameObjectSpriteCollection(
         return self.can_always_move or self.parent.base_grid.is_move_in_direction_permitted(
             self.base_id, self.central_coord, self.orientation)
 
-    @staticmethod
-    def _coord_distance(coord, target) -> int:
-        """
-        The heuristics calculation for the pathfinding algorithm
-        :param Coord coord:
-        :param Coord target:
-        """
-        return abs(coord.x - target.x) + abs(coord.y - target.y)
-
     def command_go_random(self, command, gt, pop=True):
         """
         Executes a go_random command.
@@ -3131,7 +3086,11 @@ OrthogonalTiledMapGameObjectSpriteCollection.movement_commands.update({
 })
 
 
-class OrthogonalTiledMapTiledBasesEntry(object):
+class OrthogonalTiledMapTiledBasesEntry(SlottedObject):
+    __slots__ = (
+        'parent', 'game_object', 'element_id', 'base_x_start', 'base_y_start', 'base_x_end', 'base_y_end',
+        'base_priority')
+
     def __init__(self, parent_map, element_id, x, y, layer, game_object):
         """
         A single object's base.
@@ -3330,7 +3289,124 @@ class OrthogonalTiledMapTiledBasesEntry(object):
         return coords
 
 
+class GridCache(object):
+    def __init__(self, max_size):
+        """
+        A least recently used cache for results calculated from a base grid, such as paths. Every result is stored
+        with the tile version of the grid it was calculated for, and with the cells whose objects it depends on. A
+        result is discarded when the tiles of the grid change, or when an object is added to or removed from one of
+        those cells, but not when objects move elsewhere on the map.
+        :param int max_size: The maximum amount of results kept.
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (tile version, dependency cells, result)
+        self._cell_keys = {}  # cell index -> keys of the results depending on the objects in that cell
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, tile_version):
+        """
+        :param key: The key the result was stored under.
+        :param int tile_version: The current tile version of the grid.
+        :return: The result stored under the given key, or None if there is none or it is no longer valid.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        elif entry[0] != tile_version:
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def put(self, key, result, tile_version, cells):
+        """
+        Stores the given result, discarding the least recently used result if the cache is full.
+        :param key: The key to store the result under.
+        :param result: The result, which may not be None.
+        :param int tile_version: The tile version of the grid the result was calculated for.
+        :param cells: The indexes of the cells whose objects the result depends on.
+        """
+        if key in self._entries:
+            self._discard(key)
+        cells = tuple(cells)
+        self._entries[key] = (tile_version, cells, result)
+        for cell in cells:
+            self._cell_keys.setdefault(cell, set()).add(key)
+        if len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate_cell(self, cell):
+        """
+        Discards all results depending on the objects in the given cell.
+        :param int cell: The index of the given cell.
+        """
+        keys = self._cell_keys.pop(cell, None)
+        if keys is not None:
+            for key in keys:
+                self._discard(key)
+
+    def _discard(self, key):
+        """
+        :param key: The key of the result to discard.
+        """
+        _, cells, _ = self._entries.pop(key)
+        for cell in cells:
+            keys = self._cell_keys.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    self._cell_keys.pop(cell)
+
+
+_packed_movement_rules = {}
+
+
+def pack_movement_rule(rule):
+    """
+    :param str rule: A movement rule string, such as "1011", in which every character indicates whether movement
+    is allowed on one side (0 is top, 1 is right, 2 is bottom, 3 is left).
+    :return: The given movement rule packed into a bitmask, with bit n set if movement on side n is allowed.
+    :rtype: int
+    """
+    if rule not in _packed_movement_rules:
+        packed_rule = 0
+        for side, allowed in enumerate(rule):
+            if allowed != "0":
+                packed_rule |= 1 << side
+        _packed_movement_rules[rule] = packed_rule
+    return _packed_movement_rules[rule]
+
+
 class OrthogonalTiledMapTiledBases(object):
+    NO_RULE = 0xFF  # Marks a cell in the packed movement grids for which no tile sets a movement rule.
+    MOVEMENT_RULE_PROPERTIES = ('move_from', 'move_to')
+
+    # For every direction, the x offset, y offset, side moved from, and side moved to.
+    MOVEMENT_DIRECTIONS = {
+        'up': (0, -1, 0, 2),
+        'right': (1, 0, 1, 3),
+        'down': (0, 1, 2, 0),
+        'left': (-1, 0, 3, 1),
+    }
+    PATHFINDING_DIRECTIONS = ('up', 'right', 'down', 'left')
+    OVERRIDE_PROPERTIES = {direction: 'override_go_' + direction for direction in ('up', 'right', 'down', 'left')}
+    INTERACTION_PROPERTIES = ('event_on_activate', 'event_on_touch', 'code_on_activate', 'code_on_touch')
+    OPPOSITE_DIRECTIONS = {'up': 'down', 'right': 'left', 'down': 'up', 'left': 'right'}
+    PATH_CACHE_SIZE = 64
+    SIGHT_CACHE_SIZE = 256
+    FIELD_OF_VIEW_CACHE_SIZE = 64
+
+    # The octants a viewer facing every orientation looks through, each as the x and y steps to the next row further
+    # away, followed by the x and y steps to the next cell further to the side within a row.
+    VIEW_OCTANTS = {
+        'up': ((0, -1, 1, 0), (0, -1, -1, 0)),
+        'right': ((1, 0, 0, 1), (1, 0, 0, -1)),
+        'down': ((0, 1, 1, 0), (0, 1, -1, 0)),
+        'left': ((-1, 0, 0, 1), (-1, 0, 0, -1)),
+    }
+
     def __init__(self, game_object, x_dim, y_dim):
         """
         The structured collection of bases for an orthogonal tiled map
@@ -3340,14 +3416,55 @@ class OrthogonalTiledMapTiledBases(object):
         """
         self.game_object = game_object
 
-        # Creates a grid for all objects, to more efficiently check for objects that might be in your way.
+        # Creates a grid for all objects, to more efficiently check for objects that might be in your way. Every cell
+        # holds the bases covering it, sorted from the highest to the lowest base priority.
         self.base_grid = []
         self.base_grid_x_size = x_dim
         self.base_grid_y_size = y_dim
         for x in range(self.base_grid_x_size):
             self.base_grid.append([])
             for y in range(self.base_grid_y_size):
-                self.base_grid[x].append({})
+                self.base_grid[x].append([])
+
+        # Packed movement grids. For every cell (indexed as x * y_dim + y), these contain the move_from and move_to
+        # rules of the highest tile setting them as bitmasks, along with that tile's base priority. Non-tile bases,
+        # whose rules can change while on the map, are kept per cell in _object_bases and checked on top of these.
+        cell_count = x_dim * y_dim
+        self._packed_rules = {
+            rule_property: bytearray([self.NO_RULE]) * cell_count for rule_property in self.MOVEMENT_RULE_PROPERTIES}
+        self._packed_rule_priorities = {
+            rule_property: [None] * cell_count for rule_property in self.MOVEMENT_RULE_PROPERTIES}
+        self._object_bases = {}  # cell index -> {base priority: base}
+
+        # Sparse index of the cells covered by tiles that have an interaction property, as cell index -> the number of
+        # such tiles. Interactions are only looked up in cells that are in this index or have object bases, as object
+        # properties can change while on the map.
+        self._interaction_tile_cells = {}
+
+        # Tiles without base properties have no effect on movement or events, so instead of getting a base they are
+        # only recorded here: for every cell, the gid of the highest such tile and its layer priority (0 if none).
+        self._plain_tile_gids = array('I', [0]) * cell_count
+        self._plain_tile_priorities = [None] * cell_count
+        self._layer_priorities = {}  # (layer priority, z-order) -> the same tuple, shared between cells.
+        self._pathfinding_buffers = None  # Created on first use, and not saved.
+
+        # Streamed tile layers, whose tiles only get bases for a chunk once the base stack of a cell they cover is
+        # needed (see add_streamed_tile_layer). Kept as (layer, gids, x offset, y offset, element id of the first tile,
+        # gids of tiles added to the grid directly) tuples.
+        self._streamed_tile_layers = []
+        self._streamed_tile_chunks = {}  # chunk of tiles -> the bases created for its tiles
+        self._streamed_tile_chunk_cells = {}  # chunk of tiles -> the chunks of cells covered by the bases of its tiles
+        self._pending_tile_chunks = {}  # chunk of cells -> chunks of tiles covering it that may have no bases yet
+
+        # Incremented whenever a tile base is added to or removed from the grid, invalidating all cached paths, sight
+        # lines and fields of view. Objects only invalidate the cached results depending on the cells they are added to
+        # or removed from.
+        self.tile_version = 0
+        self._path_cache = GridCache(self.PATH_CACHE_SIZE)  # key -> (path, end coord, object cells, object rules)
+        # (start x, start y, end x, end y, touched) -> (tiles clear, object cells on the line), not saved.
+        self._sight_cache = GridCache(self.SIGHT_CACHE_SIZE)
+        # view key -> [coords in sight, (x, y, opaque) of the object cells looked at, game time checked], not saved.
+        self._field_of_view_cache = GridCache(self.FIELD_OF_VIEW_CACHE_SIZE)
 
         # Index of all bases
         self._next_id = -1  # type: int
@@ -3370,6 +3487,10 @@ class OrthogonalTiledMapTiledBases(object):
         :param TiledMapGameLayer layer: The layer the object is placed on
         :param OrthogonalTiledMapGameTile|OrthogonalTiledMapGameObject game_object:
         """
+        if not game_object.single_display and not game_object.has_base_properties():
+            self._add_plain_tile(x, y, layer, game_object)
+            return
+
         element_id = self.get_next_id()
         if game_object.single_display:
             game_object.base_id = element_id
@@ -3379,6 +3500,196 @@ class OrthogonalTiledMapTiledBases(object):
 
         self.add_to_grid(new_element)
 
+    def _add_plain_tile(self, x, y, layer, tile):
+        """
+        Records the given tile, which has no base properties, in the plain tile grid for the cells it covers.
+        :param int x: Distance in pixels between the tile's left side and the left border of the map.
+        :param int y: Distance in pixels between the tile's top side and the top border of the map.
+        :param TiledMapGameLayer layer: The layer the tile is placed on
+        :param OrthogonalTiledMapGameTile|OrthogonalTiledMapGameTileAnimated tile: The given tile
+        """
+        priority = (LAYER_PRIORITY[layer.layer_type], layer.z_order)
+        priority = self._layer_priorities.setdefault(priority, priority)
+
+        tile_size = self.game_object.tile_size
+        start_x_coord = max(floor(x / tile_size.x), 0)
+        end_x_coord = min(floor((x + tile.width - 1) / tile_size.x), self.base_grid_x_size - 1)
+        start_y_coord = max(floor(y / tile_size.y), 0)
+        end_y_coord = min(floor((y + tile.height - 1) / tile_size.y), self.base_grid_y_size - 1)
+        for column in range(start_x_coord, end_x_coord + 1):
+            for row in range(start_y_coord, end_y_coord + 1):
+                cell = column * self.base_grid_y_size + row
+                if self._plain_tile_priorities[cell] is None or priority > self._plain_tile_priorities[cell]:
+                    self._plain_tile_gids[cell] = tile.gid
+                    self._plain_tile_priorities[cell] = priority
+
+    def get_plain_tile_gid(self, x_coord, y_coord):
+        """
+        :param int x_coord: The given x coordinate
+        :param int y_coord: The given y coordinate
+        :return: The gid of the highest tile without base properties at the given coordinate, or 0 if there is none.
+        :rtype: int
+        """
+        if 0 <= x_coord < self.base_grid_x_size and 0 <= y_coord < self.base_grid_y_size:
+            return self._plain_tile_gids[x_coord * self.base_grid_y_size + y_coord]
+        return 0
+
+    def add_streamed_tile_layer(self, layer, gids, x_offset, y_offset, direct_gids):
+        """
+        Adds the tiles of a streamed tile layer to this collection, without creating a base for each of them. Their
+        movement rules, interactions and plain tiles are recorded in the packed grids right away, so that movement,
+        pathfinding and events work across the whole map. The bases themselves, which are only needed to look up the
+        other properties of the tiles in a cell, are created for a chunk of tiles once a cell they cover is looked up,
+        and released again by release_streamed_tile_bases.
+        :param TiledMapGameLayer layer: The layer the tiles are placed on
+        :param array gids: The gids of the layer's tiles, row by row.
+        :param int x_offset: The x offset (in pixels) of the layer
+        :param int y_offset: The y offset (in pixels) of the layer
+        :param set direct_gids: The gids of tiles that the map adds to the grid one by one instead, which are skipped.
+        """
+        first_id = self._next_id
+        self._next_id -= len(gids)  # Reserved, so that tiles get the same base priorities whenever they get a base.
+        self._streamed_tile_layers.append((layer, gids, x_offset, y_offset, first_id, direct_gids))
+        self.tile_version += 1
+
+        layer_priority = (LAYER_PRIORITY[layer.layer_type], layer.z_order)
+        layer_priority = self._layer_priorities.setdefault(layer_priority, layer_priority)
+        tile_size = self.game_object.tile_size
+        row_size = self.game_object.grid_size.x
+        last_column, last_row = self.base_grid_x_size - 1, self.base_grid_y_size - 1
+        # gid -> the tile, the offsets of the first and last column and row it covers from its own cell, whether it
+        # has base properties, and whether it has interaction properties.
+        tile_covers = {}
+        # tile chunk -> the first and last column and row covered by the bases of its tiles.
+        chunk_covers = {}
+        chunk_size = self.game_object.stream_chunk_size
+        for index, gid in enumerate(gids):
+            if gid == 0 or gid in direct_gids:
+                continue
+
+            if gid not in tile_covers:
+                tile = self.game_object.get_tile_object(gid)
+                y_start = y_offset - tile.height + tile_size.y
+                if tile.has_base_properties():
+                    tile_covers[gid] = (
+                        tile, floor((x_offset + tile.base_offset_x_start) / tile_size.x),
+                        floor((x_offset + tile.base_offset_x_end - 1) / tile_size.x),
+                        floor((y_start + tile.base_offset_y_start + tile.arc_y_offset) / tile_size.y),
+                        floor((y_start + tile.base_offset_y_end + tile.arc_y_offset - 1) / tile_size.y),
+                        True, self.has_interaction_properties(tile))
+                else:
+                    tile_covers[gid] = (
+                        tile, floor(x_offset / tile_size.x), floor((x_offset + tile.width - 1) / tile_size.x),
+                        floor(y_start / tile_size.y), floor((y_start + tile.height - 1) / tile_size.y), False, False)
+            tile, x_start, x_end, y_start, y_end, has_base, is_interaction_tile = tile_covers[gid]
+            row, column = divmod(index, row_size)
+            columns = range(max(column + x_start, 0), min(column + x_end, last_column) + 1)
+            rows = range(max(row + y_start, 0), min(row + y_end, last_row) + 1)
+            if len(columns) == 0 or len(rows) == 0:
+                continue
+
+            if not has_base:
+                for base_column in columns:
+                    for base_row in rows:
+                        cell = base_column * self.base_grid_y_size + base_row
+                        cell_priority = self._plain_tile_priorities[cell]
+                        if cell_priority is None or layer_priority > cell_priority:
+                            self._plain_tile_gids[cell] = gid
+                            self._plain_tile_priorities[cell] = layer_priority
+                continue
+
+            base_priority = layer_priority + (first_id - index,)
+            for base_column in columns:
+                for base_row in rows:
+                    cell = base_column * self.base_grid_y_size + base_row
+                    self._bake_tile_rules(cell, tile, base_priority)
+                    if is_interaction_tile:
+                        self._interaction_tile_cells[cell] = self._interaction_tile_cells.get(cell, 0) + 1
+
+            tile_chunk = (column // chunk_size, row // chunk_size)
+            chunk_cover = chunk_covers.get(tile_chunk)
+            if chunk_cover is None:
+                chunk_covers[tile_chunk] = [columns[0], columns[-1], rows[0], rows[-1]]
+            else:
+                chunk_cover[0] = min(chunk_cover[0], columns[0])
+                chunk_cover[1] = max(chunk_cover[1], columns[-1])
+                chunk_cover[2] = min(chunk_cover[2], rows[0])
+                chunk_cover[3] = max(chunk_cover[3], rows[-1])
+
+        for tile_chunk, (min_column, max_column, min_row, max_row) in chunk_covers.items():
+            cell_chunks = self._streamed_tile_chunk_cells.setdefault(tile_chunk, set())
+            for chunk_x in range(min_column // chunk_size, max_column // chunk_size + 1):
+                for chunk_y in range(min_row // chunk_size, max_row // chunk_size + 1):
+                    cell_chunks.add((chunk_x, chunk_y))
+                    self._pending_tile_chunks.setdefault((chunk_x, chunk_y), set()).add(tile_chunk)
+
+    def _create_streamed_tile_bases(self, x_coord, y_coord):
+        """
+        Creates the bases of all streamed tiles covering the given coordinate that do not have one yet, along with
+        those of the other tiles in their chunks.
+        :param int x_coord: The given x coordinate
+        :param int y_coord: The given y coordinate
+        """
+        chunk_size = self.game_object.stream_chunk_size
+        tile_chunks = self._pending_tile_chunks.pop((x_coord // chunk_size, y_coord // chunk_size), None)
+        if tile_chunks is None:
+            return
+
+        tile_size = self.game_object.tile_size
+        grid_size = self.game_object.grid_size
+        for tile_chunk in tile_chunks:
+            if tile_chunk in self._streamed_tile_chunks:
+                continue
+
+            chunk_x, chunk_y = tile_chunk
+            columns = range(chunk_x * chunk_size, min((chunk_x + 1) * chunk_size, grid_size.x))
+            rows = range(chunk_y * chunk_size, min((chunk_y + 1) * chunk_size, grid_size.y))
+            chunk_bases = []
+            for layer, gids, x_offset, y_offset, first_id, direct_gids in self._streamed_tile_layers:
+                for row in rows:
+                    row_start = row * grid_size.x
+                    for column in columns:
+                        gid = gids[row_start + column]
+                        if gid == 0 or gid in direct_gids:
+                            continue
+                        tile = self.game_object.get_tile_object(gid)
+                        if not tile.has_base_properties():
+                            continue
+
+                        element = OrthogonalTiledMapTiledBasesEntry(
+                            self.game_object, first_id - row_start - column, x_offset + column * tile_size.x,
+                            y_offset + row * tile_size.y - tile.height + tile_size.y, layer, tile)
+                        self.map_elements[element.element_id] = element
+                        for base_column in element.get_base_columns():
+                            for base_row in element.get_base_rows():
+                                if 0 <= base_row < self.base_grid_y_size and 0 <= base_column < self.base_grid_x_size:
+                                    self._insert_into_base_stack(self.base_grid[base_column][base_row], element)
+                        chunk_bases.append(element)
+            self._streamed_tile_chunks[tile_chunk] = chunk_bases
+
+    def release_streamed_tile_bases(self, min_chunk_x, max_chunk_x, min_chunk_y, max_chunk_y):
+        """
+        Releases the bases created for the streamed tiles of all chunks outside the given chunk bounds. They are created
+        again once they are needed.
+        :param int min_chunk_x: The x of the first column of chunks to keep the bases of.
+        :param int max_chunk_x: The x of the last column of chunks to keep the bases of.
+        :param int min_chunk_y: The y of the first row of chunks to keep the bases of.
+        :param int max_chunk_y: The y of the last row of chunks to keep the bases of.
+        """
+        for tile_chunk in list(self._streamed_tile_chunks):
+            chunk_x, chunk_y = tile_chunk
+            if min_chunk_x <= chunk_x <= max_chunk_x and min_chunk_y <= chunk_y <= max_chunk_y:
+                continue
+
+            for element in self._streamed_tile_chunks.pop(tile_chunk):
+                for column in element.get_base_columns():
+                    for row in element.get_base_rows():
+                        if 0 <= row < self.base_grid_y_size and 0 <= column < self.base_grid_x_size:
+                            self.base_grid[column][row].remove(element)
+                self.map_elements.pop(element.element_id)
+            for cell_chunk in self._streamed_tile_chunk_cells[tile_chunk]:
+                self._pending_tile_chunks.setdefault(cell_chunk, set()).add(tile_chunk)
+
     def remove_element(self, element_id):
         """
         Removes the element with the given id.
@@ -3391,25 +3702,476 @@ class OrthogonalTiledMapTiledBases(object):
         if element.game_object.single_display:
             element.game_object.base_id = None
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pathfinding_buffers'] = None
+        state['_path_cache'] = GridCache(self.PATH_CACHE_SIZE)
+        state['_sight_cache'] = GridCache(self.SIGHT_CACHE_SIZE)
+        state['_field_of_view_cache'] = GridCache(self.FIELD_OF_VIEW_CACHE_SIZE)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if 'tile_version' not in state:
+            self.tile_version = 0
+            self._path_cache = GridCache(self.PATH_CACHE_SIZE)
+        if not isinstance(state.get('_sight_cache'), GridCache):
+            self._sight_cache = GridCache(self.SIGHT_CACHE_SIZE)
+        if not isinstance(state.get('_field_of_view_cache'), GridCache):
+            self._field_of_view_cache = GridCache(self.FIELD_OF_VIEW_CACHE_SIZE)
+        if '_streamed_tile_layers' not in state:
+            self._streamed_tile_layers = []
+            self._streamed_tile_chunks = {}
+            self._streamed_tile_chunk_cells = {}
+            self._pending_tile_chunks = {}
+        self.__dict__.pop('version', None)
+
+    def release_pathfinding_buffers(self):
+        """
+        Releases the memory taken up by the pathfinding buffers, which are created again on the next search.
+        """
+        self._pathfinding_buffers = None
+
+    def estimate_memory_size(self):
+        """
+        :return: An estimate of the memory taken up by the grids and bases of this collection in bytes.
+        :rtype: int
+        """
+        size = get_grid_size(self.base_grid) + getsizeof(self.map_elements) + getsizeof(self._object_bases)
+        for element in self.map_elements.values():
+            size += get_instance_size(element) + getsizeof(element.base_priority)
+        for rule_property in self.MOVEMENT_RULE_PROPERTIES:
+            size += getsizeof(self._packed_rules[rule_property])
+            size += getsizeof(self._packed_rule_priorities[rule_property])
+        size += getsizeof(self._plain_tile_gids) + getsizeof(self._plain_tile_priorities)
+        if self._pathfinding_buffers is not None:
+            size += sum(getsizeof(buffer) for buffer in vars(self._pathfinding_buffers).values())
+        return size
+
     def add_to_grid(self, element):
         """
         Adds the given base to this collection
         :param OrthogonalBaseEntry element: The given base
         """
+        is_tile = not element.game_object.single_display
+        if is_tile:
+            self.tile_version += 1
+        is_interaction_tile = is_tile and self.has_interaction_properties(element.game_object)
         for column in element.get_base_columns():
             for row in element.get_base_rows():
                 if 0 <= row < self.base_grid_y_size and 0 <= column < self.base_grid_x_size:
-                    self.base_grid[column][row][element.base_priority] = element
+                    self._insert_into_base_stack(self.base_grid[column][row], element)
+
+                    cell = column * self.base_grid_y_size + row
+                    if is_tile:
+                        self._bake_tile_rules(cell, element.game_object, element.base_priority)
+                    else:
+                        self._object_bases.setdefault(cell, {})[element.base_priority] = element
+                        self._invalidate_object_cell(cell)
+                    if is_interaction_tile:
+                        self._interaction_tile_cells[cell] = self._interaction_tile_cells.get(cell, 0) + 1
+
+    @staticmethod
+    def _insert_into_base_stack(base_stack, element):
+        """
+        :param list base_stack: The bases covering a cell, sorted from the highest to the lowest base priority.
+        :param OrthogonalTiledMapTiledBasesEntry element: The base to insert in the given stack.
+        """
+        index = 0
+        while index < len(base_stack) and base_stack[index].base_priority > element.base_priority:
+            index += 1
+        base_stack.insert(index, element)
 
     def remove_from_grid(self, element):
         """
         Removes the given base from this collection
         :param OrthogonalBaseEntry element: the given base
         """
+        is_tile = not element.game_object.single_display
+        if is_tile:
+            self.tile_version += 1
+        is_interaction_tile = is_tile and self.has_interaction_properties(element.game_object)
         for column in element.get_base_columns():
             for row in element.get_base_rows():
                 if 0 <= row < self.base_grid_y_size and 0 <= column < self.base_grid_x_size:
-                    self.base_grid[column][row].pop(element.base_priority)
+                    if is_tile:
+                        # The rules of the cell are baked again from all tile bases in it.
+                        self._create_streamed_tile_bases(column, row)
+                    self.base_grid[column][row].remove(element)
+
+                    cell = column * self.base_grid_y_size + row
+                    if is_tile:
+                        self._rebake_tile_rules(cell, column, row)
+                    else:
+                        cell_objects = self._object_bases[cell]
+                        cell_objects.pop(element.base_priority)
+                        if len(cell_objects) == 0:
+                            self._object_bases.pop(cell)
+                        self._invalidate_object_cell(cell)
+                    if is_interaction_tile:
+                        self._interaction_tile_cells[cell] -= 1
+                        if self._interaction_tile_cells[cell] == 0:
+                            self._interaction_tile_cells.pop(cell)
+
+    def _invalidate_object_cell(self, cell):
+        """
+        Discards the cached results that depend on the objects in the given cell, after an object was added to or
+        removed from it.
+        :param int cell: The index of the given cell.
+        """
+        self._path_cache.invalidate_cell(cell)
+        self._sight_cache.invalidate_cell(cell)
+        self._field_of_view_cache.invalidate_cell(cell)
+
+    def has_interaction_properties(self, game_object):
+        """
+        :param OrthogonalTiledMapGameObjectBase game_object: The given object
+        :return: Whether the given object has an activation or touch event or code.
+        :rtype: bool
+        """
+        for interaction_property in self.INTERACTION_PROPERTIES:
+            if getattr(game_object, interaction_property) is not None:
+                return True
+        return False
+
+    def may_have_interaction(self, x_coord, y_coord, ignore_element=None):
+        """
+        :param int x_coord: The x of the given coordinate
+        :param int y_coord: The y of the given coordinate
+        :param OrthogonalTiledMapTiledBasesEntry ignore_element: A base to disregard, such as that of the player.
+        :return: False if no base at the given coordinate can have an interaction property, so that looking for one
+        can be skipped. True if there might be one.
+        :rtype: bool
+        """
+        if not (0 <= x_coord < self.base_grid_x_size and 0 <= y_coord < self.base_grid_y_size):
+            return True  # Left to get_top_base_with_property
+
+        cell = x_coord * self.base_grid_y_size + y_coord
+        if cell in self._interaction_tile_cells:
+            return True
+
+        cell_objects = self._object_bases.get(cell)
+        if cell_objects is None:
+            return False
+        return ignore_element is None or len(cell_objects) > 1 or ignore_element.base_priority not in cell_objects
+
+    def get_interaction_hotspots(self):
+        """
+        :return: For every coordinate with an interaction, a tuple of the coordinate, the name of the interaction
+        property, and the value of the top base setting it there.
+        :rtype: list[tuple[Coord, str, str]]
+        """
+        hotspots = []
+        for cell in sorted(set(self._interaction_tile_cells) | set(self._object_bases)):
+            x_coord, y_coord = divmod(cell, self.base_grid_y_size)
+            top_properties = self.get_top_properties(self.INTERACTION_PROPERTIES, x_coord, y_coord)
+            for interaction_property in self.INTERACTION_PROPERTIES:
+                value = top_properties[interaction_property]
+                if value is not None:
+                    hotspots.append((Coord(x_coord, y_coord), interaction_property, value))
+        return hotspots
+
+    def _bake_tile_rules(self, cell, tile, base_priority):
+        """
+        Adds the movement rules of the given tile to the packed movement grids for the given cell, if the tile is the
+        highest tile setting them.
+        :param int cell: The index of the given cell
+        :param OrthogonalTiledMapGameTile|OrthogonalTiledMapGameTileAnimated tile: The given tile
+        :param tuple base_priority: The base priority of the tile's base.
+        """
+        for rule_property in self.MOVEMENT_RULE_PROPERTIES:
+            rule = getattr(tile, rule_property)
+            if rule is None:
+                continue
+
+            rule_priorities = self._packed_rule_priorities[rule_property]
+            if rule_priorities[cell] is None or base_priority > rule_priorities[cell]:
+                self._packed_rules[rule_property][cell] = pack_movement_rule(rule)
+                rule_priorities[cell] = base_priority
+
+    def _rebake_tile_rules(self, cell, x_coord, y_coord):
+        """
+        Recalculates the packed movement grids for the given cell from the tile bases currently in it.
+        :param int cell: The index of the given cell
+        :param int x_coord: The x of the given cell
+        :param int y_coord: The y of the given cell
+        """
+        for rule_property in self.MOVEMENT_RULE_PROPERTIES:
+            self._packed_rules[rule_property][cell] = self.NO_RULE
+            self._packed_rule_priorities[rule_property][cell] = None
+
+        for element in self.base_grid[x_coord][y_coord]:
+            if not element.game_object.single_display:
+                self._bake_tile_rules(cell, element.game_object, element.base_priority)
+
+    def get_packed_movement_rule(self, rule_property, x_coord, y_coord, ignore_priorities, default_value):
+        """
+        Retrieves the highest movement rule of the given type for the given coordinate as a bitmask, with bit n set if
+        movement on side n (0 is top, 1 is right, 2 is bottom, 3 is left) is allowed.
+        :param str rule_property: The type of movement rule ('move_from' or 'move_to')
+        :param int x_coord: The given x coordinate
+        :param int y_coord: The given y coordinate
+        :param set|tuple ignore_priorities: The base priorities of bases to ignore.
+        :param int default_value: The packed rule to return if no base sets the rule, or the coordinate is outside
+        the map.
+        :rtype: int
+        """
+        if not (0 <= x_coord < self.base_grid_x_size and 0 <= y_coord < self.base_grid_y_size):
+            return default_value
+
+        cell = x_coord * self.base_grid_y_size + y_coord
+        packed_rule = self._packed_rules[rule_property][cell]
+        top_priority = self._packed_rule_priorities[rule_property][cell]
+
+        cell_objects = self._object_bases.get(cell)
+        if cell_objects is not None:
+            for base_priority, element in cell_objects.items():
+                if base_priority in ignore_priorities or (top_priority is not None and base_priority < top_priority):
+                    continue
+                rule = getattr(element.game_object, rule_property)
+                if rule is not None:
+                    packed_rule = pack_movement_rule(rule)
+                    top_priority = base_priority
+
+        if packed_rule == self.NO_RULE:
+            return default_value
+        return packed_rule
+
+    def is_sight_unobstructed(self, start_coord, end_coord, include_touched_coords=True):
+        """
+        Retrieves whether sight from the start coordinate to the end coordinate is unobstructed, which is the case if
+        every coordinate the line between them passes through can be entered from all sides (its move_to rules are
+        1111). The cells on the line are cached until the tiles of the grid change or an object is added to or removed
+        from one of them, so that only the movement rules of the objects on the line have to be checked again.
+        :param tuple start_coord: The start coordinate, from which is looked.
+        :param tuple end_coord: The end coordinate, at which is looked.
+        :param bool include_touched_coords: If True, will also check coordinates touched by the line of sight (so where
+        the view passes straight through an adjoining corner) for obstructing objects.
+        :rtype: bool
+        """
+        cache_key = (start_coord[0], start_coord[1], end_coord[0], end_coord[1], include_touched_coords)
+        cached_sight = self._sight_cache.get(cache_key, self.tile_version)
+        if cached_sight is None:
+            tiles_clear, object_cells, traced_cells = self._trace_sight(
+                start_coord[0], start_coord[1], end_coord[0], end_coord[1], include_touched_coords)
+            cached_sight = (tiles_clear, object_cells)
+            self._sight_cache.put(cache_key, cached_sight, self.tile_version, traced_cells)
+
+        # The movement rules of objects can change without them moving, so these are always checked again.
+        tiles_clear, object_cells = cached_sight
+        return tiles_clear and self._objects_permit_sight(object_cells)
+
+    def _objects_permit_sight(self, object_cells):
+        """
+        :param tuple[tuple[int, int]] object_cells: The coordinates of cells holding objects.
+        :return: Whether sight passes through all the given cells, taking the current rules of their objects into
+        account.
+        :rtype: bool
+        """
+        for x_coord, y_coord in object_cells:
+            if self.get_packed_movement_rule('move_to', x_coord, y_coord, (), 0b0000) != 0b1111:
+                return False
+        return True
+
+    def _trace_sight(self, start_x, start_y, end_x, end_y, include_touched_coords):
+        """
+        Follows the line of sight between the given start and end coordinates.
+        :param int start_x: The x of the start coordinate, from which is looked.
+        :param int start_y: The y of the start coordinate, from which is looked.
+        :param int end_x: The x of the end coordinate, at which is looked.
+        :param int end_y: The y of the end coordinate, at which is looked.
+        :param bool include_touched_coords: If True, will also check coordinates touched by the line of sight.
+        :return: Whether the cells on the line without objects let sight through, the coordinates of the cells on the
+        line with objects (whose movement rules decide whether sight passes through them), and the indices of the
+        cells that were traced, up to the first cell obstructed by tiles.
+        :rtype: tuple[bool, tuple[tuple[int, int]], list[int]]
+        """
+        x_size, y_size = self.base_grid_x_size, self.base_grid_y_size
+        packed_move_to = self._packed_rules['move_to']
+        object_cells = []
+        traced_cells = []
+        for x_coord, y_coord in supercover_line(start_x, start_y, end_x, end_y, include_touched_coords):
+            if not (0 <= x_coord < x_size and 0 <= y_coord < y_size):
+                return False, (), traced_cells
+
+            cell = x_coord * y_size + y_coord
+            traced_cells.append(cell)
+            if cell in self._object_bases:
+                object_cells.append((x_coord, y_coord))
+            elif packed_move_to[cell] != 0b1111:
+                # Obstructed by tiles, regardless of any objects elsewhere on the line.
+                return False, (), traced_cells
+        return True, tuple(object_cells), traced_cells
+
+    def get_field_of_view(self, view_shape, viewer_coord, orientation, view_range, include_touched_coords=True):
+        """
+        Retrieves the coordinates within the given view shape that a viewer at the given coordinate can see, which are
+        those for which every coordinate the line between the centers of the viewer's and their coordinate passes
+        through can be entered from all sides (its move_to rules are 1111), as with is_sight_unobstructed. These are
+        calculated at once by shadowcasting from the viewer, once for every position, orientation and range of the
+        viewer. They are cached until the tiles of the grid change, or an object is added to or removed from one of the
+        cells that were looked at. As objects can change their movement rules in place, the objects in those cells are
+        checked again at most once per game tick.
+        :param str view_shape: The shape of the view, which is 'cone', 'line' or 'range' (see in_view_shape).
+        :param tuple viewer_coord: The coordinate of the viewer.
+        :param str|None orientation: The orientation of the viewer.
+        :param int view_range: The maximum number of tiles to look.
+        :param bool include_touched_coords: If True, will also check coordinates touched by the line of sight (so where
+        the view passes straight through an adjoining corner) for obstructing objects.
+        :return: The coordinates within the view shape that are in sight of the viewer.
+        :rtype: frozenset[tuple[int, int]]
+        """
+        viewer_x, viewer_y = viewer_coord[0], viewer_coord[1]
+        if view_shape == 'range':
+            orientation = None
+        cache_key = (view_shape, viewer_x, viewer_y, orientation, view_range, include_touched_coords)
+        game_time = self.game_object.last_gt
+        cached_view = self._field_of_view_cache.get(cache_key, self.tile_version)
+        if cached_view is not None:
+            visible_coords, object_opacities, checked_time = cached_view
+            if checked_time == game_time or all(
+                    self._is_object_cell_opaque(x_coord, y_coord) == opaque
+                    for x_coord, y_coord, opaque in object_opacities):
+                cached_view[2] = game_time
+                return visible_coords
+
+        if orientation is None:
+            octants = [octant for orientation_octants in self.VIEW_OCTANTS.values() for octant in orientation_octants]
+        else:
+            octants = self.VIEW_OCTANTS.get(orientation, ())
+
+        visible_coords = set()
+        if 0 <= viewer_x < self.base_grid_x_size and 0 <= viewer_y < self.base_grid_y_size:
+            visible_coords.add((viewer_x, viewer_y))
+        cell_opacities = {}
+        for octant in octants:
+            self._cast_sight(
+                viewer_x, viewer_y, octant, view_shape, view_range, include_touched_coords, visible_coords,
+                cell_opacities)
+
+        visible_coords = frozenset(
+            coord for coord in visible_coords
+            if in_view_shape(view_shape, viewer_coord, orientation, coord, view_range))
+        y_size = self.base_grid_y_size
+        object_opacities = tuple(
+            (cell // y_size, cell % y_size, opaque) for cell, opaque in cell_opacities.items()
+            if cell in self._object_bases)
+        self._field_of_view_cache.put(
+            cache_key, [visible_coords, object_opacities, game_time], self.tile_version, cell_opacities)
+        return visible_coords
+
+    def _cast_sight(self, viewer_x, viewer_y, octant, view_shape, view_range, include_touched_coords, visible_coords,
+                    cell_opacities):
+        """
+        Finds the coordinates in sight of the viewer within a single octant, going through it row by row while keeping
+        track of the slopes (the distance to the side divided by the distance ahead) of the lines of sight that are not
+        yet obstructed. Every obstructing cell takes the slopes of the lines passing through it out of those, and a
+        cell is in sight if the slope of the line to its center is still unobstructed.
+        :param int viewer_x: The x of the viewer's coordinate.
+        :param int viewer_y: The y of the viewer's coordinate.
+        :param tuple[int, int, int, int] octant: The octant to look through (see VIEW_OCTANTS).
+        :param str view_shape: The shape of the view, which is 'cone', 'line' or 'range' (see in_view_shape). Cells
+        further to the side than the shape reaches are skipped, as they cannot obstruct the view of cells within it.
+        :param int view_range: The maximum number of tiles to look.
+        :param bool include_touched_coords: If True, lines of sight passing straight through a corner of an
+        obstructing cell are obstructed as well.
+        :param set visible_coords: The set to add the coordinates in sight to.
+        :param dict cell_opacities: The cells that were looked at, as cell index -> whether they obstruct sight. Added
+        to as cells are looked at, and used to look at cells shared by octants only once.
+        """
+        depth_x, depth_y, lateral_x, lateral_y = octant
+        lit_slopes = [(0.0, True, 1.0, True)]
+        if include_touched_coords and self._is_cell_opaque(viewer_x + lateral_x, viewer_y + lateral_y, cell_opacities):
+            # The diagonal passes by a corner of the cell next to the viewer.
+            lit_slopes = [(0.0, True, 1.0, False)]
+
+        for depth in range(1, view_range + 1):
+            row_x, row_y = viewer_x + depth * depth_x, viewer_y + depth * depth_y
+            if view_shape == 'range':
+                last_lateral = min(depth + 1, view_range - depth)
+            elif view_shape == 'line':
+                last_lateral = 0
+            else:
+                # Also looks at the first cell past the diagonal, as lines along the diagonal pass by its corner.
+                last_lateral = depth + 1
+            # Cells outside the unobstructed slopes are skipped as well.
+            first_lateral = max(0, int(lit_slopes[0][0] * (depth - 0.5) - 0.5))
+            last_lateral = min(last_lateral, int(lit_slopes[-1][2] * (depth + 0.5) + 0.5) + 1)
+
+            shadows = []
+            previous_opaque = False
+            for lateral in range(first_lateral, last_lateral + 1):
+                low_slope = (lateral - 0.5) / (depth + 0.5)
+                high_slope = (lateral + 0.5) / (depth - 0.5)
+                if not _slopes_overlap(lit_slopes, low_slope, high_slope):
+                    previous_opaque = False
+                    continue
+
+                x_coord, y_coord = row_x + lateral * lateral_x, row_y + lateral * lateral_y
+                opaque = self._is_cell_opaque(x_coord, y_coord, cell_opacities)
+                if (
+                        lateral <= depth and
+                        0 <= x_coord < self.base_grid_x_size and 0 <= y_coord < self.base_grid_y_size and
+                        _slope_lit(lit_slopes, lateral / depth) and
+                        # The diagonal passes by a corner of the previous cell in the same row.
+                        not (lateral == depth and include_touched_coords and previous_opaque)):
+                    visible_coords.add((x_coord, y_coord))
+                if opaque:
+                    shadows.append((low_slope, high_slope))
+                previous_opaque = opaque
+
+            for low_slope, high_slope in shadows:
+                lit_slopes = _subtract_shadow(lit_slopes, low_slope, high_slope, include_touched_coords)
+            if len(lit_slopes) == 0 or last_lateral < 0:
+                return
+
+    def _is_cell_opaque(self, x_coord, y_coord, cell_opacities):
+        """
+        :param int x_coord: The x of the given coordinate.
+        :param int y_coord: The y of the given coordinate.
+        :param dict cell_opacities: The cells looked at so far, as cell index -> whether they obstruct sight. The given
+        coordinate is added to it if it is on the map.
+        :return: Whether the given coordinate obstructs sight, which coordinates outside the map always do.
+        :rtype: bool
+        """
+        if not (0 <= x_coord < self.base_grid_x_size and 0 <= y_coord < self.base_grid_y_size):
+            return True
+
+        cell = x_coord * self.base_grid_y_size + y_coord
+        opaque = cell_opacities.get(cell)
+        if opaque is None:
+            if cell in self._object_bases:
+                opaque = self._is_object_cell_opaque(x_coord, y_coord)
+            else:
+                opaque = self._packed_rules['move_to'][cell] != 0b1111
+            cell_opacities[cell] = opaque
+        return opaque
+
+    def _is_object_cell_opaque(self, x_coord, y_coord):
+        """
+        :param int x_coord: The x of a coordinate holding objects.
+        :param int y_coord: The y of a coordinate holding objects.
+        :return: Whether the given coordinate obstructs sight, taking the current rules of its objects into account.
+        :rtype: bool
+        """
+        return self.get_packed_movement_rule('move_to', x_coord, y_coord, (), 0b0000) != 0b1111
+
+    def is_in_field_of_view(
+            self, view_shape, viewer_coord, orientation, view_range, target_coord, include_touched_coords=True):
+        """
+        Retrieves whether the target coordinate is within the given view shape of the viewer, and in sight of it.
+        :param str view_shape: The shape of the view, which is 'cone', 'line' or 'range' (see in_view_shape).
+        :param tuple viewer_coord: The coordinate of the viewer.
+        :param str|None orientation: The orientation of the viewer.
+        :param int view_range: The maximum number of tiles to look.
+        :param tuple target_coord: The coordinate being observed.
+        :param bool include_touched_coords: If True, will also check coordinates touched by the line of sight (so where
+        the view passes straight through an adjoining corner) for obstructing objects.
+        :rtype: bool
+        """
+        visible_coords = self.get_field_of_view(
+            view_shape, viewer_coord, orientation, view_range, include_touched_coords)
+        return (target_coord[0], target_coord[1]) in visible_coords
 
     def move_element(self, element_id, new_x, new_y):
         """
@@ -3439,23 +4201,21 @@ class OrthogonalTiledMapTiledBases(object):
         :param default_value: The value that should be returned if no object whose base intersects with the given
         coordinates has the given property set.
         """
+        self._create_streamed_tile_bases(x_coord, y_coord)
         try:
-            objects_at_coord = self.base_grid[x_coord][y_coord].copy()
+            base_stack = self.base_grid[x_coord][y_coord]
         except IndexError:
             return default_value, None
 
-        # Removes ignored element
+        ignore_priorities = ()
         if ignore_elements is not None:
-            for ignore_element in ignore_elements:
-                ignore_base_priority = ignore_element.base_priority
-                if ignore_base_priority in objects_at_coord:
-                    objects_at_coord.pop(ignore_base_priority)
-
-        # Gets property
-        matching_property = None
-        corresponding_object = None
-        for base_object_priority in sorted(objects_at_coord.keys(), reverse=True):
-            base_object = objects_at_coord[base_object_priority]
+            ignore_priorities = [ignore_element.base_priority for ignore_element in ignore_elements]
+
+        # Bases are sorted from the highest priority down, so the first base with the property set is the top one.
+        for base_object in base_stack:
+            if base_object.base_priority in ignore_priorities:
+                continue
+
             if additional_requirements is not None:
                 additional_requirements_met = True
 
@@ -3469,15 +4229,49 @@ class OrthogonalTiledMapTiledBases(object):
 
             base_object_property = getattr(base_object.game_object, base_property)
             if base_object_property is not None:
-                corresponding_object = base_object.game_object
-                matching_property = base_object_property
-                break
+                return base_object_property, base_object.game_object
+
+        return default_value, None
+
+    def get_top_properties(self, base_properties, x_coord, y_coord, ignore_elements=None):
+        """
+        For each of the given property names, retrieves the value of the highest base where the value is set, and
+        which intersects with the given coordinate, in a single pass over the bases of the coordinate.
+        :param tuple|list base_properties: The given property names
+        :param int x_coord: The given x coordinate
+        :param int y_coord: The given y coordinate
+        :param list ignore_elements: Ignore these elements in the retrieval process (used to prevent objects
+        from preventing their own movement and such)
+        :return: A dictionary of the given property names to their values, which are None for properties that no base
+        intersecting with the given coordinate has set.
+        :rtype: dict
+        """
+        top_properties = dict.fromkeys(base_properties)
+        self._create_streamed_tile_bases(x_coord, y_coord)
+        try:
+            base_stack = self.base_grid[x_coord][y_coord]
+        except IndexError:
+            return top_properties
+
+        ignore_priorities = ()
+        if ignore_elements is not None:
+            ignore_priorities = [ignore_element.base_priority for ignore_element in ignore_elements]
 
-        # If no rules are found:
-        if matching_property is None:
-            matching_property = default_value
+        unresolved_properties = list(base_properties)
+        for base_object in base_stack:
+            if base_object.base_priority in ignore_priorities:
+                continue
+
+            for base_property in list(unresolved_properties):
+                base_object_property = getattr(base_object.game_object, base_property)
+                if base_object_property is not None:
+                    top_properties[base_property] = base_object_property
+                    unresolved_properties.remove(base_property)
 
-        return matching_property, corresponding_object
+            if len(unresolved_properties) == 0:
+                break
+
+        return top_properties
 
     def get_activation_event(self, x_coord, y_coord, ignore_element=None):
         """
@@ -3487,6 +4281,8 @@ class OrthogonalTiledMapTiledBases(object):
         :param ignore_element: Which element to ignore while figuring out the activation event.
         :rtype: str|None
         """
+        if not self.may_have_interaction(x_coord, y_coord, ignore_element):
+            return None, None
         return self.get_top_base_with_property(
             'event_on_activate', x_coord, y_coord, ignore_elements=[ignore_element],
             additional_requirements=['event_conditional_met'])
@@ -3499,6 +4295,8 @@ class OrthogonalTiledMapTiledBases(object):
         :param ignore_element: Which element to ignore while figuring out the touch event.
         :rtype: str|None
         """
+        if not self.may_have_interaction(x_coord, y_coord, ignore_element):
+            return None, None
         return self.get_top_base_with_property(
             'event_on_touch', x_coord, y_coord, ignore_elements=[ignore_element],
             additional_requirements=['event_conditional_met'])
@@ -3511,6 +4309,8 @@ class OrthogonalTiledMapTiledBases(object):
         :param ignore_element: Which element to ignore while retrieving the code
         :rtype: str|None
         """
+        if not self.may_have_interaction(x_coord, y_coord, ignore_element):
+            return None, None
         return self.get_top_base_with_property(
             'code_on_activate', x_coord, y_coord, ignore_elements=[ignore_element],
             additional_requirements=['code_conditional_met'])
@@ -3523,6 +4323,8 @@ class OrthogonalTiledMapTiledBases(object):
         :param ignore_element: Which element to ignore while retrieving the code
         :rtype: str|None
         """
+        if not self.may_have_interaction(x_coord, y_coord, ignore_element):
+            return None, None
         return self.get_top_base_with_property(
             'code_on_touch', x_coord, y_coord, ignore_elements=[ignore_element],
             additional_requirements=['code_conditional_met'])
@@ -3711,15 +4513,14 @@ class OrthogonalTiledMapTiledBases(object):
         coordinates would be allowed.
         :rtype: bool
         """
+        ignore_priorities = [ignore_element.base_priority for ignore_element in ignore_elements]
+        from_side = 1 << relevant_from_side
+        to_side = 1 << relevant_to_side
         for x, y in old_coords:
-            from_rules, rules_object = self.get_top_base_with_property(
-                'move_from', x, y, ignore_elements=ignore_elements, default_value='1111')
-            if from_rules[relevant_from_side] == "0":
+            if not self.get_packed_movement_rule('move_from', x, y, ignore_priorities, 0b1111) & from_side:
                 return False
         for x, y in new_coords:
-            to_rules, rules_object = self.get_top_base_with_property(
-                'move_to', x, y, ignore_elements=ignore_elements, default_value='0000')
-            if to_rules[relevant_to_side] == "0":
+            if not self.get_packed_movement_rule('move_to', x, y, ignore_priorities, 0b0000) & to_side:
                 return False
         return True
 
@@ -3737,20 +4538,56 @@ class OrthogonalTiledMapTiledBases(object):
         coordinates would be allowed.
         :rtype: bool
         """
+        ignore_priorities = [ignore_element.base_priority for ignore_element in ignore_elements]
+        from_sides = 0
+        for relevant_from_side in relevant_from_sides:
+            from_sides |= 1 << relevant_from_side
+        to_sides = 0
+        for relevant_to_side in relevant_to_sides:
+            to_sides |= 1 << relevant_to_side
+
         for x, y in old_coords:
-            from_rules, rules_object = self.get_top_base_with_property(
-                'move_from', x, y, ignore_elements=ignore_elements, default_value='1111')
-            for relevant_from_side in relevant_from_sides:
-                if from_rules[relevant_from_side] == "0":
-                    return False
+            if self.get_packed_movement_rule('move_from', x, y, ignore_priorities, 0b1111) & from_sides != from_sides:
+                return False
         for x, y in new_coords:
-            to_rules, rules_object = self.get_top_base_with_property(
-                'move_to', x, y, ignore_elements=ignore_elements, default_value='0000')
-            for relevant_to_side in relevant_to_sides:
-                if to_rules[relevant_to_side] == "0":
-                    return False
+            if self.get_packed_movement_rule('move_to', x, y, ignore_priorities, 0b0000) & to_sides != to_sides:
+                return False
         return True
 
+    def get_ignore_priorities(self, element_id, ignore_elements=None):
+        """
+        :param int element_id: The element id of the object for which movement is assessed.
+        :param list|None ignore_elements: The names of the objects to ignore during the assessment of movement rules.
+        :return: The base priorities of the bases to ignore when assessing the movement of the given object.
+        :rtype: set
+        """
+        ignore_priorities = {self.map_elements[element_id].base_priority}
+        if ignore_elements is not None:
+            for ignore_id in ignore_elements:
+                ignore_id = 'renpy.store.' + ignore_id
+                ignore_object = eval(compile_expression(ignore_id))
+                try:
+                    ignore_priorities.add(self.map_elements[ignore_object.base_id].base_priority)
+                except (KeyError, AttributeError):
+                    continue
+        return ignore_priorities
+
+    def is_step_permitted(self, x_coord, y_coord, direction, ignore_priorities):
+        """
+        :param int x_coord: The x of the coordinate from which the moving is done.
+        :param int y_coord: The y of the coordinate from which the moving is done.
+        :param str direction: The direction in which the moving is done.
+        :param set|tuple ignore_priorities: The base priorities of the bases to ignore.
+        :return: Whether a single step from the given coordinate in the given direction is permitted.
+        :rtype: bool
+        """
+        x_offset, y_offset, from_side, to_side = self.MOVEMENT_DIRECTIONS[direction]
+        from_rule = self.get_packed_movement_rule('move_from', x_coord, y_coord, ignore_priorities, 0b1111)
+        if not from_rule & (1 << from_side):
+            return False
+        return bool(self.get_packed_movement_rule(
+            'move_to', x_coord + x_offset, y_coord + y_offset, ignore_priorities, 0b0000) & (1 << to_side))
+
     def is_move_in_direction_permitted(self, element_id, old_coord, direction, ignore_elements=None):
         """
         Retrieves whether a movement from the given coordinate in the given direction is permitted for the object
@@ -3761,32 +4598,235 @@ class OrthogonalTiledMapTiledBases(object):
         :param list|None ignore_elements: The list of objects to ignore during the assessment of movement rules.
         :rtype: bool
         """
-        ignore_map_elements = [self.map_elements[element_id]]
-        if ignore_elements is not None:
-            for ignore_id in ignore_elements:
-                ignore_id = 'renpy.store.' + ignore_id
-                ignore_object = eval(ignore_id)
-                try:
-                    ignore_map_elements.append(self.map_elements[ignore_object.base_id])
-                except (KeyError, AttributeError):
+        return self.is_step_permitted(
+            old_coord.x, old_coord.y, direction, self.get_ignore_priorities(element_id, ignore_elements))
+
+    def find_path(
+            self, start_coords, target_coord, directions, ignore_priorities, can_always_move=False, target_distance=0,
+            max_path_length=None, max_search_nodes=None, use_cache=True
+    ):
+        """
+        Finds a path from the given start coordinates to the given target coordinate using the A* algorithm. Results
+        are cached until the tiles of the grid change, or an object is added to or removed from a cell on the path or
+        a cell whose objects were checked during the search, so repeated searches (such as those of an object whose
+        way is blocked) are only carried out once. As the movement rules of objects can change without them moving
+        (such as a door opening), the rules of the objects a cached result depends on are compared on every use.
+        :param list[Coord] start_coords: The coordinates from which the path may start.
+        :param Coord target_coord: The coordinate the path should lead to.
+        :param list[str] directions: The directions in which to move, in order of preference.
+        :param set|tuple ignore_priorities: The base priorities of the bases whose movement rules should be ignored.
+        :param bool can_always_move: If True, movement rules are ignored entirely.
+        :param int target_distance: If larger than 0, the path ends once the target is within this distance.
+        :param int|None max_path_length: If set, the search is stopped once it reaches paths longer than this.
+        :param int|None max_search_nodes: If set, the search is stopped after expanding this amount of coordinates.
+        :param bool use_cache: If False, always carries out a new search. Used when a cached path turned out to be
+        impossible to follow.
+        :return: The directions making up the path, and the coordinate the path ends at. If the target cannot be
+        reached within the given limits, the path to the coordinate closest to the target that was found.
+        :rtype: tuple[list[str], Coord|None]
+        """
+        cache_key = (
+            tuple(start_coords), target_coord, tuple(directions), frozenset(ignore_priorities), can_always_move,
+            target_distance, max_path_length, max_search_nodes)
+        cached_path = self._path_cache.get(cache_key, self.tile_version) if use_cache else None
+        if cached_path is not None:
+            path, end_coord, object_cells, object_rules = cached_path
+            if self._get_object_path_rules(object_cells, ignore_priorities) == object_rules:
+                return list(path), end_coord
+
+        path, end_coord, is_cacheable, dependency_cells = self._search_path(
+            start_coords, target_coord, directions, ignore_priorities, can_always_move, target_distance,
+            max_path_length, max_search_nodes)
+
+        if is_cacheable:
+            object_cells = tuple(cell for cell in dependency_cells if cell in self._object_bases)
+            object_rules = self._get_object_path_rules(object_cells, ignore_priorities)
+            self._path_cache.put(
+                cache_key, (tuple(path), end_coord, object_cells, object_rules), self.tile_version, dependency_cells)
+        return path, end_coord
+
+    def _get_object_path_rules(self, object_cells, ignore_priorities):
+        """
+        :param tuple[int] object_cells: The indices of cells holding objects.
+        :param set|tuple ignore_priorities: The base priorities of the bases whose movement rules should be ignored.
+        :return: For every given cell, everything about its bases that pathfinding depends on: its movement rules,
+        and which directions are overridden.
+        :rtype: tuple
+        """
+        override_properties = list(self.OVERRIDE_PROPERTIES.values())
+        object_rules = []
+        for cell in object_cells:
+            x_coord, y_coord = divmod(cell, self.base_grid_y_size)
+            overrides = self.get_top_properties(override_properties, x_coord, y_coord)
+            object_rules.append((
+                self.get_packed_movement_rule('move_from', x_coord, y_coord, ignore_priorities, self.NO_RULE),
+                self.get_packed_movement_rule('move_to', x_coord, y_coord, ignore_priorities, self.NO_RULE),
+                tuple(overrides[override_property] is None for override_property in override_properties)))
+        return tuple(object_rules)
+
+    def _search_path(
+            self, start_coords, target_coord, directions, ignore_priorities, can_always_move, target_distance,
+            max_path_length, max_search_nodes
+    ):
+        """
+        Carries out the A* search for find_path. The search state is kept in flat per-cell arrays that are reused
+        between searches, and the path is only reconstructed once the search has finished.
+        :return: The directions making up the path, the coordinate the path ends at, whether the result may be
+        cached (which is not the case if it depended on override conditions, which can change at any time), and the
+        cells the result depends on the objects of: the cells on the path, the cells that could not be stepped to,
+        and the cells holding objects whose movement rules were checked. Objects added elsewhere can only block paths
+        that are longer than the one found.
+        :rtype: tuple[list[str], Coord|None, bool, set[int]]
+        """
+        x_size = self.base_grid_x_size
+        y_size = self.base_grid_y_size
+        target_x = target_coord.x
+        target_y = target_coord.y
+
+        if self._pathfinding_buffers is None:
+            self._pathfinding_buffers = PathfindingBuffers(x_size * y_size)
+        buffers = self._pathfinding_buffers
+        search = buffers.start_search()
+        reached = buffers.reached
+        closed = buffers.closed
+        parents = buffers.parents
+        path_directions = buffers.directions
+        costs = buffers.costs
+        depths = buffers.depths
+        direction_indices = [self.PATHFINDING_DIRECTIONS.index(direction) for direction in directions]
+        override_properties = [self.OVERRIDE_PROPERTIES[direction] for direction in directions]
+        object_bases = self._object_bases
+        dependency_cells = set()
+
+        # Start with a set of nodes consisting of the starting coordinates
+        open_heap = []
+        entry_count = 0
+        closest_cell = None
+        closest_distance = None
+        for start_coord in start_coords:
+            if not (0 <= start_coord.x < x_size and 0 <= start_coord.y < y_size):
+                continue
+            cell = start_coord.x * y_size + start_coord.y
+            if reached[cell] == search:
+                continue
+            reached[cell] = search
+            parents[cell] = -1
+            costs[cell] = 0.0
+            depths[cell] = 0
+
+            distance = abs(start_coord.x - target_x) + abs(start_coord.y - target_y)
+            heapq.heappush(open_heap, (distance, entry_count, cell))
+            entry_count += 1
+            if closest_cell is None or distance < closest_distance:
+                closest_cell = cell
+                closest_distance = distance
+
+        end_cell = None
+        trim_steps = 0
+        expanded_nodes = 0
+        is_cacheable = True
+        while open_heap:
+            _, _, cell = heapq.heappop(open_heap)
+            if closed[cell] == search:
+                # Stale entry of a cell that was reached more cheaply later on.
+                continue
+            closed[cell] = search
+            if cell in object_bases:
+                dependency_cells.add(cell)
+
+            x_coord, y_coord = divmod(cell, y_size)
+            distance = abs(x_coord - target_x) + abs(y_coord - target_y)
+
+            # Found the target, returns the path
+            if distance == 0:
+                end_cell = cell
+                trim_steps = target_distance
+                break
+            elif 0 < target_distance and distance <= target_distance:
+                end_cell = cell
+                break
+
+            # search is too long, return best path
+            if max_path_length is not None and depths[cell] > max_path_length:
+                break
+            expanded_nodes += 1
+            if max_search_nodes is not None and expanded_nodes > max_search_nodes:
+                break
+
+            # Loop through children
+            overrides = self.get_top_properties(override_properties, x_coord, y_coord)
+            for direction, direction_index in zip(directions, direction_indices):
+                if overrides[self.OVERRIDE_PROPERTIES[direction]] is None:
+                    x_offset, y_offset, _, _ = self.MOVEMENT_DIRECTIONS[direction]
+                    child_coords = [(x_coord + x_offset, y_coord + y_offset)]
+                    g_increment = 1.0
+                    is_permitted = can_always_move or self.is_step_permitted(
+                        x_coord, y_coord, direction, ignore_priorities)
+                    child_x, child_y = child_coords[0]
+                    if 0 <= child_x < x_size and 0 <= child_y < y_size:
+                        child_cell = child_x * y_size + child_y
+                        # An object arriving in a blocked cell may unblock it, so blocked cells are depended on too.
+                        if not is_permitted or child_cell in object_bases:
+                            dependency_cells.add(child_cell)
+                else:
+                    override_condition = self.get_override_condition_direction(x_coord, y_coord, direction)
+                    child_coords = [
+                        (coord.x, coord.y) for coord in self.get_override_smart_coords(x_coord, y_coord, direction)]
+                    g_increment = self.get_override_smart_g_increment(x_coord, y_coord, direction)
+                    if override_condition is not None:
+                        is_cacheable = False
+                    is_permitted = (
+                        can_always_move or
+                        override_condition is None or
+                        PathfindingNode(Coord(x_coord, y_coord), costs[cell]).eval_override_condition(
+                            override_condition))
+
+                if not is_permitted:
                     continue
 
-        if direction == "right":
-            new_coord = Coord(old_coord.x + 1, old_coord.y)
-            return self._check_movement_straight(
-                [old_coord], [new_coord], ignore_elements=ignore_map_elements, relevant_from_side=1, relevant_to_side=3)
-        elif direction == "left":
-            new_coord = Coord(old_coord.x - 1, old_coord.y)
-            return self._check_movement_straight(
-                [old_coord], [new_coord], ignore_elements=ignore_map_elements, relevant_from_side=3, relevant_to_side=1)
-        elif direction == "up":
-            new_coord = Coord(old_coord.x, old_coord.y - 1)
-            return self._check_movement_straight(
-                [old_coord], [new_coord], ignore_elements=ignore_map_elements, relevant_from_side=0, relevant_to_side=2)
-        elif direction == "down":
-            new_coord = Coord(old_coord.x, old_coord.y + 1)
-            return self._check_movement_straight(
-                [old_coord], [new_coord], ignore_elements=ignore_map_elements, relevant_from_side=2, relevant_to_side=0)
+                child_cost = costs[cell] + g_increment
+                for child_x, child_y in child_coords:
+                    if not (0 <= child_x < x_size and 0 <= child_y < y_size):
+                        continue
+                    child_cell = child_x * y_size + child_y
+                    if closed[child_cell] == search:
+                        continue
+
+                    # If this is the cheapest way to get to the child coordinate, adds it to the open set.
+                    if reached[child_cell] != search or child_cost < costs[child_cell]:
+                        reached[child_cell] = search
+                        parents[child_cell] = cell
+                        path_directions[child_cell] = direction_index
+                        costs[child_cell] = child_cost
+                        depths[child_cell] = depths[cell] + 1
+
+                        child_distance = abs(child_x - target_x) + abs(child_y - target_y)
+                        heapq.heappush(open_heap, (child_cost + child_distance, entry_count, child_cell))
+                        entry_count += 1
+                        if child_distance < closest_distance:
+                            closest_cell = child_cell
+                            closest_distance = child_distance
+
+        if end_cell is None:
+            # The target could not be reached, so moves towards the closest coordinate found instead.
+            if closest_cell is None:
+                return [], None, is_cacheable, dependency_cells
+            end_cell = closest_cell
+
+        # Reconstructs the path by following the parents back from the final cell.
+        path = []
+        cell = end_cell
+        dependency_cells.add(cell)
+        while parents[cell] != -1:
+            dependency_cells.add(parents[cell])
+            if trim_steps > 0:
+                trim_steps -= 1
+                end_cell = parents[cell]
+            else:
+                path.append(self.PATHFINDING_DIRECTIONS[path_directions[cell]])
+            cell = parents[cell]
+        path.reverse()
+        return path, Coord(*divmod(end_cell, y_size)), is_cacheable, dependency_cells
 
     def is_move_permitted(self, element_id, new_x, new_y, ignore_elements=None):
         """
@@ -3803,7 +4843,7 @@ class OrthogonalTiledMapTiledBases(object):
         if ignore_elements is not None:
             for ignore_id in ignore_elements:
                 ignore_id = 'renpy.store.' + ignore_id
-                ignore_object = eval(ignore_id)
+                ignore_object = eval(compile_expression(ignore_id))
                 try:
                     ignore_map_elements.append(self.map_elements[ignore_object.base_id])
                 except (KeyError, AttributeError):
@@ -4193,6 +5233,14 @@ class OrthogonalTiledMap(TiledMapGame):
     def get_consistent_overlays(self) -> List[Overlay]:
         return self._overlay_manager.get_consistent_overlays()
 
+    def estimate_memory_size(self):
+        """
+        :return: An estimate of the memory taken up by this map in bytes. Images are not included, as they are kept in
+        renpy's image cache, which is shared between maps.
+        :rtype: int
+        """
+        return TiledMapGame.estimate_memory_size(self) + self.base_grid.estimate_memory_size()
+
     def reload_keys(self):
         """
         Reloads the input keys this map responds to, processing any changes.
@@ -4237,8 +5285,7 @@ class OrthogonalTiledMap(TiledMapGame):
         # If the gt has been reset for whatever reason, this updates the animation frame times for all animated tiles
         # to correspond to the reset st.
         if gt < self.last_gt:
-            for animated_tile in self.animated_tiles:
-                animated_tile.st_reset_frames(gt)
+            self.animated_tiles.st_reset(gt)
 
             if self.current_event_wait is not None:
                 self.current_event_wait.st_reset(self.last_gt, gt)
@@ -4284,6 +5331,51 @@ class OrthogonalTiledMap(TiledMapGame):
 
         renpy.exports.retain_after_load()
 
+    def needs_tick(self):
+        """
+        :return: Whether the game loop has to run on the next frame, which is the case while objects move, the player
+        holds a movement key, an event runs, or a menu screen is open. Parallel processes report when they next need to
+        run through get_next_tick_time instead.
+        :rtype: bool
+        """
+        if TiledMapGame.needs_tick(self):
+            return True
+        if self.force_check_touch or not self.checked_start_map_event:
+            return True
+        if renpy.store.pink_otm_current_event_name is not None or self.current_event_wait is not None:
+            return True
+        if self._screen_freeze or self.freeze_screen_open():
+            return True
+        if self._direction_cache.current_movement_direction() is not None:
+            return True
+        for mobile_object in self.mobile_objects:
+            if mobile_object.is_moving:
+                return True
+        return False
+
+    def get_next_tick_delay(self, st):
+        """
+        Determines when the game loop should run next, which is no later than the next timed code or event is due, or
+        than any active parallel process next needs to run.
+        :param float st: The shown time (in seconds).
+        :return: The delay (in seconds) after which the game loop should run next.
+        :rtype: float
+        """
+        delay = TiledMapGame.get_next_tick_delay(self, st)
+        otm_timer = renpy.store.otm_timer
+        if delay > 0 and not (otm_timer.paused or otm_timer.event_paused):
+            for next_trigger in (otm_timer.next_code_trigger, otm_timer.next_event_trigger):
+                if next_trigger is not None:
+                    delay = min(delay, max(0, next_trigger - otm_timer.time))
+        for parallel_process in self.parallel_processes.values():
+            if delay <= 0:
+                break
+            if not parallel_process.paused:
+                next_tick_time = parallel_process.get_next_tick_time(st)
+                if next_tick_time is not None:
+                    delay = min(delay, max(0, next_tick_time - st))
+        return delay
+
     def pause_parallel_processes(self, *processes):
         """
         Pauses all parallel processes with the given IDs until the current event ends. No action is taken if a
@@ -4424,8 +5516,7 @@ class OrthogonalTiledMap(TiledMapGame):
         Increments all animation gts by the given amount, used if the game skips over a period of game time
         :param float gt_diff: The amount by which to increment gt.
         """
-        for animated_tile in self.animated_tiles:  # type: OrthogonalTiledMapGameTileAnimated
-            animated_tile.increment_gt(gt_diff)
+        self.animated_tiles.increment_gt(gt_diff)
 
     def _increment_all_movement_gt(self, gt_diff):
         """
@@ -4545,6 +5636,37 @@ class OrthogonalTiledMap(TiledMapGame):
         else:
             self._add_element(x, y, layer, game_object)
 
+    def add_streamed_tile_layer(self, layer, gids, x_offset, y_offset, direct_gids=frozenset()):
+        """
+        Adds the tiles of a streamed tile layer to this game map. Their bases are only created for the chunks that are
+        looked up (see OrthogonalTiledMapTiledBases.add_streamed_tile_layer), except for those of tiles that run code
+        or emit a sound when added, which are added one by one.
+        :param TiledMapGameLayer layer: The layer on which the tiles exist
+        :param array gids: The gids of the layer's tiles, row by row.
+        :param int x_offset: The x offset (in pixels) of the layer
+        :param int y_offset: The y offset (in pixels) of the layer
+        :param set|frozenset direct_gids: The gids of tiles that are added to this map one by one with add_tile anyway.
+        """
+        direct_gids = set(direct_gids)
+        for gid in set(gids):
+            if gid != 0:
+                tile = self.get_tile_object(gid)
+                if tile.code_on_add is not None or getattr(tile, 'emits_sound', None) is not None:
+                    direct_gids.add(gid)
+
+        self.base_grid.add_streamed_tile_layer(layer, gids, x_offset, y_offset, direct_gids)
+        TiledMapGame.add_streamed_tile_layer(self, layer, gids, x_offset, y_offset, direct_gids)
+
+    def release_streamed_tiles(self, min_chunk_x, max_chunk_x, min_chunk_y, max_chunk_y):
+        """
+        Releases the bases of the streamed tiles outside the given chunk bounds, along with their displayable elements.
+        :param int min_chunk_x: The x of the first column of chunks that is kept.
+        :param int max_chunk_x: The x of the last column of chunks that is kept.
+        :param int min_chunk_y: The y of the first row of chunks that is kept.
+        :param int max_chunk_y: The y of the last row of chunks that is kept.
+        """
+        self.base_grid.release_streamed_tile_bases(min_chunk_x, max_chunk_x, min_chunk_y, max_chunk_y)
+
     def _add_element(self, x, y, layer, game_object):
         """
         Subfunction of add_element
@@ -4580,6 +5702,15 @@ class OrthogonalTiledMap(TiledMapGame):
             elif renpy.store.pink_otm_current_event_type == "dynamic":
                 game_object.save_and_halt()
         game_object.run_code_on_add()
+        self._start_emitting_sound(game_object)
+
+    @staticmethod
+    def _start_emitting_sound(game_object):
+        """
+        Starts playing the sound emitted by the given object, if it emits any.
+        :param OrthogonalTiledMapGameTile|OrthogonalTiledMapGameTileAnimated|OrthogonalTiledMapGameObject game_object:
+        The given object
+        """
         if hasattr(game_object, 'emits_sound') and getattr(game_object, 'emits_sound') is not None:
             game_object.sound_channel = renpy.store.pink_sound_manager.play_sound(
                 sound_file=game_object.emits_sound,
@@ -5405,8 +6536,7 @@ class OrthogonalTiledMap(TiledMapGame):
         """
         for mobile_object in self.mobile_objects:
             mobile_object.freeze()
-        for animated_tile in self.animated_tiles:
-            animated_tile.pause_animation()
+        self.animated_tiles.pause()
 
     def unfreeze_map(self, increment_gt=True):
         """
@@ -5416,8 +6546,104 @@ class OrthogonalTiledMap(TiledMapGame):
         """
         for mobile_object in self.mobile_objects:
             mobile_object.unfreeze(increment_gt=increment_gt)
-        for animated_tile in self.animated_tiles:
-            animated_tile.unpause_animation()
+        self.animated_tiles.unpause()
+
+    def suspend_map(self):
+        """
+        Suspends this map as the player leaves it, so that it can be kept in memory and resumed later on. Removes the
+        player and their followers from the map, and pauses all objects, animations, overlays and parallel processes.
+        Should be called after the sounds of the map have been stopped.
+        """
+        for follower in renpy.store.pink_otm_followers:
+            if follower.parent is self:
+                self._detach_object(follower)
+        if self.player_object is not None:
+            self._detach_object(self.player_object)
+            self.player_object = None
+
+        # The sounds were stopped on leaving the map, and are played again on resuming it.
+        self._suspended_sound_emitters = []
+        for base in self.base_grid.map_elements.values():
+            if getattr(base.game_object, 'sound_channel', None) is not None:
+                base.game_object.sound_channel = None
+                self._suspended_sound_emitters.append(base.game_object)
+
+        self.stop_running()
+        self.freeze_map()
+        self._overlay_manager.pause()
+        self._suspended_parallel_processes = set(self._screen_freeze_parallel_processes)
+        for process_id, parallel_process in self.parallel_processes.items():
+            if not parallel_process.paused:
+                parallel_process.pause()
+                self._suspended_parallel_processes.add(process_id)
+        self._screen_freeze = False
+        self._screen_freeze_parallel_processes = set()
+        self.current_event_wait = None
+        self.base_grid.release_pathfinding_buffers()
+
+    def resume_map(self, previous_map):
+        """
+        Resumes this map after it was suspended by suspend_map, as the player returns to it. Re-attaches the
+        consistent objects on this map that have since been loaded on other maps, and unpauses everything that was
+        paused when the map was suspended. The player and their followers are added by go_to_map.
+        :param OrthogonalTiledMap|None previous_map: The map the player is coming from.
+        """
+        renpy.store.pink_otm_loading_map = self
+
+        for map_object in self.map_objects.values():
+            if map_object.ref_name is None:
+                continue
+            old_incarnation = getattr(renpy.store, map_object.ref_name, None)
+            if old_incarnation is map_object:
+                continue
+            if (
+                    isinstance(map_object, OrthogonalTiledMapGameObjectMobile) and
+                    isinstance(old_incarnation, OrthogonalTiledMapGameObjectMobile) and
+                    map_object.should_load_consistent(map_object.properties)):
+                map_object.adopt_incarnation(old_incarnation)
+            setattr(renpy.store, map_object.ref_name, map_object)
+
+        # Consistent overlays are passed on from the previous map, replacing those this map had when it was left.
+        for consistent_overlay in self._overlay_manager.get_consistent_overlays():
+            self._overlay_manager.active_overlays.pop(id(consistent_overlay))
+        if previous_map is not None:
+            self._overlay_manager.add_consistent_overlays(previous_map.get_consistent_overlays())
+
+        self._pc_walk_speed = renpy.store.pink_otm_current_walk_speed
+        self._pc_run_speed = renpy.store.pink_otm_current_run_speed
+        self._mouse_state = None
+        self._mouse_click_start = None
+        self._mouse_move_target_pixel = None
+        self._mouse_move_target = None
+        self.checked_start_map_event = False
+        self.enable_controls()
+
+        self.recheck_variable_sprite_collections()
+        self.check_conditional_objects(check_all=True)
+        self.unfreeze_map(increment_gt=False)
+        self._overlay_manager.unpause()
+        for process_id in self._suspended_parallel_processes:
+            self.parallel_processes[process_id].unpause()
+        self._suspended_parallel_processes = set()
+
+        for sound_emitter in self._suspended_sound_emitters:
+            self._start_emitting_sound(sound_emitter)
+        self._suspended_sound_emitters = []
+
+        renpy.store.pink_otm_loading_map = None
+
+    def _detach_object(self, map_object):
+        """
+        Removes the given object from this map entirely, including from the indexes of its objects and animations.
+        :param OrthogonalTiledMapGameObjectSpriteCollection map_object: The given object.
+        """
+        if map_object.is_on_map():
+            self.remove_element(map_object)
+        if map_object in self.variable_sprite_collections:
+            self.variable_sprite_collections.remove(map_object)
+        if map_object.sprite_collection in self.animated_tiles.animations:
+            self.animated_tiles.remove(map_object.sprite_collection)
+        self.map_objects.pop(map_object.map_id, None)
 
     def halt_map(self):
         """
@@ -5519,7 +6745,7 @@ class OrthogonalTiledMap(TiledMapGame):
         Runs the code_on_enter on this map
         """
         if self.code_on_enter is not None:
-            exec(self.code_on_enter)
+            exec(compile_statements(self.code_on_enter))
 
     @property
     def code_on_leave(self):
@@ -5537,7 +6763,7 @@ class OrthogonalTiledMap(TiledMapGame):
         Runs the code_on_leave on this map
         """
         if self.code_on_leave is not None:
-            exec(self.code_on_leave)
+            exec(compile_statements(self.code_on_leave))
 
     def add_overlay_image(
             self,
@@ -5766,7 +6992,7 @@ class StartMapEvent(object):
 
     @property
     def condition_met(self):
-        return eval(self.condition)
+        return eval(compile_expression(self.condition))
 
 
 class StartMapEvents(object):
@@ -5844,6 +7070,7 @@ class StartMapEvents(object):
 
 class ParallelProcess(object):
     process_id = ""
+    area_positions = ()  # For area-based parallel processes, the positions of the Areas in their area tuples.
 
     def __init__(self):
         """
@@ -5854,6 +7081,11 @@ class ParallelProcess(object):
         self.paused = False
         self.last_gt = 0.0
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_area_index', None)
+        return state
+
     def pause(self):
         """
         Pauses this parallel process.
@@ -5953,6 +7185,32 @@ class ParallelProcess(object):
                 trans_end_y = end_y
         return Area(start_x, end_x, start_y, end_y), Area(trans_start_x, trans_end_x, trans_start_y, trans_end_y)
 
+    def _get_area_entries(self, coords, extra_keys=()):
+        """
+        For area-based parallel processes, retrieves the areas that may contain the given coordinates, using an index
+        of the areas that is built on first use and rebuilt after areas have been added or dropped.
+        :param Coord coords: The given coordinates.
+        :param extra_keys: The area IDs of areas to retrieve regardless of the given coordinates.
+        :return: (area_id, area_tuple) tuples, with the area_id being None for areas without one, in the order in which
+        the areas would be found in id_data and other_data.
+        :rtype: list[tuple]
+        """
+        area_index = getattr(self, '_area_index', None)
+        if area_index is None:
+            area_index = AreaIndex()
+            for area_id, area_tuple in self.id_data.items():
+                area_index.add(area_id, area_tuple, [area_tuple[position] for position in self.area_positions])
+            for area_tuple in getattr(self, 'other_data', ()):
+                area_index.add(None, area_tuple, [area_tuple[position] for position in self.area_positions])
+            self._area_index = area_index
+        return area_index.get_entries(coords, extra_keys)
+
+    def _invalidate_area_index(self):
+        """
+        Makes the area index of area-based parallel processes be rebuilt on its next use.
+        """
+        self._area_index = None
+
     def per_tick(self, gt):
         """
         Runs this parallel process for a single frame. Implemented in sub-classes.
@@ -5960,6 +7218,20 @@ class ParallelProcess(object):
         """
         self.last_gt = gt
 
+    def get_next_tick_time(self, gt):
+        """
+        Determines when this parallel process next needs to run, so that the map does not have to run its game loop on
+        every frame while nothing happens. Parallel processes run every frame unless their sub-class says otherwise,
+        except for area-based parallel processes, which only respond to the player moving, on which the map runs anyway.
+        :param float gt: The current game time in seconds.
+        :return: The game time at which this process next needs to run, or None if it only needs to respond to changes
+        that make the map run anyway, or that may wait for the map's next idle tick (see pink_tmd_max_idle_tick_delay).
+        :rtype: float|None
+        """
+        if len(self.area_positions) > 0:
+            return None
+        return gt
+
     def on_init(self):
         """
         Runs any code that needs to run after finishing the initialization of the map. Implemented in sub-classes.
@@ -6015,6 +7287,32 @@ class SmoothZoomController(ParallelProcess):
 
         ParallelProcess.per_tick(self, gt)
 
+    def get_next_tick_time(self, gt):
+        """
+        Zooms are animated on every frame until they are complete.
+        :param float gt: The current game time in seconds.
+        :rtype: float|None
+        """
+        pink_otm_current_camera = renpy.store.pink_otm_current_camera
+        if pink_otm_current_camera.xzoom != self.target_xzoom or pink_otm_current_camera.yzoom != self.target_yzoom:
+            return gt
+        return None
+
+
+def get_next_condition_tick_time(gt, conditions):
+    """
+    Determines when the conditions of a conditional trigger parallel process next need to be checked. Conditions that
+    only read store variables can only change through scripts, and are checked on the map's idle ticks. All others are
+    checked every frame.
+    :param float gt: The current game time in seconds.
+    :param iterable[str] conditions: The given conditions.
+    :rtype: float|None
+    """
+    for condition in conditions:
+        if get_store_dependencies(condition) is None:
+            return gt
+    return None
+
 
 class ConditionalEventTriggers(ParallelProcess):
     process_id = "conditional_event_triggers"
@@ -6074,7 +7372,7 @@ class ConditionalEventTriggers(ParallelProcess):
         :param list event_args: The given list of arguments to pass to the event.
         :param dict event_kwargs: The given list of keyword arguments to pass to the event.
         """
-        if eval(condition):
+        if eval(compile_expression(condition)):
             renpy.store.pink_otm_current_map.trigger_event(
                 event_name, "", *event_args, **event_kwargs)
 
@@ -6090,6 +7388,15 @@ class ConditionalEventTriggers(ParallelProcess):
                 self._evaluate_condition(condition, event_name, event_args, event_kwargs)
         ParallelProcess.per_tick(self, gt)
 
+    def get_next_tick_time(self, gt):
+        """
+        :param float gt: The current game time in seconds.
+        :rtype: float|None
+        """
+        conditions = [event_tuple[0] for event_tuple in self.id_data.values()]
+        conditions.extend(event_tuple[0] for event_tuple in self.other_data)
+        return get_next_condition_tick_time(gt, conditions)
+
 
 class ConditionalCodeTriggers(ParallelProcess):
     process_id = "conditional_code_triggers"
@@ -6138,8 +7445,8 @@ class ConditionalCodeTriggers(ParallelProcess):
         :param str condition: The given condition.
         :param str code: The given code.
         """
-        if eval(condition):
-            exec(code)
+        if eval(compile_expression(condition)):
+            exec(compile_statements(code))
 
     def per_tick(self, gt):
         """
@@ -6153,9 +7460,19 @@ class ConditionalCodeTriggers(ParallelProcess):
                 self._evaluate_condition(condition, event_code)
         ParallelProcess.per_tick(self, gt)
 
+    def get_next_tick_time(self, gt):
+        """
+        :param float gt: The current game time in seconds.
+        :rtype: float|None
+        """
+        conditions = [condition_tuple[0] for condition_tuple in self.id_data.values()]
+        conditions.extend(condition_tuple[0] for condition_tuple in self.other_data)
+        return get_next_condition_tick_time(gt, conditions)
+
 
 class SoundPlayAreas(ParallelProcess):
     process_id = "sound_play_areas"
+    area_positions = (0,)
 
     def __init__(self):
         """
@@ -6191,10 +7508,12 @@ class SoundPlayAreas(ParallelProcess):
         """
         area_tuple = (Area(start_x, end_x, start_y, end_y), sound_path, channel)
 
+        current_instance = cls.get_current_instance(game_map)
         if area_id is not None:
-            cls.get_current_instance(game_map).id_data[area_id] = area_tuple
+            current_instance.id_data[area_id] = area_tuple
         else:
-            cls.get_current_instance(game_map).other_data.append(area_tuple)
+            current_instance.other_data.append(area_tuple)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def drop_area(cls, area_id, game_map=None):
@@ -6204,7 +7523,9 @@ class SoundPlayAreas(ParallelProcess):
         :param OrthogonalTiledMap game_map: The map for which to perform this operation. Defaults to the map being
         loaded, or the map that is on screen if no map is being loaded. Will almost never have to be specified.
         """
-        cls.get_current_instance(game_map).id_data.pop(area_id)
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data.pop(area_id)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def set_default(cls, sound_path, channel="music", game_map=None):
@@ -6262,11 +7583,7 @@ class SoundPlayAreas(ParallelProcess):
             # Channels that the player is in zones for during this tick.
             tick_channels = set()
 
-            for area, sound_path, channel in self.id_data.values():
-                channel = self._handle_area(pc_coords, area, sound_path, channel)
-                if channel:
-                    tick_channels.add(channel)
-            for area, sound_path, channel in self.other_data:
+            for _, (area, sound_path, channel) in self._get_area_entries(pc_coords):
                 channel = self._handle_area(pc_coords, area, sound_path, channel)
                 if channel:
                     tick_channels.add(channel)
@@ -6287,6 +7604,7 @@ class SoundPlayAreas(ParallelProcess):
 
 class SoundPanAreas(ParallelProcess):
     process_id = "sound_pan_areas"
+    area_positions = (1, 2)
 
     def __init__(self):
         """
@@ -6335,10 +7653,12 @@ class SoundPanAreas(ParallelProcess):
             start_x, end_x, start_y, end_y, trans_start_x, trans_end_x, trans_start_y, trans_end_y, trans_radius)
         area_tuple = (pan_level, full_area, trans_area, channel)
 
+        current_instance = cls.get_current_instance(game_map)
         if area_id is not None:
-            cls.get_current_instance(game_map).id_data[area_id] = area_tuple
+            current_instance.id_data[area_id] = area_tuple
         else:
-            cls.get_current_instance(game_map).other_data.append(area_tuple)
+            current_instance.other_data.append(area_tuple)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def drop_area(cls, area_id, game_map=None):
@@ -6348,7 +7668,9 @@ class SoundPanAreas(ParallelProcess):
         :param OrthogonalTiledMap game_map: The map for which to perform this operation. Defaults to the map being
         loaded, or the map that is on screen if no map is being loaded. Will almost never have to be specified.
         """
-        cls.get_current_instance(game_map).id_data.pop(area_id)
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data.pop(area_id)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def set_default(cls, pan_level, channel="music", game_map=None):
@@ -6407,11 +7729,7 @@ class SoundPanAreas(ParallelProcess):
             # Channels that the player is in zones for during this tick.
             tick_channels = set()
 
-            for pan_level, full_area, trans_area, channel in self.id_data.values():
-                channel = self._handle_area(pc_coords, full_area, trans_area, pan_level, channel)
-                if channel:
-                    tick_channels.add(channel)
-            for pan_level, full_area, trans_area, channel in self.other_data:
+            for _, (pan_level, full_area, trans_area, channel) in self._get_area_entries(pc_coords):
                 channel = self._handle_area(pc_coords, full_area, trans_area, pan_level, channel)
                 if channel:
                     tick_channels.add(channel)
@@ -6426,6 +7744,7 @@ class SoundPanAreas(ParallelProcess):
 
 class SoundVolumeAreas(ParallelProcess):
     process_id = "sound_volume_areas"
+    area_positions = (1, 2)
 
     def __init__(self):
         """
@@ -6473,10 +7792,12 @@ class SoundVolumeAreas(ParallelProcess):
             start_x, end_x, start_y, end_y, trans_start_x, trans_end_x, trans_start_y, trans_end_y, trans_radius)
         area_tuple = (volume_level, full_area, trans_area, channel)
 
+        current_instance = cls.get_current_instance(game_map)
         if area_id is not None:
-            cls.get_current_instance(game_map).id_data[area_id] = area_tuple
+            current_instance.id_data[area_id] = area_tuple
         else:
-            cls.get_current_instance(game_map).other_data.append(area_tuple)
+            current_instance.other_data.append(area_tuple)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def drop_area(cls, area_id, game_map=None):
@@ -6486,7 +7807,9 @@ class SoundVolumeAreas(ParallelProcess):
         :param OrthogonalTiledMap game_map: The map for which to perform this operation. Defaults to the map being
         loaded, or the map that is on screen if no map is being loaded. Will almost never have to be specified.
         """
-        cls.get_current_instance(game_map).id_data.pop(area_id)
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data.pop(area_id)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def set_default(cls, volume_level, channel="music", game_map=None):
@@ -6545,11 +7868,7 @@ class SoundVolumeAreas(ParallelProcess):
             # Channels that the player is in zones for during this tick.
             tick_channels = set()
 
-            for volume_level, full_area, trans_area, channel in self.id_data.values():
-                channel = self._handle_area(pc_coords, full_area, trans_area, volume_level, channel)
-                if channel:
-                    tick_channels.add(channel)
-            for volume_level, full_area, trans_area, channel in self.other_data:
+            for _, (volume_level, full_area, trans_area, channel) in self._get_area_entries(pc_coords):
                 channel = self._handle_area(pc_coords, full_area, trans_area, volume_level, channel)
                 if channel:
                     tick_channels.add(channel)
@@ -6568,6 +7887,7 @@ class SoundVolumeAreas(ParallelProcess):
 
 class ZoomAreas(ParallelProcess):
     process_id = "zoom_areas"
+    area_positions = (2, 3)
 
     def __init__(self):
         """
@@ -6616,10 +7936,12 @@ class ZoomAreas(ParallelProcess):
             start_x, end_x, start_y, end_y, trans_start_x, trans_end_x, trans_start_y, trans_end_y, trans_radius)
         area_tuple = (zoom_level, zoom_time, full_area, trans_area)
 
+        current_instance = cls.get_current_instance(game_map)
         if area_id is not None:
-            cls.get_current_instance(game_map).id_data[area_id] = area_tuple
+            current_instance.id_data[area_id] = area_tuple
         else:
-            cls.get_current_instance(game_map).other_data.append(area_tuple)
+            current_instance.other_data.append(area_tuple)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def drop_area(cls, area_id, game_map=None):
@@ -6629,7 +7951,9 @@ class ZoomAreas(ParallelProcess):
         :param OrthogonalTiledMap game_map: The map for which to perform this operation. Defaults to the map being
         loaded, or the map that is on screen if no map is being loaded. Will almost never have to be specified.
         """
-        cls.get_current_instance(game_map).id_data.pop(area_id)
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data.pop(area_id)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def set_default(cls, zoom_level, zoom_time, game_map=None):
@@ -6678,10 +8002,7 @@ class ZoomAreas(ParallelProcess):
             pink_otm_current_pc = renpy.store.pink_otm_current_pc  # type: OrthogonalTiledMapGameObjectSpriteCollection
             pc_coords = pink_otm_current_pc.central_coord
 
-            for zoom_level, zoom_time, full_area, trans_area in self.id_data.values():
-                if self._handle_area(pc_coords, full_area, trans_area, zoom_level, zoom_time):
-                    return
-            for zoom_level, zoom_time, full_area, trans_area in self.other_data:
+            for _, (zoom_level, zoom_time, full_area, trans_area) in self._get_area_entries(pc_coords):
                 if self._handle_area(pc_coords, full_area, trans_area, zoom_level, zoom_time):
                     return
             if self.default_zoom is not None and self.default_zoom_time is not None:
@@ -6691,6 +8012,7 @@ class ZoomAreas(ParallelProcess):
 
 class VarAreas(ParallelProcess):
     process_id = "var_areas"
+    area_positions = (0,)
 
     def __init__(self):
         """
@@ -6721,10 +8043,12 @@ class VarAreas(ParallelProcess):
         """
         area_tuple = (Area(start_x, end_x, start_y, end_y), var_name, var_value)
 
+        current_instance = cls.get_current_instance(game_map)
         if area_id is not None:
-            cls.get_current_instance(game_map).id_data[area_id] = area_tuple
+            current_instance.id_data[area_id] = area_tuple
         else:
-            cls.get_current_instance(game_map).other_data.append(area_tuple)
+            current_instance.other_data.append(area_tuple)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def drop_area(cls, area_id, game_map=None):
@@ -6734,7 +8058,9 @@ class VarAreas(ParallelProcess):
         :param OrthogonalTiledMap game_map: The map for which to perform this operation. Defaults to the map being
         loaded, or the map that is on screen if no map is being loaded. Will almost never have to be specified.
         """
-        cls.get_current_instance(game_map).id_data.pop(area_id)
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data.pop(area_id)
+        current_instance._invalidate_area_index()
 
     @staticmethod
     def _handle_area(pc_coords, area, var_name, var_value):
@@ -6759,15 +8085,14 @@ class VarAreas(ParallelProcess):
             pink_otm_current_pc = renpy.store.pink_otm_current_pc  # type: OrthogonalTiledMapGameObjectSpriteCollection
             pc_coords = pink_otm_current_pc.central_coord
 
-            for area, var_name, var_value in self.id_data.values():
-                self._handle_area(pc_coords, area, var_name, var_value)
-            for area, var_name, var_value in self.other_data:
+            for _, (area, var_name, var_value) in self._get_area_entries(pc_coords):
                 self._handle_area(pc_coords, area, var_name, var_value)
         ParallelProcess.per_tick(self, gt)
 
 
 class CameraSwitchAreas(ParallelProcess):
     process_id = "camera_switch_areas"
+    area_positions = (0,)
 
     def __init__(self):
         """
@@ -6803,10 +8128,12 @@ class CameraSwitchAreas(ParallelProcess):
         """
         area_tuple = (Area(start_x, end_x, start_y, end_y), camera_target, zoom_level)
 
+        current_instance = cls.get_current_instance(game_map)
         if area_id is not None:
-            cls.get_current_instance(game_map).id_data[area_id] = area_tuple
+            current_instance.id_data[area_id] = area_tuple
         else:
-            cls.get_current_instance(game_map).other_data.append(area_tuple)
+            current_instance.other_data.append(area_tuple)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def drop_area(cls, area_id, game_map=None):
@@ -6816,7 +8143,9 @@ class CameraSwitchAreas(ParallelProcess):
         :param OrthogonalTiledMap game_map: The map for which to perform this operation. Defaults to the map being
         loaded, or the map that is on screen if no map is being loaded. Will almost never have to be specified.
         """
-        cls.get_current_instance(game_map).id_data.pop(area_id)
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data.pop(area_id)
+        current_instance._invalidate_area_index()
 
     @classmethod
     def set_default(cls, camera_target, zoom_level=1.0, game_map=None):
@@ -6860,10 +8189,7 @@ class CameraSwitchAreas(ParallelProcess):
             zoom_time = pink_otm_current_pc.movement_speed - 0.04
             camera = renpy.store.pink_otm_current_camera  # type: OrthogonalTiledCamera
 
-            for area, camera_target, zoom_level in self.id_data.values():
-                if self._handle_area(pc_coords, area, camera, camera_target, zoom_level, zoom_time):
-                    return
-            for area, camera_target, zoom_level in self.other_data:
+            for _, (area, camera_target, zoom_level) in self._get_area_entries(pc_coords):
                 if self._handle_area(pc_coords, area, camera, camera_target, zoom_level, zoom_time):
                     return
 
@@ -6895,6 +8221,7 @@ class ControlAreaCommandSet:
 
 class ControlAreas(ParallelProcess):
     process_id = "control_areas"
+    area_positions = (0,)
 
     def __init__(self):
         """
@@ -6942,7 +8269,9 @@ class ControlAreas(ParallelProcess):
             # generates IDs if none are passed along.
             area_id = cls.get_next_auto_id(game_map)
 
-        cls.get_current_instance(game_map).id_data[area_id] = area_tuple
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data[area_id] = area_tuple
+        current_instance._invalidate_area_index()
 
     @classmethod
     def get_next_auto_id(cls, game_map=None):
@@ -6964,7 +8293,9 @@ class ControlAreas(ParallelProcess):
         :param OrthogonalTiledMap game_map: The map for which to perform this operation. Defaults to the map being
         loaded, or the map that is on screen if no map is being loaded. Will almost never have to be specified.
         """
-        cls.get_current_instance(game_map).id_data.pop(area_id)
+        current_instance = cls.get_current_instance(game_map)
+        current_instance.id_data.pop(area_id)
+        current_instance._invalidate_area_index()
 
     @staticmethod
     def _handle_command_set(command_set):
@@ -7015,7 +8346,8 @@ class ControlAreas(ParallelProcess):
             pink_otm_current_pc = renpy.store.pink_otm_current_pc  # type: OrthogonalTiledMapGameObjectSpriteCollection
             pc_coords = pink_otm_current_pc.central_coord
 
-            for area_id, area_tuple in self.id_data.items():
+            # Areas the player was in are always handled, so that leaving them is noticed.
+            for area_id, area_tuple in self._get_area_entries(pc_coords, extra_keys=self._in_areas):
                 area, enter_commands, leave_commands = area_tuple
                 self._handle_area(pc_coords, area, area_id, enter_commands, leave_commands)
         ParallelProcess.per_tick(self, gt)
@@ -7148,6 +8480,20 @@ class VarTimes(ParallelProcess):
                 self._handle_timer(gt, action_list, timer_id)
         ParallelProcess.per_tick(self, gt)
 
+    def get_next_tick_time(self, gt):
+        """
+        :param float gt: The current game time in seconds.
+        :return: The game time at which the next action of any timer is due.
+        :rtype: float|None
+        """
+        next_tick_time = None
+        for timer_id, action_list in self.id_data.items():
+            if len(action_list) > 0:
+                trigger_time = self._last_trigger_st[timer_id] + action_list[0].time_increment
+                if next_tick_time is None or trigger_time < next_tick_time:
+                    next_tick_time = trigger_time
+        return next_tick_time
+
 
 def in_area(coords, area):
     """
@@ -7197,6 +8543,78 @@ def restore_rollback_settings():
         renpy.store.config.rollback_enabled = renpy.store.pink_otm_rollback_restore
 
 
+class ResidentMapCache(object):
+    def __init__(self):
+        """
+        Keeps recently left maps in memory in a suspended state, so that returning to one of them does not require it
+        to be built again. Maps are discarded from least to most recently left once more maps are kept than allowed by
+        pink_otm_resident_map_limit, or once they take up more memory together than allowed by
+        pink_otm_resident_map_memory. Resident maps are not saved, and are discarded when a game is started or loaded.
+        """
+        self.maps = OrderedDict()  # map path -> (session, map, estimated size in bytes), from least to most recent.
+
+    @property
+    def memory_size(self):
+        """
+        :return: The estimated amount of memory taken up by the resident maps, in bytes.
+        :rtype: int
+        """
+        return sum(map_size for session, game_map, map_size in self.maps.values())
+
+    def suspend(self, game_map):
+        """
+        Suspends the given map, which the player is leaving, and keeps it in memory if resident maps are enabled.
+        :param OrthogonalTiledMap game_map: The given map
+        """
+        if not renpy.store.pink_otm_resident_maps:
+            self.maps.clear()
+            return
+
+        self._discard_other_sessions()
+        game_map.suspend_map()
+        self.maps.pop(game_map.path, None)
+        self.maps[game_map.path] = (renpy.store.pink_otm_map_session, game_map, game_map.estimate_memory_size())
+
+        max_memory_size = renpy.store.pink_otm_resident_map_memory * 1024 * 1024
+        while len(self.maps) > renpy.store.pink_otm_resident_map_limit or (
+                len(self.maps) > 0 and self.memory_size > max_memory_size):
+            self.maps.popitem(last=False)
+
+    def take(self, map_path):
+        """
+        Removes the resident map with the given path from memory, so that it can be resumed.
+        :param str map_path: The path of the map relative to the game directory.
+        :return: The suspended map, or None if the map is not resident.
+        :rtype: OrthogonalTiledMap|None
+        """
+        self._discard_other_sessions()
+        resident_map = self.maps.pop(map_path, None)
+        if resident_map is None:
+            return None
+        return resident_map[1]
+
+    def discard(self, map_path=None):
+        """
+        Discards the resident map with the given path, so that it is built again the next time it is visited.
+        :param str|None map_path: The path of the map relative to the game directory. If None, discards all maps.
+        """
+        if map_path is None:
+            self.maps.clear()
+        else:
+            self.maps.pop(map_path, None)
+
+    def _discard_other_sessions(self):
+        """
+        Discards the maps that were left in a different session, before the game was last started or loaded.
+        """
+        for map_path, (session, game_map, map_size) in list(self.maps.items()):
+            if session is not renpy.store.pink_otm_map_session:
+                self.maps.pop(map_path)
+
+
+pink_resident_maps = ResidentMapCache()
+
+
 def go_to_map(
         target_map, x_coord=0, y_coord=0, orientation=None, transition_in=None,
         transition_in_sound=None
@@ -7231,6 +8649,8 @@ def go_to_map(
     # Kills all ongoing map sounds
     renpy.store.pink_sound_manager.stop_all_sounds()
 
+    map_path = "pink_engine/orthogonal_tiled_maps/" + target_map
+    old_map = renpy.store.pink_otm_current_map
     if renpy.store.pink_otm_current_map is not None:
         renpy.store.pink_otm_current_map.stop_predicting()
         if orientation is None and renpy.store.pink_otm_current_map.player_object is not None:
@@ -7241,11 +8661,29 @@ def go_to_map(
         # Runs the code_on_leave code for the old map
         renpy.store.pink_otm_current_map.run_code_on_leave()
 
-    map_file = renpy.exports.file("pink_engine/orthogonal_tiled_maps/" + target_map)
-    map_dict = json.load(map_file)
-    new_map = OrthogonalTiledMap(map_dict, "pink_engine/orthogonal_tiled_maps/" + target_map)
+        # Keeps the old map in memory if resident maps are enabled. Going to the same map always rebuilds it.
+        if old_map.path != map_path:
+            pink_resident_maps.suspend(old_map)
+
+    new_map = pink_resident_maps.take(map_path)
+    if new_map is not None:
+        new_map.resume_map(old_map)
+        new_map.start_predicting()
+    else:
+        map_dict = pink_map_preloader.take(map_path)
+        if map_dict is None:
+            map_dict = load_map_dict(map_path)
+        new_map = OrthogonalTiledMap(map_dict, map_path)
     renpy.store.pink_otm_current_map = new_map
 
+    if renpy.store.pink_tmd_auto_preload_maps:
+        warp_targets = [
+            "pink_engine/orthogonal_tiled_maps/" + warp_target for warp_target in get_warp_targets(new_map)
+            if "pink_engine/orthogonal_tiled_maps/" + warp_target not in pink_resident_maps.maps]
+        pink_map_preloader.discard_except(set(warp_targets))
+        for warp_target in warp_targets:
+            pink_map_preloader.preload(warp_target)
+
     new_map.add_object_at_coord(
         renpy.store.pink_otm_pc_init_dict, x_coord, y_coord, is_player=True, orientation=orientation)
     renpy.store.pink_otm_current_pc = new_map.player_object
@@ -7391,7 +8829,7 @@ def end_event(event_type: str, no_jump: bool = False, reset_interactor: bool = T
     :param reset_interactor: Whether or not to reset the object you started the object interacting with.
     """
     # In case any objects got removed right before the end of the event
-    renpy.store.pink_otm_current_map.check_conditional_objects()
+    renpy.store.pink_otm_current_map.check_conditional_objects(check_all=True)
 
     if event_type == "static":
         renpy.store.pink_sound_manager.unpause_all_sounds()
@@ -7802,14 +9240,54 @@ def get_all_sprite_filenames():
     return sprite_filenames
 
 
+WARP_TARGET_PATTERN = re.compile(r"""target_map['"]?\s*[:=]\s*['"]([^'"]+)['"]""")
+
+
+def get_warp_targets(game_map):
+    """
+    :param OrthogonalTiledMap game_map: The given map
+    :return: The file names of the maps that the warp events on the given map lead to, as found in the target_map
+    arguments of the event arguments of its objects.
+    :rtype: list[str]
+    """
+    warp_targets = []
+    for map_object in game_map.map_objects.values():
+        for property_value in map_object.properties.values():
+            if isinstance(property_value, str) and 'target_map' in property_value:
+                for warp_target in WARP_TARGET_PATTERN.findall(property_value):
+                    if warp_target not in warp_targets:
+                        warp_targets.append(warp_target)
+    return warp_targets
+
+
+def preload_map(target_map):
+    """
+    Starts loading the given OTM map in the background, so that a later go_to_map to that map is faster.
+    :param str target_map: The path of the given OTM map, as would be passed to go_to_map
+    """
+    pink_map_preloader.preload("pink_engine/orthogonal_tiled_maps/" + target_map)
+
+
+def discard_resident_maps(target_map=None):
+    """
+    Discards the given OTM map from memory if it was kept there after being left, so that it is built again the next
+    time it is visited. Only has an effect if pink_otm_resident_maps is True.
+    :param str|None target_map: The path of the given OTM map, as would be passed to go_to_map. If None, discards all
+    maps kept in memory.
+    """
+    if target_map is None:
+        pink_resident_maps.discard()
+    else:
+        pink_resident_maps.discard("pink_engine/orthogonal_tiled_maps/" + target_map)
+
+
 def get_map_data(filename):
     """
     :param str filename: The given filename
     :return: A dictionary containing the properties of the otm map at the given filename
     :rtype: dict
     """
-    json_file = renpy.exports.file("pink_engine/orthogonal_tiled_maps/" + filename)
-    map_dict = json.load(json_file)
+    map_dict = load_map_dict("pink_engine/orthogonal_tiled_maps/" + filename)
 
     grid_size = str(map_dict.get('width')) + "x" + str(map_dict.get('height'))
     tile_size = str(map_dict.get('tilewidth')) + "x" + str(map_dict.get('tileheight'))
@@ -7818,10 +9296,7 @@ def get_map_data(filename):
     layer_count = str(len(map_dict.get('layers')))
     tiled_version = map_dict.get('tiledversion')
 
-    properties = []
-    if map_dict.get('properties') is not None:
-        for map_property in map_dict.get('properties'):
-            properties.append(map_property['name'])
+    properties = list(get_property_dict(map_dict))
 
     tilesets = []
     if map_dict.get('tilesets') is not None:
@@ -7831,6 +9306,20 @@ def get_map_data(filename):
     return grid_size, tile_size, image_size, layer_count, tiled_version, properties, tilesets
 
 
+def get_interaction_hotspots():
+    """
+    :return: The interaction hotspots of the current orthogonal tiled map, as a list of strings describing the
+    coordinate, interaction property and value of each. Empty if no map is active.
+    :rtype: list
+    """
+    if renpy.store.pink_otm_current_map is None:
+        return []
+
+    return [
+        "({}, {}) {}: {}".format(coord.x, coord.y, interaction_property, value)
+        for coord, interaction_property, value in renpy.store.pink_otm_current_map.base_grid.get_interaction_hotspots()]
+
+
 def get_tileset_data(filename):
     """
     :param str filename: The given filename
@@ -7912,28 +9401,7 @@ def is_in_line(viewer, view_range, target="pink_otm_current_pc", in_view=True):
     """
     if type(viewer) is str:  # noqa
         viewer = getattr(renpy.store, viewer)
-    viewer_tuple = _convert_to_coord(viewer)
-    target_tuple = _convert_to_coord(target)
-
-    x_diff = abs(target_tuple[0] - viewer_tuple[0])
-    y_diff = abs(target_tuple[1] - viewer_tuple[1])
-
-    if hasattr(viewer, 'orientation') and viewer.orientation == "left":
-        in_line = target_tuple[1] == viewer_tuple[1] and viewer_tuple[0] >= target_tuple[0] and x_diff <= view_range
-    elif hasattr(viewer, 'orientation') and viewer.orientation == "right":
-        in_line = target_tuple[1] == viewer_tuple[1] and viewer_tuple[0] <= target_tuple[0] and x_diff <= view_range
-    elif hasattr(viewer, 'orientation') and viewer.orientation == "up":
-        in_line = target_tuple[0] == viewer_tuple[0] and viewer_tuple[1] >= target_tuple[1] and y_diff <= view_range
-    elif hasattr(viewer, 'orientation') and viewer.orientation == "down":
-        in_line = target_tuple[0] == viewer_tuple[0] and viewer_tuple[1] <= target_tuple[1] and y_diff <= view_range
-    else:
-        return False
-
-    if in_line:
-        if in_view:
-            return is_in_sight(viewer_tuple, target_tuple, include_touched_coords=False)
-        else:
-            return True
+    return _is_in_view('line', viewer, view_range, target, in_view, include_touched_coords=False)
 
 
 def is_in_cone(viewer, view_range, target="pink_otm_current_pc", in_view=True, include_touched_coords=False):
@@ -7951,28 +9419,139 @@ def is_in_cone(viewer, view_range, target="pink_otm_current_pc", in_view=True, i
     """
     if type(viewer) is str:  # noqa
         viewer = getattr(renpy.store, viewer)
+    return _is_in_view('cone', viewer, view_range, target, in_view, include_touched_coords)
+
+
+def _is_in_view(view_shape, viewer, view_range, target, in_view, include_touched_coords):
+    """
+    Used by the viewing functions, returns whether the target is within the given view shape of the viewer. Whether
+    it is in sight is looked up in the viewer's field of view, which is only calculated again when the viewer moves or
+    turns, or the map changes.
+    :param str view_shape: The shape of the view, which is 'cone', 'line' or 'range' (see in_view_shape).
+    :param str|OrthogonalTiledMapGameObject viewer: The viewing object, or its ref_name
+    :param str|Coord|OrthogonalTiledMapGameObject target: The target being observed, its coordinate, or its
+    ref_name.
+    :param int view_range: The maximum number of tiles to look.
+    :param bool in_view: If True, will only return True if the view is unobstructed by impassible tiles.
+    :param bool include_touched_coords: If True, will also check coordinates touched by the line of sight (so where
+    the view passes straight through an adjoining corner) for obstructing objects.
+    :rtype: bool
+    """
     viewer_tuple = _convert_to_coord(viewer)
     target_tuple = _convert_to_coord(target)
+    if viewer_tuple is None or target_tuple is None:
+        return False
 
-    x_diff = abs(target_tuple[0] - viewer_tuple[0])
-    y_diff = abs(target_tuple[1] - viewer_tuple[1])
-
-    if viewer.orientation == "left":
-        in_cone = viewer_tuple[0] >= target_tuple[0] and y_diff < x_diff <= view_range
-    elif viewer.orientation == "right":
-        in_cone = viewer_tuple[0] <= target_tuple[0] and y_diff < x_diff <= view_range
-    elif viewer.orientation == "up":
-        in_cone = viewer_tuple[1] >= target_tuple[1] and x_diff < y_diff <= view_range
-    elif viewer.orientation == "down":
-        in_cone = viewer_tuple[1] <= target_tuple[1] and x_diff < y_diff <= view_range
-    else:
+    orientation = getattr(viewer, 'orientation', None)
+    if not in_view_shape(view_shape, viewer_tuple, orientation, target_tuple, view_range):
         return False
+    elif not in_view:
+        return True
+    return renpy.store.pink_otm_current_map.base_grid.is_in_field_of_view(
+        view_shape, viewer_tuple, orientation, view_range, target_tuple, include_touched_coords=include_touched_coords)
 
-    if in_cone:
-        if in_view:
-            return is_in_sight(viewer_tuple, target_tuple, include_touched_coords=include_touched_coords)
-        else:
+
+def in_view_shape(view_shape, viewer_coord, orientation, target_coord, view_range):
+    """
+    Returns whether the target coordinate lies within the given view shape of a viewer, regardless of whether the
+    view is obstructed. The 'line' shape covers the coordinates straight in front of the viewer, the 'cone' shape the
+    coordinates in front of the viewer that are further away ahead than to the side, and the 'range' shape all
+    coordinates within the given walking distance.
+    :param str view_shape: The shape of the view, which is 'cone', 'line' or 'range'.
+    :param tuple viewer_coord: The coordinate of the viewer.
+    :param str|None orientation: The orientation of the viewer. Not used for the 'range' shape.
+    :param tuple target_coord: The coordinate being observed.
+    :param int view_range: The maximum number of tiles to look.
+    :rtype: bool
+    """
+    x_diff = abs(target_coord[0] - viewer_coord[0])
+    y_diff = abs(target_coord[1] - viewer_coord[1])
+
+    if view_shape == 'range':
+        return x_diff + y_diff <= view_range
+    elif view_shape == 'line':
+        if orientation == "left":
+            return target_coord[1] == viewer_coord[1] and viewer_coord[0] >= target_coord[0] and x_diff <= view_range
+        elif orientation == "right":
+            return target_coord[1] == viewer_coord[1] and viewer_coord[0] <= target_coord[0] and x_diff <= view_range
+        elif orientation == "up":
+            return target_coord[0] == viewer_coord[0] and viewer_coord[1] >= target_coord[1] and y_diff <= view_range
+        elif orientation == "down":
+            return target_coord[0] == viewer_coord[0] and viewer_coord[1] <= target_coord[1] and y_diff <= view_range
+    elif view_shape == 'cone':
+        if orientation == "left":
+            return viewer_coord[0] >= target_coord[0] and y_diff < x_diff <= view_range
+        elif orientation == "right":
+            return viewer_coord[0] <= target_coord[0] and y_diff < x_diff <= view_range
+        elif orientation == "up":
+            return viewer_coord[1] >= target_coord[1] and x_diff < y_diff <= view_range
+        elif orientation == "down":
+            return viewer_coord[1] <= target_coord[1] and x_diff < y_diff <= view_range
+    return False
+
+
+def _slope_lit(lit_slopes, slope):
+    """
+    :param list lit_slopes: The unobstructed slopes of an octant, as a list of ranges that each consist of their low
+    slope, whether it is included, their high slope, and whether it is included.
+    :param float slope: The slope of the line of sight to check.
+    :return: Whether the line of sight with the given slope is unobstructed.
+    :rtype: bool
+    """
+    for low_slope, low_included, high_slope, high_included in lit_slopes:
+        if (low_slope < slope or (low_slope == slope and low_included)) and (
+                slope < high_slope or (slope == high_slope and high_included)):
+            return True
+    return False
+
+
+def _slopes_overlap(lit_slopes, low_slope, high_slope):
+    """
+    :param list lit_slopes: The unobstructed slopes of an octant (see _slope_lit).
+    :param float low_slope: The low slope of the range to check, which is included.
+    :param float high_slope: The high slope of the range to check, which is included.
+    :return: Whether any of the lines of sight with slopes in the given range are unobstructed.
+    :rtype: bool
+    """
+    for lit_low_slope, low_included, lit_high_slope, high_included in lit_slopes:
+        if (lit_high_slope > low_slope or (lit_high_slope == low_slope and high_included)) and (
+                lit_low_slope < high_slope or (lit_low_slope == high_slope and low_included)):
             return True
+    return False
+
+
+def _subtract_shadow(lit_slopes, low_slope, high_slope, shadow_includes_ends):
+    """
+    :param list lit_slopes: The unobstructed slopes of an octant (see _slope_lit).
+    :param float low_slope: The low slope of the lines of sight obstructed by a cell.
+    :param float high_slope: The high slope of the lines of sight obstructed by a cell.
+    :param bool shadow_includes_ends: Whether the lines with the low and high slopes themselves, which pass straight
+    through a corner of the cell, are obstructed as well.
+    :return: The unobstructed slopes that remain.
+    :rtype: list
+    """
+    remaining_slopes = []
+    for lit_low_slope, low_included, lit_high_slope, high_included in lit_slopes:
+        # The part below the shadow.
+        if lit_high_slope < low_slope:
+            end_slope, end_included = lit_high_slope, high_included
+        elif lit_high_slope > low_slope:
+            end_slope, end_included = low_slope, not shadow_includes_ends
+        else:
+            end_slope, end_included = low_slope, high_included and not shadow_includes_ends
+        if lit_low_slope < end_slope or (lit_low_slope == end_slope and low_included and end_included):
+            remaining_slopes.append((lit_low_slope, low_included, end_slope, end_included))
+
+        # The part above the shadow.
+        if lit_low_slope > high_slope:
+            start_slope, start_included = lit_low_slope, low_included
+        elif lit_low_slope < high_slope:
+            start_slope, start_included = high_slope, not shadow_includes_ends
+        else:
+            start_slope, start_included = high_slope, low_included and not shadow_includes_ends
+        if start_slope < lit_high_slope or (start_slope == lit_high_slope and start_included and high_included):
+            remaining_slopes.append((start_slope, start_included, lit_high_slope, high_included))
+    return remaining_slopes
 
 
 def _convert_to_coord(convertible):
@@ -8046,18 +9625,7 @@ def is_in_range(viewer, view_range, target="pink_otm_current_pc", in_view=True,
     the view passes straight through an adjoining corner) for obstructing objects.
     :rtype: bool
     """
-    viewer_tuple = _convert_to_coord(viewer)
-    target_tuple = _convert_to_coord(target)
-    if viewer_tuple is None or target_tuple is None:
-        return False
-
-    distance = coord_distance(viewer_tuple, target_tuple)
-    if distance <= view_range:
-        if in_view:
-            return is_in_sight(viewer_tuple, target_tuple, include_touched_coords=include_touched_coords)
-        else:
-            return True
-    return False
+    return _is_in_view('range', viewer, view_range, target, in_view, include_touched_coords)
 
 
 def is_in_sight(start_coord, end_coord, include_touched_coords=True):
@@ -8069,13 +9637,8 @@ def is_in_sight(start_coord, end_coord, include_touched_coords=True):
     the view passes straight through an adjoining corner) for obstructing objects.
     :rtype: bool
     """
-    coord_order = coords_in_line(
-        start_coord=start_coord, end_coord=end_coord, include_touched_coords=include_touched_coords)
-    for coord in coord_order:
-        passable = renpy.store.pink_otm_current_map.base_grid.get_move_to(coord.x, coord.y) == "1111"
-        if not passable:
-            return False
-    return True
+    return renpy.store.pink_otm_current_map.base_grid.is_sight_unobstructed(
+        start_coord, end_coord, include_touched_coords=include_touched_coords)
 
 
 def coords_in_line(start_coord, end_coord, include_touched_coords=True):
@@ -8086,94 +9649,52 @@ def coords_in_line(start_coord, end_coord, include_touched_coords=True):
     :param bool include_touched_coords: If True, will also include coordinates touched by the line (so where
     it passes straight through an adjoining corner).
     """
-    line_coord = [start_coord]
+    return [
+        Coord(x=x_coord, y=y_coord) for x_coord, y_coord in supercover_line(
+            start_coord[0], start_coord[1], end_coord[0], end_coord[1], include_touched_coords)]
 
-    x_diff = float(end_coord[0] - start_coord[0])
-    y_diff = float(end_coord[1] - start_coord[1])
 
-    if x_diff == y_diff == 0:
-        return []
-    elif abs(x_diff) > abs(y_diff):  # Find route in increments of X
-        x_step = 1.0 if x_diff > 0 else -1.0  # Positive or negative increments?
-        y_step = (y_diff / x_diff) * x_step   # Y per X
-
-        curr_x, curr_y = float(start_coord.x), float(start_coord.y)
-        while line_coord[-1] != end_coord:
-            curr_x += x_step
-            curr_x_int = floor(curr_x)
-            curr_y += y_step
-
-            prev_coord = line_coord[-1]
-            y_coord_shift = curr_y - float(prev_coord.y)   # How much has Y shifted from previous coord at end of step
-            half_y_shift = (y_coord_shift - 0.5 * y_step)  # How much has Y shifted halfway through line-drawing
-
-            if 0.499999 < half_y_shift < 0.500001:
-                # Line goes through bottom corner. Floating point error resistant
-                if include_touched_coords:
-                    line_coord.append(Coord(x=curr_x_int, y=prev_coord.y))
-                    line_coord.append(Coord(x=prev_coord.x, y=prev_coord.y + 1))
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y + 1))
-            elif -0.499999 > half_y_shift > -0.500001:
-                # Line goes through top corner. Floating point error resistant
-                if include_touched_coords:
-                    line_coord.append(Coord(x=curr_x_int, y=prev_coord.y))
-                    line_coord.append(Coord(x=prev_coord.x, y=prev_coord.y - 1))
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y - 1))
-            elif y_coord_shift >= 0.5 > half_y_shift:  # Y change positive, change happens after x change
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y))
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y + 1))
-            elif y_coord_shift >= 0.5 < half_y_shift:  # Y change positive, change happens before x change
-                line_coord.append(Coord(x=prev_coord.x, y=prev_coord.y + 1))
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y + 1))
-            elif y_coord_shift <= -0.5 < half_y_shift:  # Y change negative, change happens before x change
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y))
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y - 1))
-            elif y_coord_shift <= -0.5 > half_y_shift:  # Y change negative, change happens after x change
-                line_coord.append(Coord(x=prev_coord.x, y=prev_coord.y - 1))
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y - 1))
-            else:  # No Y change this step
-                line_coord.append(Coord(x=curr_x_int, y=prev_coord.y))
-    else:  # Find route in increments of Y
-        y_step = 1.0 if y_diff > 0 else -1.0  # Positive or negative increments?
-        x_step = (x_diff / y_diff) * y_step   # X per Y
-
-        curr_x, curr_y = float(start_coord.x), float(start_coord.y)
-        while line_coord[-1] != end_coord:
-            curr_x += x_step
-            curr_y += y_step
-            curr_y_int = floor(curr_y)
-
-            prev_coord = line_coord[-1]
-            x_coord_shift = curr_x - float(prev_coord.x)   # How much has X shifted from previous coord at end of step
-            half_x_shift = (x_coord_shift - 0.5 * x_step)  # How much has X shifted halfway through line-drawing
-
-            if 0.499999 < half_x_shift < 0.500001:
-                # Line goes through right corner. Floating point error resistant
-                if include_touched_coords:
-                    line_coord.append(Coord(x=prev_coord.x + 1, y=prev_coord.y))
-                    line_coord.append(Coord(x=prev_coord.x, y=curr_y_int))
-                line_coord.append(Coord(x=prev_coord.x + 1, y=curr_y_int))
-            elif -0.499999 > half_x_shift > -0.500001:
-                # Line goes through left corner. Floating point error resistant
-                if include_touched_coords:
-                    line_coord.append(Coord(x=prev_coord.x - 1, y=prev_coord.y))
-                    line_coord.append(Coord(x=prev_coord.x, y=curr_y_int))
-                line_coord.append(Coord(x=prev_coord.x - 1, y=curr_y_int))
-            elif x_coord_shift >= 0.5 > half_x_shift:  # X change positive, change happens after y change
-                line_coord.append(Coord(x=prev_coord.x, y=curr_y_int))
-                line_coord.append(Coord(x=prev_coord.x + 1, y=curr_y_int))
-            elif x_coord_shift >= 0.5 < half_x_shift:  # X change positive, change happens before y change
-                line_coord.append(Coord(x=prev_coord.x + 1, y=prev_coord.y))
-                line_coord.append(Coord(x=prev_coord.x + 1, y=curr_y_int))
-            elif x_coord_shift <= -0.5 < half_x_shift:  # X change negative, change happens after y change
-                line_coord.append(Coord(x=prev_coord.x, y=curr_y_int))
-                line_coord.append(Coord(x=prev_coord.x - 1, y=curr_y_int))
-            elif x_coord_shift <= -0.5 > half_x_shift:  # X change negative, change happens before y change
-                line_coord.append(Coord(x=prev_coord.x - 1, y=prev_coord.y))
-                line_coord.append(Coord(x=prev_coord.x - 1, y=curr_y_int))
-            else:  # No X change this step
-                line_coord.append(Coord(x=prev_coord.x, y=curr_y_int))
-    return line_coord[1:-1]
+def supercover_line(start_x, start_y, end_x, end_y, include_touched_coords=True):
+    """
+    Generates the coordinates that a line between the centers of the given start and end coordinates passes through,
+    in order, not including the start and end coordinates themselves. Only uses integer arithmetic, so lines passing
+    straight through a corner are always recognized as such.
+    :param int start_x: The x of the start of the line.
+    :param int start_y: The y of the start of the line.
+    :param int end_x: The x of the end of the line.
+    :param int end_y: The y of the end of the line.
+    :param bool include_touched_coords: If True, will also include coordinates touched by the line (so where
+    it passes straight through an adjoining corner).
+    :rtype: collections.Iterator[tuple[int, int]]
+    """
+    x_diff = abs(end_x - start_x)
+    y_diff = abs(end_y - start_y)
+    x_step = 1 if end_x > start_x else -1
+    y_step = 1 if end_y > start_y else -1
+
+    x_coord, y_coord = start_x, start_y
+    x_steps_taken = y_steps_taken = 0
+    while x_steps_taken < x_diff or y_steps_taken < y_diff:
+        # Compares how far along the line it crosses the next vertical and the next horizontal grid line, with both
+        # distances multiplied by 2 * x_diff * y_diff to keep them integers.
+        crossing_order = (1 + 2 * x_steps_taken) * y_diff - (1 + 2 * y_steps_taken) * x_diff
+        if crossing_order == 0:  # Line goes through a corner
+            if include_touched_coords:
+                yield x_coord + x_step, y_coord
+                yield x_coord, y_coord + y_step
+            x_coord += x_step
+            y_coord += y_step
+            x_steps_taken += 1
+            y_steps_taken += 1
+        elif crossing_order < 0:  # Line crosses the vertical grid line first
+            x_coord += x_step
+            x_steps_taken += 1
+        else:  # Line crosses the horizontal grid line first
+            y_coord += y_step
+            y_steps_taken += 1
+
+        if x_coord != end_x or y_coord != end_y:
+            yield x_coord, y_coord
 
 
 def spawn_sprite_collection(
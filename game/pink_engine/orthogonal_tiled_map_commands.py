@@ -1,9 +1,11 @@
 from typing import Optional
 
 import renpy  # noqa
+from pink_engine.commons import SlottedObject
 
 
-class ControlCommand(object):
+class ControlCommand(SlottedObject):
+    __slots__ = ('type', 'properties')
     untimed_types = {"change_stand_animation", "change_move_animation", "change_movement_speed", "go_custom"}
 
     def __init__(self, command_type, **kwargs):
@@ -323,6 +325,22 @@ class ControlCommand(object):
     def path_target(self, value):
         self.properties['path_target'] = value
 
+    @property
+    def path_end(self):
+        """
+        :return: Automatically set by pathfinding function, don't set manually. Contains the coordinate the pathfinding
+        path ends at. Used to extend the path when the target moves, rather than calculating a new one.
+        :rtype: Coord
+        """
+        if 'path_end' in self.properties:
+            return self.properties['path_end']
+        else:
+            return None
+
+    @path_end.setter
+    def path_end(self, value):
+        self.properties['path_end'] = value
+
     @property
     def max_path_length(self):
         """
@@ -334,6 +352,18 @@ class ControlCommand(object):
         else:
             return 10
 
+    @property
+    def max_search_nodes(self):
+        """
+        :return: the maximum amount of coordinates the pathfinding algorithm expands before giving up and moving
+        towards the closest coordinate found.
+        :rtype: int
+        """
+        if 'max_search_nodes' in self.properties:
+            return self.properties['max_search_nodes']
+        else:
+            return renpy.store.pink_otm_default_max_search_nodes
+
     @property
     def ignore_elements(self):
         """
@@ -1,13 +1,33 @@
 import renpy  # noqa
 import pygame  # noqa
 import json
-from math import ceil, floor, pow, sqrt, sin, pi
+import heapq
+import base64
+import gzip
+import zlib
+import sys
+import hashlib
+import pickle
+import posixpath
+import threading
+from array import array
 from collections import OrderedDict
+from bisect import bisect_left
+from math import ceil, floor, pow, sqrt, sin, pi
+from sys import getsizeof
 from typing import List, Optional, Dict, Tuple
 import os
+import warnings
 
-from pink_engine.commons import Coord
-from pink_engine.tileset import Tileset, TilesetTile, TilesetAnimatedTile, pink_tileset_dict
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # zstd compressed tile layers can only be loaded if the zstandard module is available.
+
+from pink_engine.commons import Coord, FrameTimeline, compile_expression, compile_statements, get_store_dependencies, \
+    get_instance_size, get_grid_size, SlottedObject, PropertyDict
+from pink_engine.tileset import Tileset, TilesetTile, TilesetAnimatedTile, pink_tileset_dict, get_gid_table, \
+    pink_tileset_lock, GID_FLIPPED_HORIZONTALLY, GID_FLIPPED_VERTICALLY, GID_FLIPPED_DIAGONALLY
 
 Dimensions = Tuple[int, int, int, int]  # start x, start y, width, height
 
@@ -24,13 +44,16 @@ LAYER_PRIORITY = {
     'move_super': 5,
     'interaction': 6}
 VISIBLE_LAYERS = {'sub', 'dynamic', 'super'}
+STATIC_CHUNK_LAYERS = {'sub', 'super'}
 
 
 # ======================================================================================================================
 # =============================================VISUAL===================================================================
 # ======================================================================================================================
 
-class GameTimerTimedCode:
+class GameTimerTimedCode(SlottedObject):
+    __slots__ = ('time', 'code', 'code_id')
+
     def __init__(self, time: float, code: str, code_id: Optional[str]):
         """
         Instances of this class represent a single piece of code that is on a timer, and will be played when that
@@ -48,10 +71,12 @@ class GameTimerTimedCode:
         """
         Executes the code in this timer.
         """
-        exec(self.code)
+        exec(compile_statements(self.code))
 
 
-class GameTimerTimedEvent:
+class GameTimerTimedEvent(SlottedObject):
+    __slots__ = ('time', 'event', 'event_args', 'event_kwargs', 'event_id')
+
     def __init__(self, time: float, event: str, event_args: tuple, event_kwargs: dict, event_id: Optional[str]):
         """
         Instances of this class represent a single event that is on a timer, and should be called when the time is hit.
@@ -1318,7 +1343,26 @@ class TiledMap(renpy.exports.Displayable):
         self.next_id = 0
         self.map_elements = {}
 
-        #
+        # Chunks of pre-composited static tiles, indexed by layer and chunk coordinates. Chunks are only added to the
+        # render grid once their layer has finished loading.
+        self.static_chunks = {}
+
+        # Tile layers whose tiles only get displayable elements while they are near the camera, as (layer, gids,
+        # x offset, y offset) tuples, and the displayable ids of the tiles of the streamed chunks that currently have
+        # elements, indexed by chunk coordinates.
+        self.streamed_layers = []
+        self.streamed_chunks = {}
+
+        # The render order of the objects in the current frame, kept up to date as elements are added, removed and
+        # moved, so that it only needs to be rebuilt from scratch when the camera moves to a different set of tiles.
+        self._frame_bounds = None  # (min_x_bound, max_x_bound, min_y_bound, max_y_bound)
+        self._frame_keys = []  # priority tuples of the objects in frame, in render order.
+        self._frame_objects = []  # objects in frame, in render order.
+
+        # Change tracking. The map is only rendered again if it is marked as dirty, or if the camera has changed since
+        # the last render. Otherwise, Ren'Py keeps reusing the previous render.
+        self._dirty = True
+        self._rendered_camera_state = None
 
     def get_next_id(self):
         """
@@ -1363,12 +1407,121 @@ class TiledMap(renpy.exports.Displayable):
         new_element = TiledMapElement(self, element_id, x, y, layer, game_object)
         self.map_elements[element_id] = new_element
         self.add_to_grid(new_element)
+        self._add_to_frame_order(new_element)
+        self._dirty = True
 
         if game_object.single_display:
             game_object.displayable_id = element_id
 
         return element_id
 
+    def add_static_element(self, x, y, layer, game_object):
+        """
+        Adds the given static tile at the given x and y on the given layer to the chunk that covers it, rather than
+        giving it a displayable element of its own. Chunks only hold the tiles of a single render row, so that they
+        are ordered against the other elements of their layer just like their tiles would be. The chunk is not
+        displayed until register_static_chunks is called.
+        :param int x: The x (in pixels) at which the given tile's image is displayed
+        :param int y: The y (in pixels) at which the given tile's image is displayed
+        :param TiledMapGameLayer layer: The layer the tile exists on
+        :param TiledMapGameTile game_object: The given tile
+        """
+        chunk_size = self.game_object.static_chunk_size
+        chunk_x = floor(x / (self.game_object.tile_size.x * chunk_size))
+        render_y = floor((y + game_object.height - 2) / self.game_object.tile_size.y)
+        chunk_key = (layer, chunk_x, render_y)
+
+        if chunk_key not in self.static_chunks:
+            self.static_chunks[chunk_key] = TiledMapStaticChunk(self, layer)
+        self.static_chunks[chunk_key].add_tile(x, y, game_object)
+
+    def register_static_chunks(self):
+        """
+        Adds all static chunks that are not yet displayed to this object's render grid.
+        """
+        for chunk in self.static_chunks.values():
+            if chunk.element_id is None:
+                chunk.element_id = self.get_next_id()
+                chunk.finalize()
+                self.map_elements[chunk.element_id] = chunk
+                self.add_to_grid(chunk)
+                self._add_to_frame_order(chunk)
+                self._dirty = True
+
+    def add_streamed_layer(self, layer, gids, x_offset, y_offset):
+        """
+        Registers the given tile layer as streamed. Its tiles are given displayable elements by update_streamed_chunks
+        whenever the chunk they are in comes near the camera, and lose them again once it is far enough away.
+        :param TiledMapGameLayer layer: The given layer
+        :param array gids: The gids of the layer's tiles, row by row.
+        :param int x_offset: The x offset (in pixels) of the layer
+        :param int y_offset: The y offset (in pixels) of the layer
+        """
+        self.streamed_layers.append((layer, gids, x_offset, y_offset))
+
+    def update_streamed_chunks(self, frame_bounds):
+        """
+        Gives displayable elements to the tiles of the streamed chunks within pink_tmd_stream_radius chunks of the
+        given frame, and removes those of the streamed chunks more than one chunk further away than that.
+        :param tuple frame_bounds: The first and last column and the first and last row of the render grid in frame.
+        """
+        if len(self.streamed_layers) == 0:
+            return
+
+        chunk_size = self.game_object.stream_chunk_size
+        radius = renpy.store.pink_tmd_stream_radius
+        min_x_bound, max_x_bound, min_y_bound, max_y_bound = frame_bounds
+        min_chunk_x, max_chunk_x = floor(min_x_bound / chunk_size), floor(max_x_bound / chunk_size)
+        min_chunk_y, max_chunk_y = floor(min_y_bound / chunk_size), floor(max_y_bound / chunk_size)
+
+        for chunk_key in list(self.streamed_chunks):
+            chunk_x, chunk_y = chunk_key
+            if (
+                    chunk_x < min_chunk_x - radius - 1 or chunk_x > max_chunk_x + radius + 1 or
+                    chunk_y < min_chunk_y - radius - 1 or chunk_y > max_chunk_y + radius + 1
+            ):
+                for element_id in self.streamed_chunks.pop(chunk_key):
+                    self.remove_element(element_id)
+        self.game_object.release_streamed_tiles(
+            min_chunk_x - radius - 1, max_chunk_x + radius + 1, min_chunk_y - radius - 1, max_chunk_y + radius + 1)
+
+        last_chunk_x = (self.game_object.grid_size.x - 1) // chunk_size
+        last_chunk_y = (self.game_object.grid_size.y - 1) // chunk_size
+        for chunk_x in range(max(min_chunk_x - radius, 0), min(max_chunk_x + radius, last_chunk_x) + 1):
+            for chunk_y in range(max(min_chunk_y - radius, 0), min(max_chunk_y + radius, last_chunk_y) + 1):
+                if (chunk_x, chunk_y) not in self.streamed_chunks:
+                    self.streamed_chunks[(chunk_x, chunk_y)] = self._materialize_streamed_chunk(chunk_x, chunk_y)
+
+    def _materialize_streamed_chunk(self, chunk_x, chunk_y):
+        """
+        Adds displayable elements for the tiles of all streamed layers in the given chunk.
+        :param int chunk_x: The x of the given chunk, in chunks.
+        :param int chunk_y: The y of the given chunk, in chunks.
+        :return: The displayable ids of the added elements.
+        :rtype: list
+        """
+        game_object = self.game_object
+        chunk_size = game_object.stream_chunk_size
+        tile_size = game_object.tile_size
+        columns = range(chunk_x * chunk_size, min((chunk_x + 1) * chunk_size, game_object.grid_size.x))
+        rows = range(chunk_y * chunk_size, min((chunk_y + 1) * chunk_size, game_object.grid_size.y))
+
+        element_ids = []
+        for layer, gids, x_offset, y_offset in self.streamed_layers:
+            for row in rows:
+                row_start = row * game_object.grid_size.x
+                for column in columns:
+                    gid = gids[row_start + column]
+                    if gid == 0:
+                        continue
+                    tile = game_object.get_tile_object(gid)
+                    if game_object.is_static_chunk_element(layer, tile):
+                        continue
+                    x = x_offset + column * tile_size.x
+                    y = y_offset + row * tile_size.y - tile.height + tile_size.y
+                    element_ids.append(self.add_element(x, y, layer, tile))
+        return element_ids
+
     def remove_element(self, element_id):
         """
         Removes the element with the given ID from this displayable
@@ -1376,7 +1529,9 @@ class TiledMap(renpy.exports.Displayable):
         """
         element = self.map_elements[element_id]
         self.remove_from_grid(element)
+        self._remove_from_frame_order(element)
         self.map_elements.pop(element_id)
+        self._dirty = True
 
         if element.game_object.single_display:
             element.game_object.displayable_id = None
@@ -1390,10 +1545,53 @@ class TiledMap(renpy.exports.Displayable):
         """
         element = self.map_elements[element_id]
         self.remove_from_grid(element)
+        self._remove_from_frame_order(element)
         element.x = new_x
         element.y = new_y
         element.set_priority_tuple()
         self.add_to_grid(element)
+        self._add_to_frame_order(element)
+        self._dirty = True
+
+    def _in_frame(self, element):
+        """
+        :param TiledMapElement|TiledMapStaticChunk element: The given element
+        :return: Whether the given element occupies part of the render grid covered by the current frame.
+        :rtype: bool
+        """
+        min_x_bound, max_x_bound, min_y_bound, max_y_bound = self._frame_bounds
+        columns = element.get_columns()
+        rows = element.get_rows()
+        return (
+            max(columns.start, min_x_bound, 0) <= min(columns.stop - 1, max_x_bound, self.render_grid_x_size - 1) and
+            max(rows.start, min_y_bound, 0) <= min(rows.stop - 1, max_y_bound, self.render_grid_y_size - 1))
+
+    def _add_to_frame_order(self, element):
+        """
+        Inserts the given element into the render order of the current frame, if it is in frame.
+        :param TiledMapElement|TiledMapStaticChunk element: The given element
+        """
+        if self._frame_bounds is None or not self._in_frame(element):
+            return
+
+        priority_tuple = element.priority_tuple
+        index = bisect_left(self._frame_keys, priority_tuple)
+        self._frame_keys.insert(index, priority_tuple)
+        self._frame_objects.insert(index, element)
+
+    def _remove_from_frame_order(self, element):
+        """
+        Removes the given element from the render order of the current frame, if it is present.
+        :param TiledMapElement|TiledMapStaticChunk element: The given element
+        """
+        if self._frame_bounds is None:
+            return
+
+        priority_tuple = element.priority_tuple
+        index = bisect_left(self._frame_keys, priority_tuple)
+        if index < len(self._frame_keys) and self._frame_objects[index] is element:
+            self._frame_keys.pop(index)
+            self._frame_objects.pop(index)
 
     def render(self, width, height, st, at):  # noqa
         """
@@ -1403,7 +1601,7 @@ class TiledMap(renpy.exports.Displayable):
         :param float at: The animation time (in seconds).
         :rtype: renpy.exports.Render
         """
-        renpy.exports.redraw(self, 0)
+        self._dirty = False
 
         # initiate render object
         render = renpy.exports.Render(width, height)
@@ -1412,19 +1610,60 @@ class TiledMap(renpy.exports.Displayable):
             return render
         if renpy.store.pink_render_enabled:
             self.game_object.camera.center_on_target()
-            objects_in_frame = self.get_objects_in_frame()
-            objects_in_frame = self.sort_objects(objects_in_frame)
+            objects_in_frame = self.get_sorted_objects_in_frame()
 
             for child in objects_in_frame:
                 render.place(child, child.x, child.y)
 
+        self._rendered_camera_state = self.get_camera_state()
         return render
 
-    def get_objects_in_frame(self):
+    def get_camera_state(self):
         """
-        :return: a list of objects currently in frame.
+        :return: A tuple describing everything about the camera that affects how this map is rendered.
+        :rtype: tuple
+        """
+        camera = self.game_object.camera
+        return (
+            camera.x.value, camera.y.value, camera.xzoom, camera.yzoom, camera.viewport_width,
+            camera.viewport_height, renpy.store.pink_render_enabled)
+
+    def check_redraw(self):
+        """
+        Called once every game tick. Redraws the elements in frame whose image has changed since they were last
+        rendered, and redraws this displayable if any elements have been added, removed or moved, or if the camera
+        has changed. If nothing has changed, the previous render is reused.
+        """
+        for element in self._frame_objects:
+            if element.volatile and element.needs_redraw():
+                renpy.exports.redraw(element, 0)
+
+        # The camera follows its target, which may have moved during this tick.
+        if renpy.store.pink_render_enabled:
+            self.game_object.camera.center_on_target()
+        if self._dirty or self.get_camera_state() != self._rendered_camera_state:
+            renpy.exports.redraw(self, 0)
+
+    def get_sorted_objects_in_frame(self):
+        """
+        :return: a list of objects currently in frame, in the order in which they should be rendered. Only rebuilt when
+        the section of the render grid that is in frame changes.
         :rtype: list
         """
+        frame_bounds = self.get_frame_bounds()
+        if frame_bounds != self._frame_bounds:
+            self.update_streamed_chunks(frame_bounds)
+            self._frame_bounds = frame_bounds
+            self._frame_objects = self.sort_objects(self.get_objects_in_frame())
+            self._frame_keys = [map_object.priority_tuple for map_object in self._frame_objects]
+
+        return self._frame_objects
+
+    def get_frame_bounds(self):
+        """
+        :return: The first and last column and the first and last row of the render grid currently in frame.
+        :rtype: tuple
+        """
         camera = self.game_object.camera
 
         # Pixel maximums covered by the screen, plus a bit of margin to accommodate high framerates.
@@ -1438,6 +1677,15 @@ class TiledMap(renpy.exports.Displayable):
         min_y_bound = int(min_y / (self.game_object.tile_size.y * camera.yzoom))
         max_y_bound = int(max_y / (self.game_object.tile_size.y * camera.yzoom))
 
+        return min_x_bound, max_x_bound, min_y_bound, max_y_bound
+
+    def get_objects_in_frame(self):
+        """
+        :return: a list of objects currently in frame.
+        :rtype: list
+        """
+        min_x_bound, max_x_bound, min_y_bound, max_y_bound = self.get_frame_bounds()
+
         # Slice render_grid to get matrix of objects currently in frame.
         slices = []
         frame_matrix = self.render_grid[min_x_bound:max_x_bound + 1]
@@ -1472,6 +1720,20 @@ class TiledMap(renpy.exports.Displayable):
 
         return sorted_objects
 
+    def estimate_memory_size(self):
+        """
+        :return: An estimate of the memory taken up by the render grid and elements of this displayable in bytes, not
+        including the images they display.
+        :rtype: int
+        """
+        size = get_grid_size(self.render_grid) + getsizeof(self.map_elements)
+        for element in self.map_elements.values():
+            size += get_instance_size(element)
+        for static_chunk in self.static_chunks.values():
+            size += get_instance_size(static_chunk) + getsizeof(static_chunk.tiles)
+            size += sum(getsizeof(tile_tuple) for tile_tuple in static_chunk.tiles)
+        return size
+
     def visit(self):
         return list(self.map_elements.values())
 
@@ -1496,6 +1758,12 @@ class TiledMapElement(renpy.exports.Displayable):
         self.game_object = game_object
         self.layer = layer
 
+        # Whether the image of this element can change after it has been added. Only volatile elements are checked
+        # for changes every tick.
+        self.volatile = self.game_object.single_display or self.game_object.is_animated
+        self._rendered_image = None
+        self._rendered_render_dict = None
+
         if self.game_object.parent.orientation == "orthogonal" and self.layer.layer_type == 'dynamic':
             self._priority_tuple = (
                 LAYER_PRIORITY[self.layer.layer_type], self.render_y, self.layer.z_order,
@@ -1513,6 +1781,8 @@ class TiledMapElement(renpy.exports.Displayable):
         :rtype: renpy.exports.Render
         """
         child = self.game_object.image
+        self._rendered_image = child
+        self._rendered_render_dict = self.game_object.render_dict
 
         if child is None:
             # Object with an image of None, returns an empty render
@@ -1527,12 +1797,18 @@ class TiledMapElement(renpy.exports.Displayable):
             t = renpy.display.transform.Transform(child=child, **self.game_object.render_dict)
             child_render = renpy.exports.render(t, width, height, st, at)
 
-        if self.game_object.is_animated:
-            renpy.exports.redraw(self, 0.05)
-            # TODO issues when next frame time is changed. Maybe create class for keeping track?
-            # renpy.exports.redraw(self, st - self.game_object.next_frame_time)
         return child_render
 
+    def needs_redraw(self):
+        """
+        :return: Whether the image or render settings of this element's game object have changed since this element
+        was last rendered.
+        :rtype: bool
+        """
+        return (
+            self.game_object.image != self._rendered_image or
+            self.game_object.render_dict != self._rendered_render_dict)
+
     def get_columns(self):
         """
         :return: The range of columns of the render grid occupied by this element
@@ -1587,6 +1863,108 @@ class TiledMapElement(renpy.exports.Displayable):
             self._priority_tuple = (
                 LAYER_PRIORITY[self.layer.layer_type], self.layer.z_order, self.render_y, self.x, self.element_id)
 
+
+class TiledMapStaticChunk(renpy.exports.Displayable):
+    def __init__(self, parent_map, layer, **kwargs):
+        """
+        A single displayable object that displays a row of static tiles on a single layer at once, used in place
+        of a separate TiledMapElement per tile. All tiles in a chunk share the render_y of the chunk. As chunks never
+        request a redraw, Ren'Py keeps reusing the composited render of a chunk once it has been rendered.
+        :param TiledMap parent_map: The displayable map which this chunk is part of
+        :param TiledMapGameLayer layer: The layer on which the tiles in this chunk exist
+        """
+        renpy.exports.Displayable.__init__(self, **kwargs)  # Py2
+
+        self.parent_map = parent_map
+        self.layer = layer
+        self.element_id = None  # Set once the chunk is added to the render grid.
+        self.volatile = False
+
+        # List of (x, y, tile) tuples, in the order in which they should be rendered.
+        self.tiles = []
+
+        self.x = 0
+        self.y = 0
+        self.width = 0
+        self.height = 0
+        self._priority_tuple = None
+
+    def add_tile(self, x, y, tile):
+        """
+        Adds the given tile to this chunk
+        :param int x: The x (in pixels) at which the given tile's image is displayed
+        :param int y: The y (in pixels) at which the given tile's image is displayed
+        :param TiledMapGameTile tile: The given tile
+        """
+        self.tiles.append((x, y, tile))
+
+    def finalize(self):
+        """
+        Calculates this chunk's bounds, render order, and the order of the tiles within it. Should be called once all
+        tiles have been added to the chunk.
+        """
+        self.tiles.sort(key=lambda tile_tuple: tile_tuple[0])
+
+        self.x = min(x for x, y, tile in self.tiles)
+        self.y = min(y for x, y, tile in self.tiles)
+        self.width = max(x + tile.width for x, y, tile in self.tiles) - self.x
+        self.height = max(y + tile.height for x, y, tile in self.tiles) - self.y
+
+        self._priority_tuple = (
+            LAYER_PRIORITY[self.layer.layer_type], self.layer.z_order, self.render_y, self.x, self.element_id)
+
+    def render(self, width, height, st, at):  # noqa
+        """
+        :param int width:
+        :param int height:
+        :param float st: The shown time (in seconds).
+        :param float at: The animation time (in seconds).
+        :rtype: renpy.exports.Render
+        """
+        render = renpy.exports.Render(self.width, self.height)
+        for x, y, tile in self.tiles:
+            render.blit(renpy.exports.load_image(tile.image), (x - self.x, y - self.y))
+        return render
+
+    def get_columns(self):
+        """
+        :return: The range of columns of the render grid occupied by this chunk
+        :rtype: range
+        """
+        start_x_coord = int(self.x / self.parent_map.game_object.tile_size.x)
+        end_x_coord = int((self.x + self.width - 1) / self.parent_map.game_object.tile_size.x)
+        return range(start_x_coord, end_x_coord + 1)
+
+    def get_rows(self):
+        """
+        :return: The range of rows of the render grid occupied by this chunk
+        :rtype: range
+        """
+        start_y_coord = int(self.y / self.parent_map.game_object.tile_size.y)
+        end_y_coord = int((self.y + self.height - 1) / self.parent_map.game_object.tile_size.y)
+        return range(start_y_coord, end_y_coord + 1)
+
+    @property
+    def priority_tuple(self):
+        """
+        :return: This chunk's priority tuple (a tuple determining the order in which objects are rendered)
+        :rtype: tuple
+        """
+        return self._priority_tuple
+
+    @property
+    def render_y(self):
+        """
+        :return: The y coordinate at which this chunk is regarded as being placed for the sake of determining its
+        render order, which is that of each of its tiles.
+        :rtype: int
+        """
+        x, y, tile = self.tiles[0]
+        return floor((y + tile.height - 2) / self.parent_map.game_object.tile_size.y)
+
+    def visit(self):
+        return []
+
 # TODO OrthogonalTiledMapPolygon
 
 
@@ -1595,11 +1973,191 @@ class TiledMapElement(renpy.exports.Displayable):
 # ======================================================================================================================
 
 
+class AnimationScheduler(object):
+    def __init__(self):
+        """
+        Keeps track of all animations on a map (animated tiles and sprite collections), and updates only those
+        animations whose frame is due to change, by keeping them in a heap ordered by their next frame time.
+        Animations that are paused or have nothing to animate are dropped from the heap until they are rescheduled.
+        """
+        self.animations = []
+        self.last_gt = 0.0
+
+        self._heap = []  # heap of (next_frame_time, sequence number, animation) tuples
+        self._scheduled = {}  # animation -> sequence number of its valid heap entry
+        self._next_sequence = 0
+
+    def __iter__(self):
+        return iter(self.animations)
+
+    def __len__(self):
+        return len(self.animations)
+
+    def add(self, animation):
+        """
+        Adds the given animation to this scheduler.
+        :param TiledMapGameTileAnimated|TiledMapSpriteCollection animation: The given animation
+        """
+        self.animations.append(animation)
+        animation.scheduler = self
+        self.reschedule(animation)
+
+    def remove(self, animation):
+        """
+        Removes the given animation from this scheduler.
+        :param TiledMapGameTileAnimated|TiledMapSpriteCollection animation: The given animation
+        """
+        self.animations.remove(animation)
+        self._scheduled.pop(animation, None)
+        animation.latest_frame_gt = self.last_gt
+        animation.scheduler = None
+
+    def reschedule(self, animation):
+        """
+        (Re)inserts the given animation into the heap at its current next frame time. Should be called whenever an
+        animation's next frame time is moved to an earlier time.
+        :param TiledMapGameTileAnimated|TiledMapSpriteCollection animation: The given animation
+        """
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        self._scheduled[animation] = sequence
+        heapq.heappush(self._heap, (animation.next_frame_time, sequence, animation))
+
+        # Discards outdated heap entries once they make up the majority of the heap.
+        if len(self._heap) > 2 * len(self._scheduled) + 64:
+            self._heap = [entry for entry in self._heap if self._scheduled.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+    def next_frame_time(self):
+        """
+        :return: The earliest next frame time of the scheduled animations, or None if no animation is scheduled.
+        :rtype: float|None
+        """
+        heap = self._heap
+        while heap and self._scheduled.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+        if heap:
+            return heap[0][0]
+        return None
+
+    def update(self, gt):
+        """
+        Updates the frame of every animation whose next frame time has passed.
+        :param float gt: Game time in seconds.
+        """
+        self.last_gt = gt
+
+        due_animations = []
+        while self._heap and self._heap[0][0] < gt:
+            frame_time, sequence, animation = heapq.heappop(self._heap)
+            if self._scheduled.get(animation) == sequence:
+                due_animations.append(animation)
+
+        for animation in due_animations:
+            animation.update_frame(gt)
+            if animation.next_frame_time < gt:
+                # Paused, or nothing to animate. Rescheduled on unpausing or changing animation.
+                self._scheduled.pop(animation)
+            else:
+                self.reschedule(animation)
+
+    def st_reset(self, st):
+        """
+        Rebases all animations based on the given st, after the st has been reset.
+        :param float st: Game time in seconds.
+        """
+        for animation in self.animations:
+            animation.latest_frame_gt = self.last_gt
+            animation.st_reset_frames(st)
+        self.last_gt = st
+
+    def increment_gt(self, gt_diff):
+        """
+        Delays the next frame of all animations by the given quantity.
+        :param float gt_diff: the quantity of time by which to delay the next frames (in seconds)
+        """
+        for animation in self.animations:
+            animation.increment_gt(gt_diff)
+
+    def pause(self):
+        """
+        Pauses all animations.
+        """
+        for animation in self.animations:
+            animation.pause_animation()
+
+    def unpause(self):
+        """
+        Unpauses all animations.
+        """
+        for animation in self.animations:
+            animation.unpause_animation()
+
+
+class ConditionalObjectTracker(object):
+    # Store values of these types are compared by value. Other values may have been changed in place, so objects that
+    # depend on them are always checked.
+    COMPARABLE_TYPES = (bool, int, float, str, type(None))
+
+    def __init__(self):
+        """
+        Keeps track of the renpy.store variables read by the conditionals of conditional objects, so that only those
+        objects whose conditional might have a different result need to be checked every tick.
+        """
+        self.objects_by_name = {}  # store variable name -> conditional objects whose conditional reads it
+        self.polled_objects = []  # Conditional objects whose dependencies could not be determined
+        self.values = {}  # store variable name -> value at the last check
+
+    def add(self, game_object):
+        """
+        Starts tracking the given conditional object.
+        :param TiledMapGameObject|TiledMapGameTile game_object: The given conditional object
+        """
+        dependencies = get_store_dependencies(game_object.properties['conditional'])
+        if dependencies is None:
+            self.polled_objects.append(game_object)
+            return
+
+        for name in dependencies:
+            self.objects_by_name.setdefault(name, []).append(game_object)
+            self.values.pop(name, None)  # Ensures the new object gets checked.
+
+    def needs_polling(self):
+        """
+        :return: Whether any tracked object has a conditional whose dependencies could not be determined, and which
+        therefore has to be checked every frame.
+        :rtype: bool
+        """
+        return len(self.polled_objects) > 0
+
+    def get_changed_objects(self):
+        """
+        :return: The conditional objects whose conditional might have changed since the last call.
+        :rtype: list
+        """
+        changed_objects = list(self.polled_objects)
+        changed_ids = set()
+        for name, game_objects in self.objects_by_name.items():
+            value = getattr(renpy.store, name, None)
+            if name in self.values:
+                old_value = self.values[name]
+                if type(value) is type(old_value) and type(value) in self.COMPARABLE_TYPES and value == old_value:
+                    continue
+            self.values[name] = value
+
+            for game_object in game_objects:
+                if id(game_object) not in changed_ids:
+                    changed_ids.add(id(game_object))
+                    changed_objects.append(game_object)
+        return changed_objects
+
+
 # Base Images
 class TiledMapGameTile(object):
     is_conditional = False
     is_animated = False
     single_display = False  # If True, Indicates that this object corresponds to only a single visual object.
+    gid = 0  # The gid the tile is used under on its map, set by TiledMapGame.get_tile_object.
 
     def __init__(self, parent_map, parent_tile):
         """
@@ -1614,7 +2172,16 @@ class TiledMapGameTile(object):
 
         self.height = parent_tile.image_height
         self.width = parent_tile.image_width
-        self.properties = parent_tile.properties.copy()
+        self.properties = PropertyDict(parent_tile.properties)
+
+    def __setstate__(self, state):
+        """
+        :param dict state: The attribute dictionary this object was saved with. Properties saved as a plain dictionary
+        are converted into a PropertyDict.
+        """
+        self.__dict__.update(state)
+        if not isinstance(self.properties, PropertyDict):
+            self.properties = PropertyDict(self.properties)
 
     def is_on_map(self):
         """
@@ -1638,7 +2205,7 @@ class TiledMapGameTile(object):
         :return: The tag for movement sound played when moving into this tile. Note that the tag should correspond
         to a key in the pink_otm_terrain_noises dictionary defined in standard_events.rpy.
         """
-        return self.properties.get('sound_tag')
+        return self.properties.resolved.sound_tag
 
 
 class TiledMapGameTileAnimated(TiledMapGameTile):
@@ -1653,18 +2220,32 @@ class TiledMapGameTileAnimated(TiledMapGameTile):
         """
         TiledMapGameTile.__init__(self, parent_map, parent_tile)
 
-        self.frames = OrderedDict()
-        for animation_time, frame_id in parent_tile.frames.items():
-            animation_time = float(animation_time) / 1000
+        frame_images = []
+        for frame_id in parent_tile.timeline.frames:
             frame_image = filepath_to_reg_image(parent_tile.parent.get_tile(frame_id).image)
-            self.frames[animation_time] = frame_image
+            frame_images.append(frame_image)
             self.parent.registered_images.add(frame_image)
+        self.timeline = FrameTimeline(
+            [float(end_time) / 1000 for end_time in parent_tile.timeline.end_times], frame_images)
 
-        self.next_frame_key = next(iter(self.frames))
-        self.next_frame_time = next(iter(self.frames))
-        self.image = self.frames[self.next_frame_key]
+        self.frame_index = 0
+        self.next_frame_time = self.timeline.end_times[0]
+        self.image = self.timeline.frames[0]
         self.latest_frame_gt = self.parent.last_gt
         self.paused = False
+        self.scheduler = None  # Set by the AnimationScheduler this tile is added to.
+
+    def __setstate__(self, state):
+        """
+        :param dict state: The attribute dictionary this object was saved with. Frames saved as a dictionary of frame
+        end times to images are converted into a timeline.
+        """
+        TiledMapGameTile.__setstate__(self, state)
+        if 'frames' in state:
+            self.timeline, self.frame_index = FrameTimeline.from_frame_dict(
+                self.__dict__.pop('frames'), self.__dict__.pop('next_frame_key', None))
+        if 'scheduler' not in state:
+            self.scheduler = None
 
     def pause_animation(self):
         """
@@ -1677,6 +2258,8 @@ class TiledMapGameTileAnimated(TiledMapGameTile):
         Unpauses the animation on a map unfreeze
         """
         self.paused = False
+        if self.scheduler is not None:
+            self.scheduler.reschedule(self)
 
     def increment_gt(self, gt_diff):
         """
@@ -1691,20 +2274,9 @@ class TiledMapGameTileAnimated(TiledMapGameTile):
         :param float gt: Game time in seconds.
         """
         self.latest_frame_gt = gt
-        if not self.paused:
-            while gt > self.next_frame_time:
-                prev_frame_key = self.next_frame_key
-
-                old_frame = self.frames.pop(self.next_frame_key)
-                self.frames[self.next_frame_key] = old_frame
-
-                self.next_frame_key = next(iter(self.frames))
-                if self.next_frame_key > prev_frame_key:
-                    self.next_frame_time = self.next_frame_time + self.next_frame_key - prev_frame_key
-                else:
-                    self.next_frame_time = self.next_frame_time + self.next_frame_key
-
-            self.image = self.frames[self.next_frame_key]
+        if not self.paused and gt > self.next_frame_time:
+            self.frame_index, self.next_frame_time = self.timeline.advance(self.frame_index, self.next_frame_time, gt)
+            self.image = self.timeline.frames[self.frame_index]
 
     def st_reset_frames(self, st):
         """
@@ -1713,6 +2285,8 @@ class TiledMapGameTileAnimated(TiledMapGameTile):
         :param float st: Game time in seconds.
         """
         self.next_frame_time = self.next_frame_time - self.latest_frame_gt + st
+        if self.scheduler is not None:
+            self.scheduler.reschedule(self)
 
     def post_load_frame_restoration(self):
         """
@@ -1721,15 +2295,19 @@ class TiledMapGameTileAnimated(TiledMapGameTile):
         """
         self.next_frame_time = self.next_frame_time - self.latest_frame_gt
         self.latest_frame_gt = 0.0
+        if self.scheduler is not None:
+            self.scheduler.reschedule(self)
 
 
 class TiledMapSpriteCollectionElement(object):
     def __init__(self, element_dict, parent_sprite_collection):
         """
         This class represents a single element in a SpriteCollection. It can be either a still image, or
-        an animation, depending on the number of images in the element.
+        an animation, depending on the number of images in the element. Elements are shared between all sprite
+        collections using the same file, and should not be altered.
         :param dict element_dict: A json-derived dictionary that describes the contents of this element.
-        :param TiledMapSpriteCollection parent_sprite_collection: The sprite collection this element is a part of.
+        :param TiledMapSpriteCollectionTemplate parent_sprite_collection: The sprite collection template this element
+        is a part of.
         """
         self.parent_sprite_collection = parent_sprite_collection
 
@@ -1747,49 +2325,146 @@ class TiledMapSpriteCollectionElement(object):
             self.properties[element_property['name']] = element_property['value']
 
 
+class TiledMapSpriteCollectionTemplate(object):
+    def __init__(self, collection_path):
+        """
+        The parsed contents of a sprite collection file, which are shared between all sprite collections using that
+        file. Templates are retrieved through get_sprite_collection_template, so that every file is only parsed once.
+        :param str collection_path: The path of the sprite collection file, relative to the game directory.
+        """
+        self.path = collection_path
+        sprite_collection_dict = json.load(renpy.exports.file(collection_path))
+
+        # Initialize individual animations
+        self.data = {}
+        for element_dict in sprite_collection_dict['animations']:
+            self.data[element_dict["name"]] = TiledMapSpriteCollectionElement(
+                element_dict=element_dict, parent_sprite_collection=self)
+
+        self.all_images = []
+        for animation in self.data.values():
+            for frame_image in animation.images:
+                self.all_images.append(frame_image)
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Creates a template out of already parsed animations, such as those of sprite collections saved before
+        templates were shared between them.
+        :param dict[str, TiledMapSpriteCollectionElement] data: The animations, keyed by name.
+        :rtype: TiledMapSpriteCollectionTemplate
+        """
+        template = cls.__new__(cls)
+        template.path = None
+        template.data = data
+        template.all_images = []
+        for animation in data.values():
+            animation.parent_sprite_collection = template
+            template.all_images.extend(animation.images)
+        return template
+
+
+pink_sprite_collection_templates = {}
+
+
+def get_sprite_collection_template(collection_path):
+    """
+    :param str collection_path: The path of a sprite collection file, relative to the game directory.
+    :return: The template for the sprite collection file at the given path, which is parsed on first use.
+    :rtype: TiledMapSpriteCollectionTemplate
+    """
+    if collection_path not in pink_sprite_collection_templates:
+        pink_sprite_collection_templates[collection_path] = TiledMapSpriteCollectionTemplate(collection_path)
+    return pink_sprite_collection_templates[collection_path]
+
+
 class TiledMapSpriteCollection(object):  # TODO Mutual parent class for this and tile
     is_animated = True
 
-    def __init__(self, json_file, start_time=0.0):
+    def __init__(self, collection_path, start_time=0.0):
         """
         This class represents all images that belong to a single on-screen sprite, either a character or an object.
         These images are collected into elements, forming either still images or animations, depending on the number of
         images in the element. One element is the "current_animation", which is the element that is currently being
-        displayed by the sprite.
-        :param json_file: The file that contains this sprite collection's data.
+        displayed by the sprite. The elements themselves are shared with all other sprite collections using the same
+        file, with each sprite collection only keeping track of its own playback state.
+        :param str collection_path: The path of the file that contains this sprite collection's data.
         :param float start_time: the start time for this sprite collection.
         """
-        sprite_collection_dict = json.load(json_file)
-
-        # Initialize individual animations
-        self.data = {}
-        for element_dict in sprite_collection_dict['animations']:
-            self.data[element_dict["name"]] = TiledMapSpriteCollectionElement(
-                element_dict=element_dict, parent_sprite_collection=self)
+        self.collection_path = collection_path
+        self.template = get_sprite_collection_template(collection_path)
 
         # Animation variables
         self.current_animation = None
-        self.frames = OrderedDict()
+        self.timeline = None
+        self.frame_index = 0
         self.next_frame_time = start_time
-        self.next_frame_key = 0.0
         self.current_speed = 1.0
         self._image = None
-        self._changed_animation_this_frame = True
 
         # Pause variables
         self.paused = False
         self.latest_frame_gt = start_time
 
+        # The latest_frame_gt at which the animation last changed. If still equal to the latest_frame_gt, the animation
+        # has changed since the last frame update.
+        self._animation_change_gt = start_time
+
+        self.scheduler = None  # Set by the AnimationScheduler this collection is added to.
+
+    def __getstate__(self):
+        # The shared template is not saved, but retrieved again on load by its path.
+        state = self.__dict__.copy()
+        if self.collection_path is not None:
+            state.pop('template')
+            if self.current_animation is not None:
+                state['current_animation'] = self.current_animation.name
+        state.pop('timeline')
+        return state
+
+    def __setstate__(self, state):
+        """
+        :param dict state: The attribute dictionary this object was saved with. Saves made before sprite collections
+        shared their template and kept their frames in a timeline are converted.
+        """
+        self.__dict__.update(state)
+        if 'collection_path' not in state:
+            # Saved with its own animations, rather than the path of the file they were loaded from.
+            self.collection_path = None
+            self.template = TiledMapSpriteCollectionTemplate.from_data(self.__dict__.pop('data'))
+        elif self.collection_path is not None:
+            self.template = get_sprite_collection_template(self.collection_path)
+            if self.current_animation is not None:
+                self.current_animation = self.template.data[self.current_animation]
+
+        if 'frames' in state:
+            _, self.frame_index = FrameTimeline.from_frame_dict(
+                self.__dict__.pop('frames'), self.__dict__.pop('next_frame_key', None))
+        if '_changed_animation_this_frame' in state:
+            changed_animation = self.__dict__.pop('_changed_animation_this_frame')
+            self._animation_change_gt = self.latest_frame_gt if changed_animation else None
+        if 'scheduler' not in state:
+            self.scheduler = None
+
+        if self.current_animation is not None:
+            self.timeline = self._get_timeline(self.current_animation, self.current_speed)
+        else:
+            self.timeline = None
+
+    @property
+    def data(self):
+        """
+        :return: The animations of this sprite collection, keyed by name.
+        :rtype: dict[str, TiledMapSpriteCollectionElement]
+        """
+        return self.template.data
+
     def get_all_images(self):
         """
         :return: a list of all image names displayed by this sprite collection.
         :rtype: list
         """
-        all_images = []
-        for animation in self.data.values():
-            for frame_image in animation.images:
-                all_images.append(frame_image)
-        return all_images
+        return list(self.template.all_images)
 
     def increment_gt(self, gt_diff):
         """
@@ -1809,6 +2484,8 @@ class TiledMapSpriteCollection(object):  # TODO Mutual parent class for this and
         Unpauses the animation on a map unfreeze.
         """
         self.paused = False
+        if self.scheduler is not None:
+            self.scheduler.reschedule(self)
 
     def update_frame(self, gt):
         """
@@ -1816,21 +2493,9 @@ class TiledMapSpriteCollection(object):  # TODO Mutual parent class for this and
         :param float gt: Game time in seconds.
         """
         self.latest_frame_gt = gt
-        self._changed_animation_this_frame = False
-        if not self.paused and self.current_animation is not None:
-            while gt > self.next_frame_time:
-                prev_frame_key = self.next_frame_key
-
-                old_frame = self.frames.pop(prev_frame_key)
-                self.frames[prev_frame_key] = old_frame
-
-                self.next_frame_key = next(iter(self.frames))
-                if self.next_frame_key > prev_frame_key:
-                    self.next_frame_time = self.next_frame_time + self.next_frame_key - prev_frame_key
-                else:
-                    self.next_frame_time = self.next_frame_time + self.next_frame_key
-
-            self._image = self.frames[self.next_frame_key]
+        if not self.paused and self.current_animation is not None and gt > self.next_frame_time:
+            self.frame_index, self.next_frame_time = self.timeline.advance(self.frame_index, self.next_frame_time, gt)
+            self._image = self.timeline.frames[self.frame_index]
 
     def st_reset_frames(self, st):
         """
@@ -1838,28 +2503,26 @@ class TiledMapSpriteCollection(object):  # TODO Mutual parent class for this and
         be used after st resets when displaying a map.
         :param float st: Game time in seconds.
         """
-        if not self._changed_animation_this_frame:
+        if self._animation_change_gt != self.latest_frame_gt:
             self.next_frame_time = self.next_frame_time - self.latest_frame_gt + st
             self.latest_frame_gt = st
         else:
             self.next_frame_time = st
             self.latest_frame_gt = st
+            self._animation_change_gt = st
+
+        if self.scheduler is not None:
+            self.scheduler.reschedule(self)
 
     @staticmethod
-    def _get_frames(animation, time_per_frame):
+    def _get_timeline(animation, time_per_frame):
         """
-        Returns an ordered dictionary that represents the st key/frame value combinations to play the given animation
-        at the given speed from the given start time.
+        Returns the timeline that plays the given animation at the given speed.
         :param TiledMapSpriteCollectionElement animation: The animation in question
         :param float time_per_frame: the time in seconds between frames of the animation
-        :rtype: OrderedDict
+        :rtype: FrameTimeline
         """
-        frame_time = time_per_frame
-        frames = OrderedDict()
-        for image_path in animation.images:
-            frames[frame_time] = image_path
-            frame_time += time_per_frame
-        return frames
+        return FrameTimeline.from_durations([time_per_frame] * len(animation.images), animation.images)
 
     def set_animation(self, element_name, speed=None):
         """
@@ -1873,23 +2536,31 @@ class TiledMapSpriteCollection(object):  # TODO Mutual parent class for this and
             return
 
         if element_name in self.data:
+            if self.scheduler is not None:
+                # Animations are only updated when their frame changes, so the latest frame gt is brought up to date.
+                self.latest_frame_gt = self.scheduler.last_gt
+
             self.current_animation = self.data[element_name]
             if speed is None:
                 self.current_speed = self.current_animation.default_speed
             else:
                 self.current_speed = speed
-            self.frames = self._get_frames(self.current_animation, self.current_speed)
+            self.timeline = self._get_timeline(self.current_animation, self.current_speed)
+
+            self.frame_index = 0
+            self.next_frame_time = self.latest_frame_gt + self.timeline.end_times[0]
+            # For when an animation changes at the moment an event starts.
+            self._animation_change_gt = self.latest_frame_gt
+            self._image = self.timeline.frames[0]
 
-            self.next_frame_time = self.latest_frame_gt + next(iter(self.frames))
-            self.next_frame_key = next(iter(self.frames))
-            self._changed_animation_this_frame = True  # For when an animation changes at the moment an event starts.
-            self._image = self.frames[self.next_frame_key]
+            if self.scheduler is not None:
+                self.scheduler.reschedule(self)
 
         else:
             self.current_animation = None
-            self.frames = OrderedDict()
+            self.timeline = None
+            self.frame_index = 0
             self.next_frame_time = 0.0
-            self.next_frame_key = 0.0
             self.current_speed = 1.0
             self._image = None
 
@@ -1960,6 +2631,8 @@ class TiledMapGameObject(object):
             self.y = old_incarnation.y
             self._width = old_incarnation.width
             self._height = old_incarnation.height
+            if not isinstance(old_incarnation.properties, PropertyDict):
+                old_incarnation.properties = PropertyDict(old_incarnation.properties)
             self.properties = old_incarnation.properties
             self.state = old_incarnation.state
 
@@ -1970,7 +2643,7 @@ class TiledMapGameObject(object):
             self._height = height
             self.state = {}
 
-            self.properties = properties
+            self.properties = properties if isinstance(properties, PropertyDict) else PropertyDict(properties)
 
         self.xzoom, self.yzoom = self._get_zoom()
 
@@ -1999,6 +2672,15 @@ class TiledMapGameObject(object):
             # Type comparison ensures this only happens at the end of the final loading
             setattr(renpy.store, self.ref_name, self)
 
+    def __setstate__(self, state):
+        """
+        :param dict state: The attribute dictionary this object was saved with. Properties saved as a plain dictionary
+        are converted into a PropertyDict.
+        """
+        self.__dict__.update(state)
+        if not isinstance(self.properties, PropertyDict):
+            self.properties = PropertyDict(self.properties)
+
     def set_state(self, state_name, value):
         """
         Sets the given state name to the given value
@@ -2121,7 +2803,7 @@ class TiledMapGameObject(object):
         """
         if not self.is_conditional:
             return True
-        return eval(self.properties['conditional'])
+        return eval(compile_expression(self.properties['conditional']))
 
     @property
     def emits_sound(self) -> Optional[str]:
@@ -2253,7 +2935,7 @@ class TiledMapGameObject(object):
         :return: The tag for movement sound played when moving into this object. Note that the tag should correspond
         to a key in the pink_otm_terrain_noises dictionary defined in standard_events.rpy.
         """
-        return self.properties.get('sound_tag')
+        return self.properties.resolved.sound_tag
 
 
 class TiledMapGameObjectSpriteCollection(TiledMapGameObject):
@@ -2280,8 +2962,8 @@ class TiledMapGameObjectSpriteCollection(TiledMapGameObject):
             if not hasattr(self, 'sprite_collection'):
                 self.sprite_collection_path = collection_path
                 if collection_path.startswith('renpy.store'):
-                    collection_path = eval(collection_path)
-                self.sprite_collection = TiledMapSpriteCollection(renpy.exports.file(collection_path))
+                    collection_path = eval(compile_expression(collection_path))
+                self.sprite_collection = TiledMapSpriteCollection(collection_path)
 
         TiledMapGameObject.__init__(
             self, self.sprite_collection, x, y, self.sprite_collection.width,
@@ -2302,7 +2984,7 @@ class TiledMapGameObjectSpriteCollection(TiledMapGameObject):
         if self.parent is not None:
             # Rare cases where you create an object without a map being visible, such as adding OTM followers when no
             # OTM map is onscreen.
-            self.parent.animated_tiles.append(self.sprite_collection)
+            self.parent.animated_tiles.add(self.sprite_collection)
 
         if type(self) is TiledMapGameObjectSpriteCollection and self.ref_name is not None:
             # Type comparison ensures this only happens at the end of the final loading
@@ -2314,7 +2996,7 @@ class TiledMapGameObjectSpriteCollection(TiledMapGameObject):
         self.sprite_collection_path = old_incarnation.sprite_collection_path
         self._orientation = old_incarnation.orientation
         self.current_animation_name = None
-        self.sprite_collection = TiledMapSpriteCollection(renpy.exports.file(eval(self.sprite_collection_path)))
+        self.sprite_collection = TiledMapSpriteCollection(eval(compile_expression(self.sprite_collection_path)))
         self._set_animation(old_incarnation.current_animation_name)
 
     def _set_animation(self, animation_name, speed=None):
@@ -2493,13 +3175,13 @@ class TiledMapGameObjectSpriteCollection(TiledMapGameObject):
         if self.parent is not None:
             self.parent.remove_element(self)
         self.current_animation_name = None  # So new animation doesn't register as the same
-        self.sprite_collection = TiledMapSpriteCollection(renpy.loader.transfn(
-                "pink_engine/sprite_collections/" + target_sprite_collection), start_time)
+        self.sprite_collection = TiledMapSpriteCollection(
+            "pink_engine/sprite_collections/" + target_sprite_collection, start_time)
         self._set_animation(animation_name)
 
         if self.parent is not None:
             self.parent.add_element(self.x, self.y, self.layer, self)
-            self.parent.animated_tiles.append(self.sprite_collection)
+            self.parent.animated_tiles.add(self.sprite_collection)
 
 
 class TiledMapCamera(object):
@@ -2531,6 +3213,9 @@ class TiledMapCamera(object):
 
 
 class TiledMapGame(renpy.exports.Displayable):
+    # Maps saved before this attribute existed only have a conditional tracker if reactive conditionals were enabled.
+    reactive_conditionals = True
+
     tile_class = TiledMapGameTile
     tile_animated_class = TiledMapGameTileAnimated
     sprite_collection_class = TiledMapSpriteCollection
@@ -2557,10 +3242,7 @@ class TiledMapGame(renpy.exports.Displayable):
         # ----
 
         # ---------------------------------Pink Engine Properties-----------------------------------------------------
-        self.properties = {}
-        if map_dict.get('properties'):
-            for layer_property in map_dict['properties']:
-                self.properties[layer_property['name']] = layer_property['value']
+        self.properties = get_property_dict(map_dict)
 
         # ---------------------------------Simple Global Properties---------------------------------------------------
         self.orientation = map_dict["orientation"]
@@ -2598,6 +3280,7 @@ class TiledMapGame(renpy.exports.Displayable):
 
         # ---------------------------------Initiate Indexes--------------------------------------------------------
         self.tilesets = self._get_tilesets_from_dict(map_dict)
+        self.gid_table = get_gid_table(self.tilesets)
 
         # A list of all registered images used in this map. Used to start and stop image prediction. Tiles and objects
         # add the images they use as they load.
@@ -2611,15 +3294,35 @@ class TiledMapGame(renpy.exports.Displayable):
         self.base_tiles = {}
 
         # ---------------------------------Initiate Per-frame lists-----------------------------------------------------
-        # List of animated tiles. Used to update animation state during every frame
-        self.animated_tiles = []
+        # Scheduler for animated tiles and sprite collections. Used to update the animation state of those animations
+        # whose frame changes.
+        self.animated_tiles = AnimationScheduler()
 
         # List of conditional objects. Used to add and remove objects every frame
         self.conditional_objects = []
 
+        # Tracks the store variables read by the conditionals of conditional objects. If reactive conditionals are
+        # enabled, only the conditional objects whose conditionals read changed store variables are checked every tick.
+        # Either way, only conditionals whose dependencies are unknown make the map tick on every frame.
+        self.reactive_conditionals = renpy.store.pink_tmd_reactive_conditionals
+        self.conditional_tracker = ConditionalObjectTracker()
+
         # Variable sprite collections set, used to update sprite collections with a variable name.
         self.variable_sprite_collections: List[TiledMapGameObjectSpriteCollection] = []
 
+        # Size (in tiles) of the chunks that static tiles are combined into. 0 if static tiles are not chunked.
+        if renpy.store.pink_tmd_static_chunks and self.orientation == "orthogonal":
+            self.static_chunk_size = renpy.store.pink_tmd_static_chunk_size
+        else:
+            self.static_chunk_size = 0
+
+        # Size (in tiles) of the chunks in which tiles are given displayable elements when they come near the camera.
+        # 0 if all tiles are given displayable elements as the map loads.
+        if renpy.store.pink_tmd_streamed_maps and self.orientation == "orthogonal":
+            self.stream_chunk_size = renpy.store.pink_tmd_stream_chunk_size
+        else:
+            self.stream_chunk_size = 0
+
         # ---------------------------------Initiate Layers--------------------------------------------------------
         self.layers = []
         for layer_dict in map_dict.get('layers'):
@@ -2693,10 +3396,46 @@ class TiledMapGame(renpy.exports.Displayable):
             return render
 
         self.game_tick(st)
+        self._displayable.check_redraw()
 
-        renpy.exports.redraw(self, 0)
+        renpy.exports.redraw(self, self.get_next_tick_delay(st))
         return render
 
+    def needs_tick(self):
+        """
+        :return: Whether the game loop has to run on the next frame, rather than only once the next animation frame is
+        due. This is the case while there are conditional objects whose conditionals read more than store variables,
+        and until the maps that finished preloading start predicting. Conditionals that only read store variables are
+        checked on every tick that does run, which picks up changes made to those variables by scripts.
+        :rtype: bool
+        """
+        if self.conditional_tracker is None:
+            if len(self.conditional_objects) > 0:
+                return True
+        elif self.conditional_tracker.needs_polling():
+            return True
+        for map_preload in pink_map_preloader.preloads.values():
+            if not map_preload.predicting:
+                return True
+        return False
+
+    def get_next_tick_delay(self, st):
+        """
+        Determines when the game loop should run next. It runs every frame while anything on the map needs it, and
+        otherwise once the earliest upcoming animation frame is due, but no later than pink_tmd_max_idle_tick_delay
+        seconds from now, so that changes made to the map from outside of it are still picked up.
+        :param float st: The shown time (in seconds).
+        :return: The delay (in seconds) after which the game loop should run next.
+        :rtype: float
+        """
+        if self.needs_tick():
+            return 0
+        delay = renpy.store.pink_tmd_max_idle_tick_delay
+        next_frame_time = self.animated_tiles.next_frame_time()
+        if next_frame_time is not None:
+            delay = min(delay, max(0, next_frame_time - st))
+        return delay
+
     def event(self, ev, x, y, st):  # noqa mandatory variables
         """
         Makes this game object respond to events, such as key presses.
@@ -2704,6 +3443,8 @@ class TiledMapGame(renpy.exports.Displayable):
         if self.controls_enabled:
             if ev.type in self.event_type_functions:
                 self.event_type_functions[ev.type](self, ev, x, y, st)
+                # The game loop may be waiting for the next animation frame, but should respond to input right away.
+                renpy.exports.redraw(self, 0)
 
     def game_tick(self, gt):
         """
@@ -2712,21 +3453,28 @@ class TiledMapGame(renpy.exports.Displayable):
         """
         self.check_animated_tiles(gt)
         self.check_conditional_objects()
+        pink_map_preloader.poll()
         self.last_gt = gt
 
     def check_animated_tiles(self, gt):
         """
-        Updates the current frame of all animated tiles.
+        Updates the current frame of all animated tiles whose frame is due to change.
         """
-        for animated_tile in self.animated_tiles:
-            animated_tile.update_frame(gt)
+        self.animated_tiles.update(gt)
 
-    def check_conditional_objects(self):
+    def check_conditional_objects(self, check_all=False):
         """
         Checks all conditional objects, adding and removing them according to whether or not their condition is
-        currently met.
+        currently met. If reactive conditionals are enabled, only checks those objects whose condition might have
+        changed.
+        :param bool check_all: If True, checks all conditional objects, even if reactive conditionals are enabled.
         """
-        for conditional_object in self.conditional_objects:
+        if self.conditional_tracker is None or not self.reactive_conditionals or check_all:
+            conditional_objects = self.conditional_objects
+        else:
+            conditional_objects = self.conditional_tracker.get_changed_objects()
+
+        for conditional_object in conditional_objects:
             self.check_conditional_object(conditional_object)
 
     def check_conditional_object(self, conditional_object):
@@ -2748,16 +3496,11 @@ class TiledMapGame(renpy.exports.Displayable):
     def _get_tilesets_from_dict(map_dict):
         tilesets = {}
         for tileset in map_dict.get('tilesets'):
-            tileset_source = tileset.get('source')
-
             """Gets the id at which the tileset starts."""
             first_gid = tileset.get('firstgid')
 
             """If the tileset has not yet been loaded, does so."""
-            tileset_source = renpy.loader.transfn("pink_engine/orthogonal_tiled_maps/" + tileset_source)
-            if tileset_source not in pink_tileset_dict:
-                Tileset(tileset_source)
-            tilesets[first_gid] = pink_tileset_dict[tileset_source]
+            tilesets[first_gid] = load_tileset(tileset)
         return tilesets
 
     def get_tile_object(self, gid):
@@ -2772,8 +3515,9 @@ class TiledMapGame(renpy.exports.Displayable):
                 new_tile = self.tile_class(self, source_tile)
             else:
                 new_tile = self.tile_animated_class(self, source_tile)  # noqa
-                self.animated_tiles.append(new_tile)
+                self.animated_tiles.add(new_tile)
 
+            new_tile.gid = gid
             self.base_tiles[gid] = new_tile
         base_tile = self.base_tiles[gid]
 
@@ -2788,15 +3532,8 @@ class TiledMapGame(renpy.exports.Displayable):
         :param int y: The distance in pixels between this object's image's left side and the left border of the map
         :param TiledMapGameLayer layer: The layer on which this object will exist
         """
-        # pulled out of the dict)
-        property_list = object_dict.get('properties')
-        if property_list is None:
-            property_list = []
-
         # Get object properties
-        object_properties = {}
-        for object_property in property_list:
-            object_properties[object_property['name']] = object_property['value']
+        object_properties = get_property_dict(object_dict)
 
         # Add base tile properties
         sprite_path = None
@@ -2842,6 +3579,44 @@ class TiledMapGame(renpy.exports.Displayable):
         """
         self.add_element(x, y, layer, tile)
 
+    def add_streamed_tile_layer(self, layer, gids, x_offset, y_offset, direct_gids=frozenset()):
+        """
+        Adds the tiles of a streamed tile layer to this game map. They only get displayable elements once their chunk
+        comes near the camera, except for those displayed as part of a static chunk.
+        :param TiledMapGameLayer layer: The layer on which the tiles exist
+        :param array gids: The gids of the layer's tiles, row by row.
+        :param int x_offset: The x offset (in pixels) of the layer
+        :param int y_offset: The y offset (in pixels) of the layer
+        :param set|frozenset direct_gids: The gids of tiles that are added to this map one by one with add_tile anyway.
+        """
+        self._displayable.add_streamed_layer(layer, gids, x_offset, y_offset)
+        has_static_elements = self.static_chunk_size > 0 and layer.layer_type in STATIC_CHUNK_LAYERS
+        if not has_static_elements and len(direct_gids) == 0:
+            return
+
+        for index, gid in enumerate(gids):
+            if gid == 0 or not (has_static_elements or gid in direct_gids):
+                continue
+            tile = self.get_tile_object(gid)
+            row, column = divmod(index, self.grid_size.x)
+            x = x_offset + column * self.tile_size.x
+            y = y_offset + row * self.tile_size.y - tile.height + self.tile_size.y
+            if gid in direct_gids:
+                self.add_tile(tile, x, y, layer)
+            elif self.is_static_chunk_element(layer, tile):
+                self._displayable.add_static_element(x=x, y=y, layer=layer, game_object=tile)
+
+    def release_streamed_tiles(self, min_chunk_x, max_chunk_x, min_chunk_y, max_chunk_y):
+        """
+        Called once the displayable has released the streamed chunks outside the given chunk bounds, so that what else
+        is kept for the tiles of those chunks can be released as well. Implemented in sub-classes.
+        :param int min_chunk_x: The x of the first column of chunks that is kept.
+        :param int max_chunk_x: The x of the last column of chunks that is kept.
+        :param int min_chunk_y: The y of the first row of chunks that is kept.
+        :param int max_chunk_y: The y of the last row of chunks that is kept.
+        """
+        pass
+
     def add_element(self, x, y, layer, game_object, already_in_conditional=False):
         """
         Adds a new element (tile or object) to this game map
@@ -2854,11 +3629,30 @@ class TiledMapGame(renpy.exports.Displayable):
         """
         if game_object.is_conditional and not already_in_conditional:
             self.conditional_objects.append(game_object)
+            if self.conditional_tracker is not None:
+                self.conditional_tracker.add(game_object)
             if game_object.condition_met() and layer.layer_type in VISIBLE_LAYERS:
                 self._displayable.add_element(x=x, y=y, layer=layer, game_object=game_object)
-        elif layer.layer_type in VISIBLE_LAYERS:
+        elif self.is_static_chunk_element(layer, game_object):
+            self._displayable.add_static_element(x=x, y=y, layer=layer, game_object=game_object)
+        elif layer.layer_type in VISIBLE_LAYERS and not (layer.streamed and not game_object.single_display):
             self._displayable.add_element(x=x, y=y, layer=layer, game_object=game_object)
 
+    def is_static_chunk_element(self, layer, game_object):
+        """
+        :param TiledMapGameLayer layer: The layer on which the given object exists
+        :param self.tile_class|self.tile_animated_class|self.object_class game_object: The given object
+        :return: Whether the given object should be displayed as part of a static chunk, rather than as a displayable
+        element of its own.
+        :rtype: bool
+        """
+        return (
+            self.static_chunk_size > 0 and
+            layer.layer_type in STATIC_CHUNK_LAYERS and
+            not game_object.single_display and
+            not game_object.is_animated and
+            not game_object.is_conditional)
+
     def remove_element(self, element):
         """
         Removes the given element from this map
@@ -2882,37 +3676,36 @@ class TiledMapGame(renpy.exports.Displayable):
         """
         return self._displayable
 
+    def estimate_memory_size(self):
+        """
+        :return: An estimate of the memory taken up by this map in bytes. Images are not included, as they are kept in
+        renpy's image cache, which is shared between maps.
+        :rtype: int
+        """
+        size = self._displayable.estimate_memory_size() + getsizeof(self.map_objects)
+        for map_object in self.map_objects.values():
+            size += get_instance_size(map_object) + getsizeof(map_object.properties)
+        return size
+
     def get_tile(self, tile_id):
         """
         Returns the image path for the tile that uses the given ID in this map.
 
         :param int tile_id: The id used by the given tile on this map. Is equal to the tile's ID within its own tileset
         plus the first_gid for the tileset in this map.
-        :return: The tile with the given id.
+        :return: The tile with the given id. Flipping tiles is not supported, so flipped tiles are returned unflipped,
+        with a warning.
         :rtype: TilesetTile
         """
-        if tile_id == 0:
-            return None  # Empty tile
-
-        if tile_id > 2147483648:  # TODO horizontal flip, currently not supported
-            tile_id -= 2147483648
-        if tile_id > 1073741824:  # TODO vertical flip, currently not supported
-            tile_id -= 1073741824
-        if tile_id > 536870912:  # TODO diagonal flip, currently not supported
-            tile_id -= 536870912
-
-        """First identifies which tileset the image id is from, then retrieves the appropriate tile"""
-        first_gids = sorted(self.tilesets, reverse=True)
-        prev_gid = first_gids[0]
-
-        while len(first_gids) > 0:
-            prev_gid = first_gids.pop(0)
-            if tile_id >= prev_gid:
-                break
-
-        tile_object = self.tilesets[prev_gid].get_tile(tile_id - prev_gid)
-
-        return tile_object
+        flips = [
+            flip_name for flip_flag, flip_name in (
+                (GID_FLIPPED_HORIZONTALLY, "horizontally"), (GID_FLIPPED_VERTICALLY, "vertically"),
+                (GID_FLIPPED_DIAGONALLY, "diagonally"))
+            if tile_id & flip_flag]
+        if len(flips) > 0:
+            warnings.warn("Map {} uses gid {} flipped {}, but flipped tiles are not supported and are shown unflipped."
+                          .format(self.path, tile_id, " and ".join(flips)))
+        return self.gid_table.get_tile(tile_id)
 
     def start_predicting(self):
         """
@@ -2951,10 +3744,10 @@ class TiledMapGameLayer(object):
         self.parent = parent
 
         # Initializes custom properties
-        self.properties = {}
-        if layer_dict.get('properties'):
-            for layer_property in layer_dict['properties']:
-                self.properties[layer_property['name']] = layer_property['value']
+        self.properties = get_property_dict(layer_dict)
+
+        # Whether the tiles of this layer are only given displayable elements when they come near the camera.
+        self.streamed = False
 
         # Returns if condition not met
         if not self.condition_met:
@@ -2990,16 +3783,23 @@ class TiledMapGameLayer(object):
         x, c, y = xoffset, 0, yoffset
         if layer_dict.get('data') is None:
             return
-        for gid in layer_dict['data']:
-            if gid != 0:
-                tile = self.parent.get_tile_object(gid)
-                place_y = y - tile.height + self.parent.tile_size.y
-                self.parent.add_tile(x=x, y=place_y, layer=self, tile=tile)
-            x += self.parent.tile_size.x
-            c += 1
-            if c == self.parent.grid_size.x:
-                y += self.parent.tile_size.y
-                c, x = 0, xoffset
+        if self.parent.stream_chunk_size > 0 and self.layer_type in VISIBLE_LAYERS:
+            self.streamed = True
+            self.parent.add_streamed_tile_layer(self, decode_tile_data(layer_dict['data']), xoffset, yoffset)
+        else:
+            for gid in layer_dict['data']:
+                if gid != 0:
+                    tile = self.parent.get_tile_object(gid)
+                    place_y = y - tile.height + self.parent.tile_size.y
+                    self.parent.add_tile(x=x, y=place_y, layer=self, tile=tile)
+                x += self.parent.tile_size.x
+                c += 1
+                if c == self.parent.grid_size.x:
+                    y += self.parent.tile_size.y
+                    c, x = 0, xoffset
+
+        if self.parent.static_chunk_size > 0:
+            self.parent.get_displayable().register_static_chunks()
 
     def _init_orthogonal_object_layer(self, layer_dict):
         """
@@ -3162,7 +3962,7 @@ class TiledMapGameLayer(object):
     @property
     def condition_met(self):
         if 'conditional' in self.properties:
-            return eval(self.properties['conditional'])
+            return eval(compile_expression(self.properties['conditional']))
         else:
             return True
 
@@ -3178,8 +3978,315 @@ def filepath_to_reg_image(image_filepath):
     return renpy.exports.get_registered_image(file_name.lower())
 
 
-# TODO When checking mobile objects and animated object, use the next gt for their animation/movement, rather than
-#  looping through all. That way, objects with slow animations or rare movements won't affect tps.
+# ======================================================================================================================
+# ===========================================MAP LOADING================================================================
+# ======================================================================================================================
+COMPILED_MAP_VERSION = 2  # Increment whenever the compiled map format changes, invalidating all compiled maps.
+
+
+def get_property_dict(element_dict):
+    """
+    :param dict element_dict: The dictionary of a map, layer or object.
+    :return: The custom properties of the given element as a name -> value dictionary. Handles both the property lists
+    of Tiled json files, and the property dictionaries of compiled maps.
+    :rtype: dict
+    """
+    element_properties = element_dict.get('properties')
+    if element_properties is None:
+        return {}
+    elif isinstance(element_properties, dict):
+        return dict(element_properties)
+
+    property_dict = {}
+    for element_property in element_properties:
+        property_dict[element_property['name']] = element_property['value']
+    return property_dict
+
+
+def decode_tile_data(data, encoding=None, compression=None):
+    """
+    :param list|str|array data: The data of a Tiled tile layer or chunk. Either a list of gids, or a base64 string of
+    little-endian 32-bit gids.
+    :param str|None encoding: The encoding of the data. Either 'csv' (or None) for a list of gids, or 'base64'.
+    :param str|None compression: The compression of base64 encoded data. Either 'zlib', 'gzip', 'zstd' or None. zstd
+    compressed data can only be decoded if the zstandard module is available.
+    :return: The gids of the given data as a packed array, decoded without creating an intermediate list.
+    :rtype: array
+    """
+    if isinstance(data, array):
+        return data
+    if encoding != 'base64':
+        return array('I', data)
+
+    tile_bytes = base64.b64decode(data)
+    if compression == 'zlib':
+        tile_bytes = zlib.decompress(tile_bytes)
+    elif compression == 'gzip':
+        tile_bytes = gzip.decompress(tile_bytes)
+    elif compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("Loading zstd compressed tile layers requires the zstandard module.")
+        tile_bytes = zstandard.ZstdDecompressor().decompressobj().decompress(tile_bytes)
+    elif compression:
+        raise ValueError("Unsupported tile layer compression: {}".format(compression))
+
+    gids = array('I')
+    gids.frombytes(tile_bytes)
+    if sys.byteorder == 'big':
+        gids.byteswap()
+    return gids
+
+
+def _flatten_infinite_map(map_dict):
+    """
+    Converts the chunks of the tile layers of an infinite Tiled map into regular tile layer data, covering the area
+    from the top left to the bottom right chunk of all layers. The map's width and height are set to the size of that
+    area, and the objects are moved along with its top left corner, which becomes the origin of the map.
+    :param dict map_dict: The dictionary loaded from a Tiled json map. Is altered in place.
+    """
+    chunks = [
+        chunk for layer_dict in map_dict.get('layers', []) for chunk in layer_dict.get('chunks') or []]
+    if len(chunks) == 0:
+        return
+
+    min_x = min(chunk['x'] for chunk in chunks)
+    min_y = min(chunk['y'] for chunk in chunks)
+    width = max(chunk['x'] + chunk['width'] for chunk in chunks) - min_x
+    height = max(chunk['y'] + chunk['height'] for chunk in chunks) - min_y
+
+    for layer_dict in map_dict['layers']:
+        if layer_dict.get('chunks') is not None:
+            encoding, compression = layer_dict.pop('encoding', None), layer_dict.pop('compression', None)
+            data = array('I', [0]) * (width * height)
+            for chunk in layer_dict.pop('chunks'):
+                chunk_data = decode_tile_data(chunk['data'], encoding, compression)
+                chunk_width = chunk['width']
+                for row in range(chunk['height']):
+                    start = (chunk['y'] - min_y + row) * width + chunk['x'] - min_x
+                    data[start:start + chunk_width] = chunk_data[row * chunk_width:(row + 1) * chunk_width]
+            layer_dict['data'] = data
+            layer_dict['width'], layer_dict['height'] = width, height
+            layer_dict['startx'], layer_dict['starty'] = 0, 0
+        elif layer_dict.get('type') == "objectgroup":
+            layer_dict['offsetx'] = (layer_dict.get('offsetx') or 0) - min_x * map_dict['tilewidth']
+            layer_dict['offsety'] = (layer_dict.get('offsety') or 0) - min_y * map_dict['tileheight']
+
+    map_dict['width'], map_dict['height'] = width, height
+    map_dict['infinite'] = False
+
+
+def compile_map_dict(map_dict, map_path):
+    """
+    Converts the dictionary of a Tiled json map into the compiled map format, in which the gids of tile layers are
+    decoded into packed arrays, the chunks of infinite maps are combined into regular tile layers, custom properties
+    are flattened into name -> value dictionaries, and tileset sources are resolved relative to the game directory.
+    :param dict map_dict: The dictionary loaded from a Tiled json map. Is altered in place.
+    :param str map_path: The path of the map relative to the game directory.
+    :return: The compiled map dictionary
+    :rtype: dict
+    """
+    map_folder = posixpath.dirname(map_path)
+    for tileset in map_dict.get('tilesets', []):
+        if tileset.get('source') is not None:
+            tileset['resolved_source'] = posixpath.normpath(posixpath.join(map_folder, tileset['source']))
+
+    _flatten_infinite_map(map_dict)
+    map_dict['properties'] = get_property_dict(map_dict)
+    for layer_dict in map_dict.get('layers', []):
+        layer_dict['properties'] = get_property_dict(layer_dict)
+        if layer_dict.get('data') is not None:
+            layer_dict['data'] = decode_tile_data(
+                layer_dict['data'], layer_dict.pop('encoding', None), layer_dict.pop('compression', None))
+        for object_dict in layer_dict.get('objects', []):
+            object_dict['properties'] = get_property_dict(object_dict)
+    return map_dict
+
+
+def _get_compiled_map_path(map_path):
+    """
+    :param str map_path: The path of a map relative to the game directory.
+    :return: The path at which the compiled version of the given map is stored, based on the modification time and
+    size of the source file if it can be found on disk, or on a hash of its contents if it is part of an archive.
+    :rtype: str
+    """
+    try:
+        source_path = renpy.loader.transfn(map_path)
+        source_stat = os.stat(source_path)
+        key = "{}|{}|{}".format(map_path, source_stat.st_mtime, source_stat.st_size).encode('utf-8')
+    except Exception:  # noqa transfn raises a plain Exception for files that are only in archives.
+        key = renpy.exports.file(map_path).read()
+
+    file_name = os.path.splitext(os.path.basename(map_path))[0]
+    return os.path.join(
+        renpy.config.savedir, "pink_compiled_maps", "{}_{}.pickle".format(file_name, hashlib.sha1(key).hexdigest()))
+
+
+def load_map_dict(map_path):
+    """
+    Loads the dictionary of the map at the given path, in the compiled map format. If pink_tmd_compiled_map_cache is
+    enabled, the compiled map is stored next to the save files on its first load, after which it is loaded from that
+    compiled version until the source file changes.
+    :param str map_path: The path of the map relative to the game directory.
+    :rtype: dict
+    """
+    if not renpy.store.pink_tmd_compiled_map_cache or renpy.config.savedir is None:
+        return compile_map_dict(json.load(renpy.exports.file(map_path)), map_path)
+
+    compiled_path = _get_compiled_map_path(map_path)
+    try:
+        with open(compiled_path, 'rb') as compiled_file:
+            version, map_dict = pickle.load(compiled_file)
+        if version == COMPILED_MAP_VERSION:
+            return map_dict
+    except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    map_dict = compile_map_dict(json.load(renpy.exports.file(map_path)), map_path)
+    try:
+        os.makedirs(os.path.dirname(compiled_path), exist_ok=True)
+        temporary_path = "{}.{}.tmp".format(compiled_path, threading.get_ident())
+        with open(temporary_path, 'wb') as compiled_file:
+            pickle.dump((COMPILED_MAP_VERSION, map_dict), compiled_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, compiled_path)
+    except (IOError, OSError):
+        pass  # Compiling is only an optimization, so the map can be used even if it could not be stored.
+    return map_dict
+
+
+def load_tileset(tileset_dict):
+    """
+    :param dict tileset_dict: The entry for a tileset in the tilesets list of a map dictionary.
+    :return: The tileset referred to by the given entry, which is loaded if it has not been loaded before.
+    :rtype: Tileset
+    """
+    tileset_source = tileset_dict.get('resolved_source')
+    if tileset_source is None:
+        tileset_source = "pink_engine/orthogonal_tiled_maps/" + tileset_dict.get('source')
+
+    tileset_source = renpy.loader.transfn(tileset_source)
+    with pink_tileset_lock:
+        if tileset_source not in pink_tileset_dict:
+            Tileset(tileset_source)
+        return pink_tileset_dict[tileset_source]
+
+
+class MapPreload(object):
+    def __init__(self, map_path):
+        """
+        A map being loaded in the background. Loads the map's dictionary and tilesets on a worker thread, and collects
+        the names of the images used by those tilesets so they can be predicted.
+        :param str map_path: The path of the map relative to the game directory.
+        """
+        self.map_path = map_path
+        self.map_dict = None  # Stays None if loading failed, in which case the map is loaded normally.
+        self.images = set()
+        self.predicting = False
+
+        self.thread = threading.Thread(target=self._load, name="pink_map_preload")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _load(self):
+        """
+        Carried out on the worker thread.
+        """
+        try:
+            map_dict = load_map_dict(self.map_path)
+            images = set()
+            for tileset_dict in map_dict.get('tilesets', []):
+                for tile in load_tileset(tileset_dict).tiles.values():
+                    images.add(filepath_to_reg_image(tile.image))
+            images.discard(None)
+
+            self.images = images
+            self.map_dict = map_dict
+        except Exception:  # noqa Any errors are raised again when the map is loaded normally.
+            self.map_dict = None
+
+    def is_finished(self):
+        """
+        :rtype: bool
+        """
+        return not self.thread.is_alive()
+
+    def start_predicting(self):
+        """
+        Causes renpy to start predicting the images used by the preloaded map. Must be called from the main thread.
+        """
+        for image_name in self.images:
+            renpy.exports.start_predict(image_name)
+        self.predicting = True
+
+    def stop_predicting(self):
+        """
+        Causes renpy to stop predicting the images used by the preloaded map. Must be called from the main thread.
+        """
+        if self.predicting:
+            for image_name in self.images:
+                renpy.exports.stop_predict(image_name)
+            self.predicting = False
+
+
+class MapPreloader(object):
+    def __init__(self):
+        """
+        Keeps track of the maps being loaded in the background, so that going to one of them only requires the map
+        itself to be built.
+        """
+        self.preloads = OrderedDict()  # map path -> MapPreload, from least to most recently requested.
+
+    def preload(self, map_path):
+        """
+        Starts loading the map at the given path in the background, if it is not being preloaded already.
+        :param str map_path: The path of the map relative to the game directory.
+        """
+        if map_path in self.preloads:
+            self.preloads.move_to_end(map_path)
+            return
+
+        self.preloads[map_path] = MapPreload(map_path)
+        while len(self.preloads) > max(renpy.store.pink_tmd_preload_limit, 1):
+            old_path, old_preload = self.preloads.popitem(last=False)
+            old_preload.stop_predicting()
+
+    def discard_except(self, map_paths):
+        """
+        Discards all preloaded maps except those with the given paths.
+        :param set map_paths: The paths of the maps to keep.
+        """
+        for map_path in list(self.preloads):
+            if map_path not in map_paths:
+                self.preloads.pop(map_path).stop_predicting()
+
+    def poll(self):
+        """
+        Starts predicting the images of the maps that have finished loading. Called every tick from the main thread.
+        """
+        for map_preload in self.preloads.values():
+            if not map_preload.predicting and map_preload.is_finished():
+                map_preload.start_predicting()
+
+    def take(self, map_path):
+        """
+        Removes the preloaded map with the given path, waiting for it to finish loading if necessary.
+        :param str map_path: The path of the map relative to the game directory.
+        :return: The dictionary of the map, or None if it was not preloaded or could not be loaded.
+        :rtype: dict|None
+        """
+        map_preload = self.preloads.pop(map_path, None)
+        if map_preload is None:
+            return None
+
+        map_preload.thread.join()
+        map_preload.stop_predicting()  # The new map starts predicting its own images.
+        return map_preload.map_dict
+
+
+pink_map_preloader = MapPreloader()
+
+
+# TODO When checking mobile objects, use the next gt for their movement, rather than looping through all. That way,
+#  objects with rare movements won't affect tps.
 # TODO restore interaction and movement layer functionality?
 
 # TODO matrix effect
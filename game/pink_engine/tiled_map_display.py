@@ -1,7 +1,6 @@
-from pink_engine.tiled_game import TiledMapGame
+from pink_engine.tiled_game import TiledMapGame, load_map_dict
 import renpy  # noqa
 import pygame  # noqa
-import json
 
 
 class TiledMapGameDisplay(TiledMapGame):
@@ -10,8 +9,7 @@ class TiledMapGameDisplay(TiledMapGame):
 
 
 def go_to_map(target_map, func, *args, **kwargs):
-    map_file = renpy.exports.file("pink_engine/orthogonal_tiled_maps/" + target_map)
-    map_dict = json.load(map_file)
+    map_dict = load_map_dict("pink_engine/orthogonal_tiled_maps/" + target_map)
     new_map = TiledMapGameDisplay(map_dict, "pink_engine/orthogonal_tiled_maps/" + target_map)
 
     renpy.store.pink_tmd_current_map = new_map
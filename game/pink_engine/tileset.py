@@ -1,8 +1,18 @@
 import json
-from pink_engine.commons import MapElement
-from collections import OrderedDict
+import threading
+from pink_engine.commons import MapElement, FrameTimeline
 
 pink_tileset_dict = {}
+pink_gid_table_dict = {}
+
+# Held while tilesets and gid tables are created and registered, as maps are also preloaded on worker threads.
+pink_tileset_lock = threading.RLock()
+
+# Flags stored in the highest bits of the gids of Tiled maps.
+GID_FLIPPED_HORIZONTALLY = 0x80000000
+GID_FLIPPED_VERTICALLY = 0x40000000
+GID_FLIPPED_DIAGONALLY = 0x20000000
+GID_MASK = 0x0FFFFFFF
 
 
 class Tileset:
@@ -20,14 +30,15 @@ class Tileset:
 
         self.tiles = {}
 
-        pink_tileset_dict[tileset_json] = self
-
         for tile_dict in json_dict.get('tiles'):
             if 'animation' in tile_dict:
                 self.tiles[tile_dict.get('id')] = TilesetAnimatedTile(tile_dict=tile_dict, parent_tileset=self)
             else:
                 self.tiles[tile_dict.get('id')] = TilesetTile(tile_dict=tile_dict, parent_tileset=self)
 
+        # Only registered once complete, so that other threads never retrieve a partially loaded tileset.
+        pink_tileset_dict[tileset_json] = self
+
     def get_tile(self, tile_id):
         """
         Retrieves the tile object with the given ID.
@@ -39,6 +50,60 @@ class Tileset:
         return self.tiles[tile_id]
 
 
+class TileGidTable:
+    def __init__(self, tilesets):
+        """
+        A lookup table from the gids used by a map to the tiles of its tilesets, which is built once for every set of
+        tilesets, rather than searching through the tilesets whenever a gid is resolved.
+
+        :param dict tilesets: The tilesets used by the map, keyed by their first gid.
+        """
+        self.tiles = [None]
+
+        first_gids = sorted(tilesets)
+        for index, first_gid in enumerate(first_gids):
+            next_first_gid = first_gids[index + 1] if index + 1 < len(first_gids) else None
+            for tile_id, tile in tilesets[first_gid].tiles.items():
+                gid = first_gid + tile_id
+                if next_first_gid is not None and gid >= next_first_gid:
+                    continue  # Belongs to the range of the next tileset.
+                if gid >= len(self.tiles):
+                    self.tiles.extend([None] * (gid + 1 - len(self.tiles)))
+                self.tiles[gid] = tile
+
+    def get_tile(self, gid):
+        """
+        Retrieves the tile with the given gid. Flip flags are ignored, as flipping tiles is not supported.
+
+        :param int gid: The given gid
+        :return: The tile with the given gid, or None for the empty gid 0.
+        :rtype: TilesetTile|None
+        """
+        gid &= GID_MASK
+        if gid == 0:
+            return None  # Empty tile
+
+        tile = self.tiles[gid] if gid < len(self.tiles) else None
+        if tile is None:
+            raise KeyError(gid)
+        return tile
+
+
+def get_gid_table(tilesets):
+    """
+    Retrieves the gid lookup table for the given tilesets, creating it if no map using the same tilesets at the same
+    first gids has been loaded before.
+
+    :param dict tilesets: The tilesets used by a map, keyed by their first gid.
+    :rtype: TileGidTable
+    """
+    table_key = tuple(sorted((first_gid, id(tileset)) for first_gid, tileset in tilesets.items()))
+    with pink_tileset_lock:
+        if table_key not in pink_gid_table_dict:
+            pink_gid_table_dict[table_key] = TileGidTable(tilesets)
+        return pink_gid_table_dict[table_key]
+
+
 class TilesetTile(MapElement):
     def __init__(self, tile_dict, parent_tileset):
         """
@@ -59,25 +124,30 @@ class TilesetAnimatedTile(TilesetTile):
         TilesetTile.__init__(self, tile_dict, parent_tileset)
 
         self.animation = tile_dict['animation']
-        self.frames = OrderedDict()
 
-        ms_counter = 0
-        for animation_dict in tile_dict['animation']:
-            ms_counter += animation_dict['duration']
-            self.frames[ms_counter] = animation_dict['tileid']
+        # Timeline of tile ids, with frame end times in ms.
+        self.timeline = FrameTimeline.from_durations(
+            [animation_dict['duration'] for animation_dict in tile_dict['animation']],
+            [animation_dict['tileid'] for animation_dict in tile_dict['animation']])
 
-        self.animation_time = ms_counter
+        self.animation_time = self.timeline.duration
+
+    def __setstate__(self, state):
+        """
+        :param dict state: The attribute dictionary this tile was saved with. Frames saved as a dictionary of frame end
+        times to tile ids are converted into a timeline.
+        """
+        self.__dict__.update(state)
+        if 'frames' in state:
+            self.timeline, _ = FrameTimeline.from_frame_dict(self.__dict__.pop('frames'))
 
     def get_frame_image(self, st):
         """
         Get the image for the frame that should be displayed at the given st.
         :param float st: The given show time (in seconds)
         """
-        time_in_animation = (st * 1000) % self.animation_time
-        for key in self.frames:
-            if key >= time_in_animation:
-                tile_id = self.frames[key]
-                current_tile = self.parent.get_tile(tile_id)
-                return current_tile.image
-
-        return self.image
+        if len(self.timeline.frames) == 0:
+            return self.image
+
+        current_tile = self.parent.get_tile(self.timeline.frame_at(st * 1000))
+        return current_tile.image